@@ -39,6 +39,27 @@ class Log:
         with open("audit_trail.log", "a") as log_file:
             log_file.write(audit_entry + "\n")
 
+    @staticmethod
+    def audit_trail_batch(user, entries):
+        """Audit many (action, resource, status) entries with one write"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        audit_entries = "\n".join(
+            f"[AUDIT] {timestamp} - User: {user.username} | Action: {action} | Resource: {resource} | Status: {status}"
+            for action, resource, status in entries
+        )
+        print(audit_entries)
+        with open("audit_trail.log", "a") as log_file:
+            log_file.write(audit_entries + "\n")
+
+    @staticmethod
+    def access_grant_batch(user, resources):
+        """Log many access grants with one write"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        grants = "\n".join(f"[ACCESS GRANTED] {timestamp} - {user.username} accessed {resource}" for resource in resources)
+        print(grants)
+        with open("access_logs.log", "a") as log_file:
+            log_file.write(grants + "\n")
+
 
 # ============================================================
 # ALERT SYSTEM
@@ -225,12 +246,40 @@ class AccessController:
         return "GRANTED: Access allowed"
 
     def batch_access_request(self, user, resources, action):
-        """Process multiple access requests"""
-        results = []
-        for resource in resources:
-            result = self.request_access(user, resource, action)
-            results.append(f"{resource}: {result}")
-        return results
+        """
+        Process multiple access requests.
+        The user, device and permission checks do not depend on the
+        resource, so they run once for the batch and the log lines are
+        written as one grouped write per log file.
+        """
+        resources = list(resources)
+        if not resources:
+            return []
+
+        if not user.is_authenticated():
+            AlertSystem.notify_failed_login(user)
+            Log.audit_trail_batch(user, [(action, resource, "DENIED - Not Authenticated") for resource in resources])
+            self.denied_attempts += len(resources)
+            result = "DENIED: User not logged in"
+        elif not user.device_is_secure():
+            AlertSystem.notify_device_security_issue(user)
+            Log.audit_trail_batch(user, [(action, resource, "DENIED - Device Security Issue") for resource in resources])
+            result = "DENIED: Device does not meet security standards"
+        elif action not in user.get_permissions():
+            AlertSystem.notify_unauthorized_access(user, ", ".join(resources), action)
+            Log.security_event(user, f"Unauthorized attempt to {action} {len(resources)} resources")
+            Log.audit_trail_batch(user, [(action, resource, "DENIED - Insufficient Permissions") for resource in resources])
+            self.denied_attempts += len(resources)
+            result = "DENIED: Insufficient permissions"
+        else:
+            if action == "PUBLISH":
+                for resource in resources:
+                    DRM.apply_watermark(resource)
+            Log.access_grant_batch(user, resources)
+            Log.audit_trail_batch(user, [(action, resource, "GRANTED") for resource in resources])
+            result = "GRANTED: Access allowed"
+
+        return [f"{resource}: {result}" for resource in resources]
 
     def get_access_summary(self):
         """Get summary of access control statistics"""
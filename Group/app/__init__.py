@@ -24,4 +24,176 @@ def create_app():
     app.config['SESSION_TIMEOUT'] = 900  # 15 minutes
     app.config['JSON_SORT_KEYS'] = False
     
+    # Background log writer (see app/log_writer.py)
+    app.config['LOG_FLUSH_INTERVAL'] = 0.05  # seconds per group commit
+    app.config['LOG_BATCH_SIZE'] = 512  # lines per group commit
+    app.config['LOG_FSYNC_POLICY'] = 'interval'  # none | batch | interval
+    app.config['LOG_FSYNC_INTERVAL'] = 1.0  # seconds, for 'interval'
+    
+    # Shared state for rate limits, MFA challenges and counters
+    # ('local' = per process, 'sqlite' = shared by all workers on a host)
+    app.config['STATE_BACKEND'] = os.environ.get('STATE_BACKEND', 'local')
+    app.config['STATE_DB_PATH'] = os.path.join(app_dir, 'data', 'shared_state.db')
+    app.config['STATE_SHARDS'] = 64  # lock stripes for the 'local' backend
+    
+    # User directory ('memory' = seeded demo users, 'sqlite' = indexed database)
+    app.config['USER_BACKEND'] = os.environ.get('USER_BACKEND', 'memory')
+    app.config['USER_DB_PATH'] = os.path.join(app_dir, 'data', 'users.db')
+    
+    # Upper bound on items per POST /api/request-access/batch
+    app.config['BATCH_ACCESS_MAX_ITEMS'] = 5000
+    
+    # Access decision cache (rate limiting and audit logging still run on hits)
+    app.config['DECISION_CACHE_TTL'] = 30  # seconds
+    app.config['DECISION_CACHE_SIZE'] = 10000  # entries
+    
+    # Session principals (resolved identity + permissions), dropped on logout/role change
+    app.config['PRINCIPAL_CACHE_TTL'] = 300  # seconds
+    app.config['PRINCIPAL_CACHE_SIZE'] = 10000  # sessions
+    
+    # Password checks (scrypt) run in a process pool; logins beyond the
+    # queue bound get 503 instead of blocking request threads
+    app.config['CREDENTIAL_WORKERS'] = min(2, os.cpu_count() or 1)
+    app.config['CREDENTIAL_MAX_PENDING'] = 16
+    app.config['CREDENTIAL_TIMEOUT'] = 5.0  # seconds
+    app.config['SCRYPT_N'] = 2 ** 14  # work factor; memory is 128 * N * r bytes
+    app.config['SCRYPT_R'] = 8
+    app.config['SCRYPT_P'] = 1
+    
+    # MFA challenges expire on a timer wheel; per-user and per-process caps
+    app.config['MFA_CHALLENGE_TTL'] = 300  # seconds
+    app.config['MFA_MAX_CHALLENGES_PER_USER'] = 3  # challenges sent per user within the TTL
+    app.config['MFA_MAX_ACTIVE_CHALLENGES'] = 10000
+    
+    # Behavior profiles learned offline by replay_audit_logs.py, loaded at startup
+    app.config['BEHAVIOR_SNAPSHOT_PATH'] = os.path.join(app_dir, 'data', 'behavior_profiles.snap')
+    
+    # Risk distribution of the whole user directory on the dashboard
+    app.config['RISK_DISTRIBUTION_TTL'] = 60  # seconds between batch rescoring
+    
+    # Recent risk scores kept per user for /api/security/risk-assessment
+    app.config['RISK_HISTORY_SIZE'] = 64  # scores per user
+    app.config['RISK_HISTORY_MAX_USERS'] = 100000  # least recently scored users dropped beyond this
+    
+    # IP range -> location risk table (CSV: network or start,end + risk, label)
+    app.config['IP_REPUTATION_PATH'] = os.path.join(app_dir, 'data', 'ip_reputation.csv')
+    app.config['IP_DEFAULT_LOCATION_RISK'] = 5  # public addresses outside every range
+    
+    # Compliance report is kept current per user change and written on a schedule
+    app.config['COMPLIANCE_REPORT_INTERVAL'] = 300  # seconds; 0 disables the file
+    
+    # Device registry: posture results cached per fingerprint and kept across restarts
+    app.config['DEVICE_DB_PATH'] = os.path.join(app_dir, 'data', 'devices.db')
+    app.config['DEVICE_POSTURE_TTL'] = 3600  # seconds before a device is re-assessed
+    app.config['DEVICE_CACHE_SIZE'] = 10000  # devices held in memory
+    app.config['DEVICE_FILTER_CAPACITY'] = 1000000  # fingerprints per membership filter at 1% false positives
+    # Posture probes are simulated; only let them override device_secure once they are real checks
+    app.config['DEVICE_POSTURE_AUTHORITATIVE'] = os.environ.get('DEVICE_POSTURE_AUTHORITATIVE', '0') == '1'
+    
+    # Content files (media) are encrypted in authenticated chunks; workers > 1 uses a process pool
+    # Key from the environment, else a random key generated once and kept in CONTENT_KEY_PATH
+    app.config['CONTENT_ENCRYPTION_KEY'] = os.environ.get('CONTENT_ENCRYPTION_KEY')
+    app.config['CONTENT_KEY_PATH'] = os.path.join(app_dir, 'data', 'content.key')
+    app.config['CONTENT_CHUNK_SIZE'] = 1 << 20  # bytes per chunk
+    app.config['CONTENT_CRYPTO_WORKERS'] = 1
+    
+    # Published files are watermarked per user: originals in CONTENT_DIR, marked copies per user below
+    app.config['CONTENT_DIR'] = os.path.join(app_dir, 'content')
+    app.config['WATERMARK_OUTPUT_DIR'] = os.path.join(app_dir, 'data', 'watermarked')
+    # Threads making first (full) copies off the request path; 0 copies inline
+    app.config['WATERMARK_WORKERS'] = 2
+    
+    # Per-stage latency histograms (toggle at runtime via /api/security/stage-latency)
+    app.config['STAGE_TIMING_ENABLED'] = True
+    
+    from app.models import (
+        Log, RateLimiter, AccessController, User, MFA, BehaviorAnalysis, RiskScoring, ComplianceEngine,
+        DeviceFingerprint, EncryptionEngine, DRM
+    )
+    from app.instrumentation import stage_timer
+    from app.principal import principal_cache
+    from app.credentials import credential_verifier
+    from app.risk_batch import population_risk
+    from app.ip_reputation import ip_reputation
+    from app.shared_state import configure_state_store
+    from app.content_crypto import load_or_create_key
+    
+    if app.config['STATE_BACKEND'] == 'sqlite':
+        configure_state_store('sqlite', path=app.config['STATE_DB_PATH'])
+    else:
+        configure_state_store('local', shards=app.config['STATE_SHARDS'])
+    RateLimiter.configure()
+    if app.config['USER_BACKEND'] == 'sqlite':
+        User.configure_repository('sqlite', path=app.config['USER_DB_PATH'])
+    AccessController.decision_cache.configure(
+        ttl=app.config['DECISION_CACHE_TTL'],
+        max_entries=app.config['DECISION_CACHE_SIZE']
+    )
+    
+    principal_cache.configure(
+        ttl=app.config['PRINCIPAL_CACHE_TTL'],
+        max_entries=app.config['PRINCIPAL_CACHE_SIZE']
+    )
+    
+    credential_verifier.configure(
+        workers=app.config['CREDENTIAL_WORKERS'],
+        max_pending=app.config['CREDENTIAL_MAX_PENDING'],
+        n=app.config['SCRYPT_N'],
+        r=app.config['SCRYPT_R'],
+        p=app.config['SCRYPT_P'],
+        timeout=app.config['CREDENTIAL_TIMEOUT']
+    )
+    
+    MFA.configure(
+        ttl=app.config['MFA_CHALLENGE_TTL'],
+        max_per_user=app.config['MFA_MAX_CHALLENGES_PER_USER'],
+        max_active=app.config['MFA_MAX_ACTIVE_CHALLENGES']
+    )
+    
+    population_risk.configure(ttl=app.config['RISK_DISTRIBUTION_TTL'])
+    ip_reputation.configure(default_risk=app.config['IP_DEFAULT_LOCATION_RISK'])
+    if os.path.exists(app.config['IP_REPUTATION_PATH']):
+        ip_reputation.load_csv(app.config['IP_REPUTATION_PATH'])
+    RiskScoring.history.configure(
+        capacity=app.config['RISK_HISTORY_SIZE'],
+        max_users=app.config['RISK_HISTORY_MAX_USERS']
+    )
+    
+    if os.path.exists(app.config['BEHAVIOR_SNAPSHOT_PATH']):
+        BehaviorAnalysis.model.load_snapshot(app.config['BEHAVIOR_SNAPSHOT_PATH'])
+    
+    DeviceFingerprint.registry.configure(
+        path=app.config['DEVICE_DB_PATH'],
+        ttl=app.config['DEVICE_POSTURE_TTL'],
+        max_entries=app.config['DEVICE_CACHE_SIZE'],
+        filter_capacity=app.config['DEVICE_FILTER_CAPACITY']
+    )
+    DeviceFingerprint.posture_authoritative = app.config['DEVICE_POSTURE_AUTHORITATIVE']
+    
+    content_key = app.config['CONTENT_ENCRYPTION_KEY'] or load_or_create_key(app.config['CONTENT_KEY_PATH'])
+    EncryptionEngine.content.configure(
+        secret=content_key,
+        chunk_size=app.config['CONTENT_CHUNK_SIZE'],
+        workers=app.config['CONTENT_CRYPTO_WORKERS']
+    )
+    
+    DRM.watermarker.configure(
+        content_dir=app.config['CONTENT_DIR'],
+        output_dir=app.config['WATERMARK_OUTPUT_DIR'],
+        secret=content_key,
+        workers=app.config['WATERMARK_WORKERS']
+    )
+    
+    ComplianceEngine.state.configure(interval=app.config['COMPLIANCE_REPORT_INTERVAL'])
+    ComplianceEngine.state.start_reports()
+    
+    stage_timer.set_enabled(app.config['STAGE_TIMING_ENABLED'])
+    
+    Log.writer.configure(
+        flush_interval=app.config['LOG_FLUSH_INTERVAL'],
+        batch_size=app.config['LOG_BATCH_SIZE'],
+        fsync_policy=app.config['LOG_FSYNC_POLICY'],
+        fsync_interval=app.config['LOG_FSYNC_INTERVAL']
+    )
+    
     return app
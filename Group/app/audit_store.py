@@ -0,0 +1,442 @@
+"""
+Despite Group Access Control System
+Indexed Audit Log Store - Segment Files with Sidecar Indexes
+"""
+
+import atexit
+import bisect
+import json
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks (Windows): single-process deployments only
+    fcntl = None
+
+_STRINGS = "strings.jsonl"
+
+# One fixed-size sidecar record per audit line:
+# timestamp, byte offset in segment, line length, user id, action id, status id
+INDEX_RECORD = struct.Struct("<dQIIII")
+
+# Legacy text format written by Log.audit_trail
+AUDIT_LINE = re.compile(
+    r"^\[AUDIT\] (?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - User: (?P<user>.*?) \| "
+    r"Action: (?P<action>.*?) \| Resource: (?P<resource>.*?) \| Status: (?P<status>.*)$"
+)
+
+_STATUS_CLASS = re.compile(r"[A-Za-z_]+")
+
+
+def status_class(status):
+    """Leading status keyword used for filtering, e.g. 'DENIED - Device ...' -> 'DENIED'"""
+    match = _STATUS_CLASS.match(str(status))
+    return match.group(0).upper() if match else ""
+
+
+class _Segment:
+    """One append-only segment file and its sidecar index"""
+
+    __slots__ = ("number", "log_path", "idx_path", "first_seq", "count", "size",
+                 "first_ts", "last_ts", "log_file", "idx_file")
+
+    def __init__(self, directory, number, first_seq):
+        self.number = number
+        self.log_path = os.path.join(directory, f"segment-{number:06d}.log")
+        self.idx_path = os.path.join(directory, f"segment-{number:06d}.idx")
+        self.first_seq = first_seq
+        self.count = 0
+        self.size = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.log_file = None
+        self.idx_file = None
+
+
+class AuditLogStore:
+    """Append-only audit store with cursor pagination and filters.
+
+    Lines go to numbered segment files; each line gets a fixed-size
+    record in the segment's ``.idx`` sidecar so any entry can be located
+    by sequence number with one ``pread``. Posting lists per user,
+    action and status class are rebuilt from the sidecars on open and
+    kept in compact arrays; time ranges are resolved by binary search
+    over the sidecar records. A page of results therefore costs
+    O(page size + log n) reads, independent of total history.
+
+    Every worker process shares one directory, so sequence numbers and
+    cursors are global. Appends hold an exclusive ``flock`` on ``.lock``
+    and first index whatever other processes appended; queries catch up
+    the same way under a shared lock. Each append is flushed before the
+    lock is released, so other processes only ever see whole records.
+    """
+
+    def __init__(self, directory="app/logs/audit", segment_size=8 * 1024 * 1024):
+        self.directory = directory
+        self.segment_size = segment_size
+        self._lock = threading.RLock()
+        self._segments = []
+        self._segment_starts = []
+        self._strings = []
+        self._string_ids = {}
+        self._strings_offset = 0
+        self._postings = {"user": {}, "action": {}, "status": {}}
+        self._strings_file = None
+        self._readers = {}
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, ".lock"), "a")
+        with self._lock, self._shared(exclusive=True):
+            self._load()
+        atexit.register(self.close)
+
+    @contextmanager
+    def _shared(self, exclusive=False):
+        # Cross-process lock on the directory (no-op without fcntl: one process only)
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    # --------------------------------------------------------
+    # Loading (callers hold self._lock and the directory lock)
+    # --------------------------------------------------------
+
+    def _load(self):
+        # Caller holds the exclusive lock, so a partial tail is from a crash
+        self._read_strings()
+        numbers = sorted(
+            int(name[8:14]) for name in os.listdir(self.directory)
+            if name.startswith("segment-") and name.endswith(".idx")
+        )
+        for number in numbers:
+            segment = _Segment(self.directory, number, len(self))
+            self._add_segment(segment)
+            self._read_records(segment)
+            # Drop any unindexed or partial tail so appends stay aligned
+            if os.path.getsize(segment.idx_path) != segment.count * INDEX_RECORD.size:
+                os.truncate(segment.idx_path, segment.count * INDEX_RECORD.size)
+            if os.path.exists(segment.log_path) and os.path.getsize(segment.log_path) != segment.size:
+                os.truncate(segment.log_path, segment.size)
+        self._strings_file = open(os.path.join(self.directory, _STRINGS), "ab")
+
+    def _catch_up(self):
+        """Index strings, records and segments other processes appended"""
+        self._read_strings()
+        segment = self._segments[-1] if self._segments else None
+        if segment is not None:
+            self._read_records(segment)
+        while True:
+            segment = _Segment(self.directory, segment.number + 1 if segment else 1, len(self))
+            if not os.path.exists(segment.idx_path):
+                return
+            if self._segments:
+                self._close_segment(self._segments[-1])
+            self._add_segment(segment)
+            self._read_records(segment)
+
+    def _read_strings(self):
+        path = os.path.join(self.directory, _STRINGS)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            f.seek(self._strings_offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self._register_string(json.loads(line))
+        self._strings_offset += end
+
+    def _read_records(self, segment):
+        # Whole records past the ones already indexed; a torn one is left for later
+        records = os.path.getsize(segment.idx_path) // INDEX_RECORD.size - segment.count
+        if records <= 0:
+            return
+        seq = segment.first_seq + segment.count
+        with open(segment.idx_path, "rb") as f:
+            f.seek(segment.count * INDEX_RECORD.size)
+            while records > 0:
+                batch = min(records, 65536)
+                data = f.read(batch * INDEX_RECORD.size)
+                for ts, offset, length, user_id, action_id, status_id in INDEX_RECORD.iter_unpack(data):
+                    self._index(seq, user_id, action_id, status_id)
+                    if segment.first_ts is None:
+                        segment.first_ts = ts
+                    segment.last_ts = ts
+                    segment.size = offset + length
+                    seq += 1
+                records -= batch
+        segment.count = seq - segment.first_seq
+
+    def _register_string(self, value):
+        self._string_ids[value] = len(self._strings)
+        self._strings.append(value)
+
+    def _intern(self, value):
+        value = str(value)
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._register_string(value)
+            # New strings are rare; persist them before any index record uses them
+            line = (json.dumps(value) + "\n").encode("utf-8")
+            self._strings_file.write(line)
+            self._strings_file.flush()
+            self._strings_offset += len(line)
+        return string_id
+
+    def _index(self, seq, user_id, action_id, status_id):
+        for kind, key in (("user", user_id), ("action", action_id), ("status", status_id)):
+            postings = self._postings[kind].get(key)
+            if postings is None:
+                postings = self._postings[kind][key] = array("Q")
+            postings.append(seq)
+
+    def _add_segment(self, segment):
+        self._segments.append(segment)
+        self._segment_starts.append(segment.first_seq)
+
+    # --------------------------------------------------------
+    # Writing
+    # --------------------------------------------------------
+
+    def __len__(self):
+        if not self._segments:
+            return 0
+        last = self._segments[-1]
+        return last.first_seq + last.count
+
+    def _writable_segment(self):
+        segment = self._segments[-1] if self._segments else None
+        if segment is None or segment.size >= self.segment_size:
+            if segment is not None:
+                self._close_segment(segment)
+            number = segment.number + 1 if segment else 1
+            segment = _Segment(self.directory, number, len(self))
+            self._add_segment(segment)
+        if segment.log_file is None:
+            segment.log_file = open(segment.log_path, "ab")
+            segment.idx_file = open(segment.idx_path, "ab")
+        return segment
+
+    def append(self, user, action, resource, status, timestamp=None):
+        """Append one audit entry; returns its sequence number"""
+        return self.append_many(user, ((action, resource, status),), timestamp)
+
+    def append_many(self, user, entries, timestamp=None):
+        """Append (action, resource, status) entries for one user under a single lock;
+        returns the sequence number of the last entry"""
+        with self._lock, self._shared(exclusive=True):
+            self._catch_up()
+            seq = self._write(user, entries, timestamp)
+            self._flush()
+        return seq
+
+    def _write(self, user, entries, timestamp=None):
+        # Caller holds self._lock and the exclusive directory lock, caught up
+        ts = time.time() if timestamp is None else timestamp
+        stamp = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+        seq = None
+        user_id = self._intern(user)
+        for action, resource, status in entries:
+            line = (f"[AUDIT] {stamp} - User: {user} | Action: {action} | "
+                    f"Resource: {resource} | Status: {status}\n").encode("utf-8")
+            segment = self._writable_segment()
+            seq = len(self)
+            action_id = self._intern(action)
+            status_id = self._intern(status_class(status))
+            segment.log_file.write(line)
+            segment.idx_file.write(INDEX_RECORD.pack(
+                ts, segment.size, len(line), user_id, action_id, status_id
+            ))
+            if segment.first_ts is None:
+                segment.first_ts = ts
+            segment.last_ts = ts
+            segment.size += len(line)
+            segment.count += 1
+            self._index(seq, user_id, action_id, status_id)
+        return seq
+
+    def import_log(self, path, if_empty=False):
+        """Backfill entries from a legacy audit_trail.log text file; with
+        ``if_empty``, only if no process has written the store yet"""
+        imported = 0
+        with self._lock, self._shared(exclusive=True):
+            self._catch_up()
+            if if_empty and len(self):
+                return 0
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    match = AUDIT_LINE.match(line.rstrip("\r\n"))
+                    if not match:
+                        continue
+                    ts = datetime.strptime(match.group("ts"), "%Y-%m-%d %H:%M:%S").timestamp()
+                    self._write(match.group("user"), ((match.group("action"), match.group("resource"),
+                                                       match.group("status")),), ts)
+                    imported += 1
+            self._flush()
+        return imported
+
+    def _flush(self):
+        self._strings_file.flush()
+        segment = self._segments[-1] if self._segments else None
+        if segment is not None and segment.log_file is not None:
+            segment.log_file.flush()
+            segment.idx_file.flush()
+
+    def flush(self):
+        """Flush buffered lines and index records to the OS"""
+        with self._lock:
+            self._flush()
+
+    def _close_segment(self, segment):
+        if segment.log_file is not None:
+            segment.log_file.close()
+            segment.idx_file.close()
+            segment.log_file = None
+            segment.idx_file = None
+
+    def close(self):
+        with self._lock:
+            if self._strings_file is None:
+                return
+            self._flush()
+            for segment in self._segments:
+                self._close_segment(segment)
+            self._strings_file.close()
+            self._strings_file = None
+            for fd in self._readers.values():
+                os.close(fd)
+            self._readers = {}
+            self._lock_file.close()
+
+    # --------------------------------------------------------
+    # Reading
+    # --------------------------------------------------------
+
+    def _segment_for(self, seq):
+        return self._segments[bisect.bisect_right(self._segment_starts, seq) - 1]
+
+    def _reader(self, path):
+        fd = self._readers.get(path)
+        if fd is None:
+            fd = self._readers.setdefault(path, os.open(path, os.O_RDONLY))
+        return fd
+
+    def _record(self, seq):
+        segment = self._segment_for(seq)
+        offset = (seq - segment.first_seq) * INDEX_RECORD.size
+        return INDEX_RECORD.unpack(os.pread(self._reader(segment.idx_path), INDEX_RECORD.size, offset))
+
+    def _seq_at_time(self, ts):
+        """First sequence number whose timestamp is >= ts"""
+        segments = self._segments
+        lo_seg = 0
+        hi_seg = len(segments)
+        while lo_seg < hi_seg:
+            mid = (lo_seg + hi_seg) // 2
+            if segments[mid].last_ts is not None and segments[mid].last_ts < ts:
+                lo_seg = mid + 1
+            else:
+                hi_seg = mid
+        if lo_seg == len(segments):
+            return len(self)
+        segment = segments[lo_seg]
+        lo, hi = segment.first_seq, segment.first_seq + segment.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid)[0] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _read_entry(self, seq):
+        segment = self._segment_for(seq)
+        ts, offset, length, user_id, action_id, status_id = self._record(seq)
+        line = os.pread(self._reader(segment.log_path), length, offset).decode("utf-8", errors="replace").rstrip("\r\n")
+        match = AUDIT_LINE.match(line)
+        return {
+            "seq": seq,
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            "user": self._strings[user_id],
+            "action": self._strings[action_id],
+            "resource": match.group("resource") if match else None,
+            "status": match.group("status") if match else None,
+            "line": line
+        }
+
+    def _candidates(self, lists, lo, hi):
+        """Sequence numbers in [lo, hi) present in every posting list, newest first"""
+        if not lists:
+            yield from range(hi - 1, lo - 1, -1)
+            return
+        lists = sorted(lists, key=len)
+        driver, others = lists[0], lists[1:]
+        start = bisect.bisect_left(driver, hi) - 1
+        stop = bisect.bisect_left(driver, lo)
+        for i in range(start, stop - 1, -1):
+            seq = driver[i]
+            if all(self._contains(other, seq) for other in others):
+                yield seq
+
+    @staticmethod
+    def _contains(postings, seq):
+        i = bisect.bisect_left(postings, seq)
+        return i < len(postings) and postings[i] == seq
+
+    def query(self, user=None, action=None, status=None, since=None, until=None,
+              cursor=None, limit=10):
+        """Return a page of entries, newest first.
+
+        ``since``/``until`` are epoch seconds; ``cursor`` is the
+        ``next_cursor`` of the previous page. ``status`` matches the
+        leading status keyword (GRANTED, DENIED, SUCCESS, ...).
+        """
+        with self._lock:
+            with self._shared():
+                self._catch_up()
+            total = len(self)
+            lists = []
+            for kind, value in (("user", user), ("action", action),
+                                ("status", status_class(status) if status else None)):
+                if value is None:
+                    continue
+                string_id = self._string_ids.get(str(value))
+                postings = self._postings[kind].get(string_id) if string_id is not None else None
+                if postings is None:
+                    return {"entries": [], "next_cursor": None, "total_entries": total}
+                lists.append(postings)
+
+            hi = total if cursor is None else min(int(cursor), total)
+            lo = 0
+            if until is not None:
+                hi = min(hi, self._seq_at_time(float(until) + 1e-6))
+            if since is not None:
+                lo = self._seq_at_time(float(since))
+
+            seqs = []
+            for seq in self._candidates(lists, lo, hi):
+                seqs.append(seq)
+                if len(seqs) >= limit:
+                    break
+
+        entries = [self._read_entry(seq) for seq in seqs]
+
+        more = len(seqs) == limit and seqs[-1] > lo
+        return {
+            "entries": entries,
+            "next_cursor": seqs[-1] if more else None,
+            "total_entries": total
+        }
@@ -0,0 +1,398 @@
+"""
+Despite Group Access Control System
+Online Behavior Baselines - Hour Histograms, Count-Min Sketches, EWMA Rates
+"""
+
+import hashlib
+import json
+import math
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+
+# Static profile used until a user has enough history of their own
+DEFAULT_BASELINE = {
+    "typical_login_times": [9, 10, 14, 15],  # Business hours
+    "typical_resources": ["DOCUMENT", "REPORT", "DATABASE"],
+    "typical_actions": ["VIEW", "EDIT", "APPROVE"],
+    "typical_locations": ["Office", "VPN"],
+    "logins_per_day": 2,
+    "failed_logins_per_month": 0
+}
+
+# ============================================================
+# SKETCHES
+# ============================================================
+
+def sketch_hash(value):
+    """Stable 64-bit hash split in two (process-independent, unlike hash())"""
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest[:4], "little"), int.from_bytes(digest[4:], "little") | 1
+
+
+class CountMinSketch:
+    """Fixed-size frequency sketch with 16-bit saturating counters.
+
+    Estimates never undercount; ``halve`` ages every counter so old
+    activity fades and counters stay within range.
+    """
+
+    __slots__ = ("width", "depth", "table")
+
+    def __init__(self, width=64, depth=3):
+        self.width = width
+        self.depth = depth
+        self.table = array("H", bytes(2 * width * depth))
+
+    def slots(self, hashed):
+        h1, h2 = hashed
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, slots, count=1):
+        table = self.table
+        for slot in slots:
+            table[slot] = min(0xFFFF, table[slot] + count)
+
+    def estimate(self, slots):
+        table = self.table
+        return min(table[slot] for slot in slots)
+
+    def halve(self):
+        table = self.table
+        for i in range(len(table)):
+            table[i] >>= 1
+
+
+class TopK:
+    """Space-saving heavy hitters: at most ``k`` (key -> count) entries"""
+
+    __slots__ = ("k", "counts")
+
+    def __init__(self, k=8):
+        self.k = k
+        self.counts = {}
+
+    def add(self, key):
+        counts = self.counts
+        if key in counts:
+            counts[key] += 1
+        elif len(counts) < self.k:
+            counts[key] = 1
+        else:
+            smallest = min(counts, key=counts.get)
+            counts[key] = counts.pop(smallest) + 1
+
+    def halve(self):
+        self.counts = {key: count >> 1 for key, count in self.counts.items() if count > 1}
+
+    def top(self):
+        return [key for key, _ in sorted(self.counts.items(), key=lambda item: -item[1])]
+
+
+# ============================================================
+# PER-USER PROFILE
+# ============================================================
+
+class BehaviorProfile:
+    """Fixed-size online baseline for one user.
+
+    Holds a 24-slot hour histogram, count-min sketches and top-k lists
+    for actions and resources, and two exponentially decayed request
+    rates (last minute vs. last day). Every update is O(1); once
+    ``AGE_AT`` events accumulate all counts are halved, so the profile
+    tracks recent behaviour and its memory never grows.
+    """
+
+    __slots__ = (
+        "hours", "actions", "resources", "top_actions", "top_resources",
+        "events", "short_rate", "long_rate", "last_seen"
+    )
+
+    AGE_AT = 4096
+    MAX_KEY_LENGTH = 128  # longer names are truncated in the top-k lists
+    SHORT_TAU = 60.0  # seconds
+    LONG_TAU = 86400.0
+
+    def __init__(self, width=64, depth=3, top_k=8):
+        self.hours = array("I", bytes(4 * 24))
+        self.actions = CountMinSketch(width, depth)
+        self.resources = CountMinSketch(width, depth)
+        self.top_actions = TopK(top_k)
+        self.top_resources = TopK(top_k)
+        self.events = 0
+        self.short_rate = 0.0
+        self.long_rate = 0.0
+        self.last_seen = None
+
+    def rates(self, now):
+        """(per-minute rate, per-day-window rate) in events per second, decayed to ``now``"""
+        if self.last_seen is None:
+            return 0.0, 0.0
+        elapsed = max(0.0, now - self.last_seen)
+        return (self.short_rate * math.exp(-elapsed / self.SHORT_TAU),
+                self.long_rate * math.exp(-elapsed / self.LONG_TAU))
+
+    def observe(self, hour, action, action_slots, resource, resource_slots, now):
+        short_rate, long_rate = self.rates(now)
+        self.short_rate = short_rate + 1.0 / self.SHORT_TAU
+        self.long_rate = long_rate + 1.0 / self.LONG_TAU
+        self.last_seen = now
+        self.hours[hour] += 1
+        self.actions.add(action_slots)
+        self.resources.add(resource_slots)
+        self.top_actions.add(action[:self.MAX_KEY_LENGTH])
+        self.top_resources.add(resource[:self.MAX_KEY_LENGTH])
+        self.events += 1
+        if self.events >= self.AGE_AT:
+            self._age()
+
+    def _age(self):
+        for hour in range(24):
+            self.hours[hour] >>= 1
+        self.actions.halve()
+        self.resources.halve()
+        self.top_actions.halve()
+        self.top_resources.halve()
+        self.events = sum(self.hours)
+
+    def nbytes(self):
+        """Approximate memory held by this profile"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.hours)
+        for sketch in (self.actions, self.resources):
+            size += sys.getsizeof(sketch) + sys.getsizeof(sketch.table)
+        for top in (self.top_actions, self.top_resources):
+            size += sys.getsizeof(top) + sys.getsizeof(top.counts)
+            size += sum(sys.getsizeof(key) for key in top.counts)
+        return size
+
+
+# ============================================================
+# SNAPSHOT FILES
+# ============================================================
+
+# File: header, then one record per user. Record: user (u16 length +
+# UTF-8), fixed part, both sketch tables, top-k lists (u32 length + JSON).
+SNAPSHOT_MAGIC = b"BHVSNAP1"
+_HEADER = struct.Struct("<8sHHH")
+_FIXED = struct.Struct("<24IIddd")
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise EOFError("truncated behavior snapshot")
+    return data
+
+
+def pack_profile(user, profile):
+    name = user.encode("utf-8")
+    tops = json.dumps([profile.top_actions.counts, profile.top_resources.counts]).encode("utf-8")
+    return b"".join((
+        struct.pack("<H", len(name)), name,
+        _FIXED.pack(*profile.hours, profile.events, profile.short_rate, profile.long_rate,
+                    math.nan if profile.last_seen is None else profile.last_seen),
+        profile.actions.table.tobytes(), profile.resources.table.tobytes(),
+        struct.pack("<I", len(tops)), tops
+    ))
+
+
+class SnapshotWriter:
+    """Streams (user, BehaviorProfile) records to a snapshot file"""
+
+    def __init__(self, f, width=64, depth=3, top_k=8):
+        self.f = f
+        self.dimensions = (width, depth, top_k)
+        self.count = 0
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, width, depth, top_k))
+
+    def write(self, user, profile):
+        self.f.write(pack_profile(user, profile))
+        self.count += 1
+
+
+def read_snapshot(f):
+    """Yield (user, BehaviorProfile) from an open snapshot file, one at a time"""
+    magic, width, depth, top_k = _HEADER.unpack(_read_exact(f, _HEADER.size))
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not a behavior profile snapshot")
+    table_bytes = 2 * width * depth
+    while True:
+        head = f.read(2)
+        if not head:
+            return
+        user = _read_exact(f, struct.unpack("<H", head)[0]).decode("utf-8")
+        fixed = _FIXED.unpack(_read_exact(f, _FIXED.size))
+        profile = BehaviorProfile(width, depth, top_k)
+        profile.hours = array("I", fixed[:24])
+        profile.events = fixed[24]
+        profile.short_rate = fixed[25]
+        profile.long_rate = fixed[26]
+        profile.last_seen = None if math.isnan(fixed[27]) else fixed[27]
+        profile.actions.table = array("H", _read_exact(f, table_bytes))
+        profile.resources.table = array("H", _read_exact(f, table_bytes))
+        tops = json.loads(_read_exact(f, struct.unpack("<I", _read_exact(f, 4))[0]))
+        profile.top_actions.counts = tops[0]
+        profile.top_resources.counts = tops[1]
+        yield user, profile
+
+
+# ============================================================
+# PROFILE TABLE & ANOMALY CHECKS
+# ============================================================
+
+class BehaviorModel:
+    """Per-user behavior profiles learned from live access requests.
+
+    Profiles live in lock-striped shards. ``check`` compares an activity
+    against the user's own history in O(1): hour share, sketch frequency
+    of the action and resource, and short- vs long-term request rate.
+    Users with fewer than ``warmup`` events are checked against
+    DEFAULT_BASELINE instead.
+    """
+
+    def __init__(self, shards=64, warmup=20, hour_min_share=0.02, action_min_share=0.01,
+                 burst_factor=10.0, burst_min_per_minute=30, width=64, depth=3, top_k=8):
+        self.warmup = warmup
+        self.hour_min_share = hour_min_share
+        self.action_min_share = action_min_share
+        self.burst_factor = burst_factor
+        self.burst_min_rate = burst_min_per_minute / 60.0
+        self._dimensions = (width, depth, top_k)
+        self._shards = tuple(({}, threading.Lock()) for _ in range(shards))
+
+    def _shard(self, user):
+        return self._shards[hash(user) % len(self._shards)]
+
+    def observe(self, user, hour, action, resource, now=None):
+        """Learn from one activity (O(1))"""
+        now = time.time() if now is None else now
+        hour, action, resource = int(hour) % 24, str(action), str(resource)
+        profiles, lock = self._shard(user)
+        with lock:
+            profile = profiles.get(user)
+            if profile is None:
+                profile = profiles[user] = BehaviorProfile(*self._dimensions)
+            profile.observe(
+                hour, action, profile.actions.slots(sketch_hash(action)),
+                resource, profile.resources.slots(sketch_hash(resource)), now
+            )
+
+    def check(self, user, hour, action, resource, now=None):
+        """Anomalies for one activity against the user's baseline (O(1))"""
+        now = time.time() if now is None else now
+        hour = int(hour) % 24
+        profiles, lock = self._shard(user)
+        anomalies = []
+        with lock:
+            profile = profiles.get(user)
+            if profile is None or profile.events < self.warmup:
+                if hour not in DEFAULT_BASELINE["typical_login_times"]:
+                    anomalies.append("Off-hours activity")
+                if action not in DEFAULT_BASELINE["typical_actions"]:
+                    anomalies.append(f"Unusual action: {action}")
+                if resource not in DEFAULT_BASELINE["typical_resources"]:
+                    anomalies.append(f"New resource access: {resource}")
+                return anomalies
+
+            events = profile.events
+            if profile.hours[hour] < self.hour_min_share * events:
+                anomalies.append("Off-hours activity")
+            if profile.actions.estimate(profile.actions.slots(sketch_hash(action))) < self.action_min_share * events:
+                anomalies.append(f"Unusual action: {action}")
+            if profile.resources.estimate(profile.resources.slots(sketch_hash(resource))) == 0:
+                anomalies.append(f"New resource access: {resource}")
+            short_rate, long_rate = profile.rates(now)
+            if short_rate > self.burst_min_rate and short_rate > self.burst_factor * long_rate:
+                anomalies.append("Unusual request rate")
+        return anomalies
+
+    def items(self):
+        """Snapshot of (user, profile) pairs, shard by shard"""
+        for profiles, lock in self._shards:
+            with lock:
+                pairs = list(profiles.items())
+            yield from pairs
+
+    def save_snapshot(self, path):
+        """Write every profile to ``path`` atomically; returns the count"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp = f"{path}.tmp"
+        with open(temp, "wb") as f:
+            writer = SnapshotWriter(f, *self._dimensions)
+            for user, profile in self.items():
+                with self._shard(user)[1]:
+                    writer.write(user, profile)
+        os.replace(temp, path)
+        return writer.count
+
+    def load_snapshot(self, path):
+        """Install profiles from a snapshot; users already learned live are kept"""
+        loaded = 0
+        with open(path, "rb") as f:
+            for user, profile in read_snapshot(f):
+                if (profile.actions.width, profile.actions.depth, profile.top_actions.k) != self._dimensions:
+                    raise ValueError("snapshot sketch dimensions do not match the model")
+                profiles, lock = self._shard(user)
+                with lock:
+                    if user not in profiles:
+                        profiles[user] = profile
+                        loaded += 1
+        return loaded
+
+    def reset(self, user):
+        """Forget a user's history (back to the cold-start baseline)"""
+        profiles, lock = self._shard(user)
+        with lock:
+            profiles.pop(user, None)
+
+    def profile(self, user, now=None):
+        """JSON summary of a user's learned baseline, or None"""
+        now = time.time() if now is None else now
+        profiles, lock = self._shard(user)
+        with lock:
+            profile = profiles.get(user)
+            if profile is None:
+                return None
+            events = profile.events
+            short_rate, long_rate = profile.rates(now)
+            return {
+                "events": events,
+                "warmed_up": events >= self.warmup,
+                "typical_login_times": [
+                    hour for hour in range(24) if events and profile.hours[hour] >= self.hour_min_share * events
+                ],
+                "hour_histogram": list(profile.hours),
+                "typical_actions": profile.top_actions.top(),
+                "typical_resources": profile.top_resources.top(),
+                "requests_per_minute": round(short_rate * 60, 3),
+                "requests_per_day": round(long_rate * 86400, 3),
+                "memory_bytes": profile.nbytes()
+            }
+
+    def __len__(self):
+        return sum(len(profiles) for profiles, _ in self._shards)
+
+    def memory_stats(self):
+        """Profile count and bytes held (exact sum over all profiles)"""
+        count = 0
+        total = 0
+        largest = 0
+        for profiles, lock in self._shards:
+            with lock:
+                for profile in profiles.values():
+                    size = profile.nbytes()
+                    count += 1
+                    total += size
+                    largest = max(largest, size)
+        return {
+            "profiles": count,
+            "total_bytes": total,
+            "max_profile_bytes": largest,
+            "avg_profile_bytes": round(total / count) if count else 0
+        }
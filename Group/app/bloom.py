@@ -0,0 +1,249 @@
+"""
+Despite Group Access Control System
+Counting Bloom Filter - Compact Set Membership with Deletes, mmap-Backed Files
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks (Windows): one writing process per file
+    fcntl = None
+
+FILTER_MAGIC = b"CBLOOM01"
+# magic, counters (m), hashes (k), items (n), capacity
+_HEADER = struct.Struct("<8sQIQQ")
+COUNTER_MAX = 15  # 4-bit counters
+
+# byte -> 1/0 tables for counting occupied and saturated nibbles in C
+_LOW_SET = bytes(1 if b & 0x0F else 0 for b in range(256))
+_HIGH_SET = bytes(1 if b >> 4 else 0 for b in range(256))
+_LOW_FULL = bytes(1 if b & 0x0F == COUNTER_MAX else 0 for b in range(256))
+_HIGH_FULL = bytes(1 if b >> 4 == COUNTER_MAX else 0 for b in range(256))
+
+
+def _hash_pair(key):
+    """Two independent 64-bit hashes of ``key`` (process-independent)"""
+    digest = hashlib.blake2b(key.encode("utf-8") if isinstance(key, str) else bytes(key), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+def optimal_size(capacity, error_rate):
+    """(counters, hashes) for ``capacity`` items at ``error_rate`` false positives"""
+    capacity = max(1, int(capacity))
+    counters = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    hashes = max(1, round(counters / capacity * math.log(2)))
+    return counters, hashes
+
+
+class CountingBloomFilter:
+    """Bloom filter with 4-bit counters, so keys can be removed as well.
+
+    ``key in filter`` is False only for keys that were never added (or
+    were removed): the cheap "definitely unknown" answer. True means
+    "probably present" and must be confirmed against the exact set. Two
+    counters share a byte; a counter that reaches 15 sticks there, so
+    removals never cause false negatives. ``k`` probe positions come from
+    one blake2b digest (double hashing).
+
+    ``save`` writes a header plus the counter bytes; ``open`` maps such a
+    file with mmap, so a large filter is usable without reading it in and,
+    when opened writable, updates go straight to the file's pages. Every
+    update is a read-modify-write of shared counters, so writers hold a
+    thread lock and, on a writable mapping, an exclusive ``flock`` on the
+    file: processes sharing it never lose an increment, which would let a
+    later removal zero a counter another key still needs.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.01, _counters=None, _hashes=None, _buffer=None,
+                 _count=0, _mapping=None, _writable=False, _file=None):
+        self.capacity = int(capacity)
+        self.error_rate = float(error_rate)
+        if _counters is None:
+            _counters, _hashes = optimal_size(capacity, error_rate)
+        self.m = int(_counters)
+        self.k = int(_hashes)
+        self._cells = _buffer if _buffer is not None else bytearray((self.m + 1) // 2)
+        self._mapping = _mapping
+        self._mapping_writable = _writable
+        self._file = _file
+        self._write_lock = threading.Lock()
+        self.count = int(_count)
+
+    # ---- membership -------------------------------------------------------
+
+    def _positions(self, key):
+        h1, h2 = _hash_pair(key)
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def _get(self, position):
+        cell = self._cells[position >> 1]
+        return (cell >> 4) if position & 1 else (cell & 0x0F)
+
+    def _set(self, position, value):
+        index = position >> 1
+        cell = self._cells[index]
+        if position & 1:
+            self._cells[index] = (cell & 0x0F) | (value << 4)
+        else:
+            self._cells[index] = (cell & 0xF0) | value
+
+    def __contains__(self, key):
+        cells = self._cells
+        for position in self._positions(key):
+            cell = cells[position >> 1]
+            if not ((cell >> 4) if position & 1 else (cell & 0x0F)):
+                return False
+        return True
+
+    @contextmanager
+    def _writing(self):
+        with self._write_lock:
+            shared = fcntl is not None and self._file is not None
+            if shared:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if shared:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _add(self, positions):
+        # caller holds _writing()
+        for position in positions:
+            value = self._get(position)
+            if value < COUNTER_MAX:
+                self._set(position, value + 1)
+
+    def add(self, key):
+        positions = self._positions(key)
+        with self._writing():
+            self._add(positions)
+            self._write_count(1)
+
+    def remove(self, key):
+        """Remove a key that was added; returns False (and changes nothing)
+        when the key is definitely absent"""
+        positions = self._positions(key)
+        with self._writing():
+            if not all(self._get(position) for position in positions):
+                return False
+            for position in positions:
+                value = self._get(position)
+                if value < COUNTER_MAX:
+                    self._set(position, value - 1)
+            self._write_count(-1)
+        return True
+
+    def update(self, keys):
+        batch = [self._positions(key) for key in keys]
+        with self._writing():
+            for positions in batch:
+                self._add(positions)
+            self._write_count(len(batch))
+
+    def clear(self):
+        with self._writing():
+            self._cells[:] = bytes(len(self._cells))
+            self._write_count(-self.count)
+
+    def __len__(self):
+        return self.count
+
+    # ---- statistics -------------------------------------------------------
+
+    def false_positive_rate(self):
+        """Expected false-positive rate at the current item count"""
+        if self.count == 0:
+            return 0.0
+        return (1.0 - math.exp(-self.k * self.count / self.m)) ** self.k
+
+    def stats(self):
+        cells = bytes(self._cells)
+        occupied = cells.translate(_LOW_SET).count(1) + cells.translate(_HIGH_SET).count(1)
+        saturated = cells.translate(_LOW_FULL).count(1) + cells.translate(_HIGH_FULL).count(1)
+        return {
+            "items": self.count,
+            "capacity": self.capacity,
+            "counters": self.m,
+            "hashes": self.k,
+            "memory_bytes": len(self._cells),
+            "bits_per_item": round(len(self._cells) * 8 / max(1, self.capacity), 2),  # at capacity
+            "fill_ratio": round(occupied / self.m, 4),
+            "saturated_counters": saturated,
+            "target_false_positive_rate": self.error_rate,
+            "expected_false_positive_rate": round(self.false_positive_rate(), 6),
+            "mmapped": self._mapping is not None
+        }
+
+    # ---- files ------------------------------------------------------------
+
+    def _header(self):
+        return _HEADER.pack(FILTER_MAGIC, self.m, self.k, self.count, self.capacity)
+
+    def _write_count(self, delta):
+        # caller holds _writing()
+        if self._mapping is not None and self._mapping_writable:
+            # other processes may share the mapping: count from the file's header
+            self.count = _HEADER.unpack_from(self._mapping, 0)[3]
+            self.count = max(0, self.count + delta)
+            self._mapping[:_HEADER.size] = self._header()
+        else:
+            self.count = max(0, self.count + delta)
+
+    def save(self, path):
+        """Write the filter to ``path`` atomically"""
+        temp = f"{path}.tmp"
+        with open(temp, "wb") as f:
+            f.write(self._header())
+            f.write(self._cells)
+        os.replace(temp, path)
+
+    @classmethod
+    def open(cls, path, writable=False, error_rate=0.01):
+        """Map a saved filter; with ``writable`` changes are written to the
+        file (the file stays open for the writers' lock)"""
+        f = open(path, "r+b" if writable else "rb")
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except BaseException:
+            f.close()
+            raise
+        if not writable:
+            f.close()
+            f = None
+        magic, counters, hashes, count, capacity = _HEADER.unpack_from(mapping, 0)
+        if magic != FILTER_MAGIC or len(mapping) != _HEADER.size + (counters + 1) // 2:
+            mapping.close()
+            if f is not None:
+                f.close()
+            raise ValueError(f"{path} is not a counting Bloom filter file")
+        view = memoryview(mapping)[_HEADER.size:]
+        if not writable:
+            view = view.toreadonly()
+        return cls(capacity, error_rate, counters, hashes, view, count, mapping, writable, f)
+
+    def flush(self):
+        """Push a writable mapping's dirty pages to disk"""
+        if self._mapping is not None and self._mapping_writable:
+            self._mapping.flush()
+
+    def close(self):
+        """Unmap the file; the filter keeps working on an in-memory copy"""
+        with self._write_lock:
+            if self._mapping is not None:
+                view, self._cells = self._cells, bytearray(self._cells)
+                view.release()
+                self._mapping.close()
+                self._mapping = None
+                self._mapping_writable = False
+            if self._file is not None:
+                self._file.close()
+                self._file = None
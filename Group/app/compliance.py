@@ -0,0 +1,207 @@
+"""
+Despite Group Access Control System
+Compliance Aggregator - Incrementally Maintained Directory Compliance State
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from app.expiry import TimerWheel
+
+
+class ComplianceAggregator:
+    """Running compliance state of the whole user directory.
+
+    The directory is scanned once, on a background thread started by
+    ``start_reports()`` (and again after ``invalidate()``); requests never
+    wait for it. After that each user change re-checks only that user and
+    adjusts the per-rule violation counters, so the report is a cached
+    snapshot rebuilt only when something changed. Until the scan is done
+    the report's status is "PENDING" and one user's violations are checked
+    directly. Only non-compliant users are kept. Rules that depend on
+    elapsed time (session timeout on ``last_activity``) are re-checked by
+    a timer wheel when they fall due. The same thread writes the report
+    every ``interval`` seconds instead of on every request.
+
+    ``check(record)`` returns a record's violations, ``loader(username)``
+    re-reads one record, ``users()`` iterates ``(username, record)`` and
+    ``count()`` is the directory size.
+    """
+
+    def __init__(self, check, rules, loader, users, count, write=None,
+                 report_path="app/logs/compliance_report.log", interval=300.0):
+        self._check = check
+        self._rules = rules
+        self._loader = loader
+        self._users = users
+        self._count = count
+        self._write = write
+        self.report_path = report_path
+        self.interval = float(interval)
+        self._violations = {}
+        self._counts = Counter()
+        self._built = False
+        self._scan = 0  # bumped per scan; a superseded scan stops
+        self._touched = None  # users changed while a scan is running
+        self._version = 0
+        self._snapshot = None
+        self._snapshot_version = -1
+        self._lock = threading.RLock()
+        self._due = TimerWheel(on_expire=self._recheck, tick=1.0, slots=1024, name="compliance-due")
+        self._reporter = None
+        self._reporter_pid = None
+        self.reports_written = 0
+
+    def configure(self, interval=None, report_path=None):
+        if interval is not None:
+            self.interval = float(interval)
+        if report_path is not None:
+            self.report_path = report_path
+
+    def invalidate(self):
+        """Rescan the directory in the background (rules or backend changed)"""
+        with self._lock:
+            self._scan += 1
+            self._built = False
+            self._touched = None
+            self._version += 1
+        threading.Thread(target=self.build, name="compliance-scan", daemon=True).start()
+
+    def build(self):
+        """Scan the whole directory; the lock is held per user, not per scan.
+        Returns False if a newer scan superseded this one."""
+        with self._lock:
+            self._scan += 1
+            scan = self._scan
+            self._built = False
+            self._violations.clear()
+            self._counts.clear()
+            self._touched = set()
+            self._version += 1
+        for username, record in self._users():
+            with self._lock:
+                if scan != self._scan:
+                    return False
+                if username not in self._touched:
+                    self._apply(username, record)
+        with self._lock:
+            if scan != self._scan:
+                return False
+            self._built = True
+            self._touched = None
+            self._version += 1
+        return True
+
+    def user_changed(self, username, record):
+        """Re-check one user after their record changed (None: user removed)"""
+        with self._lock:
+            if not self._built:
+                if self._touched is None:
+                    return
+                # scan in progress: this record is newer than the scan's copy
+                self._touched.add(username)
+            self._apply(username, record)
+            self._version += 1
+
+    def violations(self, username):
+        """Current violations of one user"""
+        with self._lock:
+            if self._built:
+                return list(self._violations.get(username, ()))
+        record = self._loader(username)
+        return list(self._check(record)) if record is not None else []
+
+    def violations_page(self, after=None, limit=100):
+        """Non-compliant users in username order, ``limit`` after ``after``"""
+        with self._lock:
+            usernames = sorted(name for name in self._violations if after is None or name > after)[:limit]
+            return [{"username": name, "violations": list(self._violations[name])} for name in usernames]
+
+    def report(self):
+        """Cached compliance report, rebuilt only after a change"""
+        self.start_reports()
+        with self._lock:
+            if self._snapshot_version != self._version:
+                total = self._count()
+                non_compliant = len(self._violations)
+                detected = sum(self._counts.values())
+                self._snapshot = {
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "compliance_policies": dict(self._rules),
+                    "violations_detected": detected,
+                    "violations_by_rule": {rule: n for rule, n in sorted(self._counts.items()) if n > 0},
+                    "total_users": total,
+                    "compliant_users": total - non_compliant,
+                    "non_compliant_users": non_compliant,
+                    "status": "PENDING" if not self._built else "PASSED" if detected == 0 else "FAILED"
+                }
+                self._snapshot_version = self._version
+            return self._snapshot
+
+    def write_report(self):
+        """Append the current report to the report log now"""
+        report = self.report()
+        if self._write is not None:
+            self._write(self.report_path, json.dumps(report))
+        self.reports_written += 1
+        return report
+
+    # ---- internals (callers hold self._lock where noted) -------------------
+
+    def _apply(self, username, record):
+        # caller holds self._lock
+        self._counts.subtract(self._violations.pop(username, ()))
+        current = tuple(self._check(record)) if record is not None else ()
+        if current:
+            self._violations[username] = current
+            self._counts.update(current)
+        last_activity = record.get("last_activity") if record is not None else None
+        if isinstance(last_activity, datetime):
+            remaining = last_activity.timestamp() + self._rules["session_timeout"] * 60 - time.time()
+            if remaining > 0:
+                self._due.schedule(username, remaining)
+                return
+        self._due.cancel(username)
+
+    def _recheck(self, username):
+        self.user_changed(username, self._loader(username))
+
+    def start_reports(self):
+        """Start the background thread (once per process): it scans the
+        directory, then writes the report every ``interval`` seconds
+        (never if interval <= 0)"""
+        if self._reporter is not None and self._reporter_pid == os.getpid():
+            return
+        with self._lock:
+            if self._reporter is not None and self._reporter_pid == os.getpid():
+                return
+            self._reporter_pid = os.getpid()
+            self._reporter = threading.Thread(target=self._run_reports, name="compliance-report", daemon=True)
+            self._reporter.start()
+
+    def _run_reports(self):
+        if not self._built and self._touched is None:
+            try:
+                self.build()
+            except Exception:
+                pass
+        while self.interval > 0:
+            time.sleep(self.interval)
+            try:
+                self.write_report()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "built": self._built,
+                "non_compliant_users": len(self._violations),
+                "pending_time_checks": len(self._due),
+                "report_interval_seconds": self.interval,
+                "reports_written": self.reports_written
+            }
@@ -0,0 +1,110 @@
+"""
+Despite Group Access Control System
+Compliance Sweep - Parallel Fleet-Wide Compliance Check of the User Directory
+"""
+
+import json
+import os
+import shutil
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.models import ComplianceEngine
+from app.user_repository import SQLiteUserRepository
+
+
+def _sweep_range(index, db_path, after, until, part_path, batch_size, rules):
+    """Check every user in ``(after, until]``; violators go to ``part_path`` as JSONL"""
+    ComplianceEngine.compliance_rules.update(rules)
+    check = ComplianceEngine.check_compliance
+    repository = SQLiteUserRepository(db_path)
+    users = non_compliant = 0
+    counts = Counter()
+    try:
+        with open(part_path, "w", encoding="utf-8") as out:
+            for username, record in repository.iter_users(batch_size, after=after, until=until):
+                users += 1
+                violations = check(record)
+                if violations:
+                    non_compliant += 1
+                    counts.update(violations)
+                    out.write(json.dumps({
+                        "username": username,
+                        "role": record["role"],
+                        "violations": violations
+                    }))
+                    out.write("\n")
+    finally:
+        repository.close()
+    return index, users, non_compliant, dict(counts)
+
+
+def sweep_compliance(db_path, output_path, workers=None, shards_per_worker=4, batch_size=2000,
+                     progress=None):
+    """Check every user of the SQLite directory at ``db_path`` in parallel.
+
+    The directory is split into ``workers * shards_per_worker`` username
+    ranges; each worker process opens its own connection, streams its
+    range in ``batch_size`` pages and writes violators to a part file,
+    so memory stays at one page per worker whatever the directory size.
+    Parts are concatenated in username order into ``output_path`` (JSONL,
+    one non-compliant user per line). Returns the summary dict.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    repository = SQLiteUserRepository(db_path)
+    try:
+        total = repository.count()
+        bounds = [None] + repository.split_points(workers * shards_per_worker) + [None]
+    finally:
+        repository.close()
+    ranges = list(zip(bounds[:-1], bounds[1:]))
+    part_paths = [f"{output_path}.part{index}" for index in range(len(ranges))]
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    users = non_compliant = 0
+    counts = Counter()
+    rules = dict(ComplianceEngine.compliance_rules)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_sweep_range, index, db_path, after, until, part_paths[index], batch_size, rules)
+                for index, (after, until) in enumerate(ranges)
+            ]
+            for future in as_completed(futures):
+                _, range_users, range_non_compliant, range_counts = future.result()
+                users += range_users
+                non_compliant += range_non_compliant
+                counts.update(range_counts)
+                if progress:
+                    progress(users, total, time.perf_counter() - started)
+
+        with open(output_path, "w", encoding="utf-8") as out:
+            for part_path in part_paths:
+                with open(part_path, "r", encoding="utf-8") as part:
+                    shutil.copyfileobj(part, out)
+    finally:
+        for part_path in part_paths:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "database": db_path,
+        "output": output_path,
+        "compliance_policies": rules,
+        "total_users": users,
+        "compliant_users": users - non_compliant,
+        "non_compliant_users": non_compliant,
+        "violations_detected": sum(counts.values()),
+        "violations_by_rule": dict(sorted(counts.items())),
+        "status": "PASSED" if non_compliant == 0 else "FAILED",
+        "workers": workers,
+        "shards": len(ranges),
+        "seconds": round(elapsed, 3),
+        "users_per_second": round(users / elapsed) if elapsed else 0
+    }
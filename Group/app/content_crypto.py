@@ -0,0 +1,261 @@
+"""
+Despite Group Access Control System
+Content Protection - Streaming Chunked File Encryption for Large Media
+"""
+
+import hashlib
+import hmac
+import mmap
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # optional; the pure-Python XOR gives the same bytes
+    np = None
+
+CONTENT_MAGIC = b"DGCENC01"
+# magic, chunk size, plaintext size, nonce
+_HEADER = struct.Struct("<8sIQ16s")
+TAG_BYTES = 32
+HEADER_BYTES = _HEADER.size + TAG_BYTES
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def derive_master_key(secret):
+    """32-byte master key from a configured secret (str or bytes)"""
+    secret = secret.encode("utf-8") if isinstance(secret, str) else bytes(secret)
+    return hashlib.blake2b(secret, digest_size=32, person=b"dg-content-key").digest()
+
+
+def load_or_create_key(path):
+    """Secret from a key file, generating a random 32-byte key (mode 0600) on first start"""
+    try:
+        with open(path, "rb") as f:
+            key = f.read()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    key = os.urandom(32)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # another worker created it first; use theirs
+        with open(path, "rb") as f:
+            return f.read() or key
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+        f.flush()
+        os.fsync(f.fileno())
+    return key
+
+
+def _file_keys(master_key, nonce):
+    """Per-file keystream and MAC keys; the random nonce makes every file's keys distinct"""
+    encryption = hashlib.blake2b(nonce, key=master_key, digest_size=32, person=b"dg-content-enc").digest()
+    authentication = hashlib.blake2b(nonce, key=master_key, digest_size=32, person=b"dg-content-mac").digest()
+    return encryption, authentication
+
+
+def _xor_keystream(data, encryption_key, index):
+    keystream = hashlib.shake_128(encryption_key + index.to_bytes(8, "little")).digest(len(data))
+    if np is not None:
+        return np.bitwise_xor(np.frombuffer(data, np.uint8), np.frombuffer(keystream, np.uint8)).tobytes()
+    return (int.from_bytes(data, "little") ^ int.from_bytes(keystream, "little")).to_bytes(len(data), "little")
+
+
+def _tag(mac_key, header, index, ciphertext):
+    mac = hashlib.blake2b(key=mac_key, digest_size=TAG_BYTES)
+    mac.update(header)
+    mac.update(index.to_bytes(8, "little"))
+    mac.update(ciphertext)
+    return mac.digest()
+
+
+def _header_tag(mac_key, header):
+    return hashlib.blake2b(header, key=mac_key, digest_size=TAG_BYTES, person=b"dg-content-hdr").digest()
+
+
+def chunk_count(size, chunk_size):
+    return (size + chunk_size - 1) // chunk_size
+
+
+def _crypt_range(src, dst, master_key, header, first, last, decrypt):
+    """Encrypt or decrypt chunks ``[first, last)`` of ``src`` into ``dst``.
+
+    Runs in the calling process or a pool worker; each call maps the
+    source itself and writes its chunks at their final offsets, so only
+    one chunk's buffers are held at a time. Returns bytes of plaintext.
+    """
+    _, chunk_size, size, nonce = _HEADER.unpack(header)
+    encryption_key, mac_key = _file_keys(master_key, nonce)
+    record = chunk_size + TAG_BYTES
+    done = 0
+    with open(src, "rb") as source, open(dst, "r+b") as out:
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            # pages already processed are unmapped from this process as we go
+            release = hasattr(mmap, "MADV_DONTNEED")
+            released = None
+            for index in range(first, last):
+                length = min(chunk_size, size - index * chunk_size)
+                if decrypt:
+                    offset = HEADER_BYTES + index * record
+                    ciphertext = mapped[offset:offset + length]
+                    tag = mapped[offset + length:offset + length + TAG_BYTES]
+                    if not hmac.compare_digest(tag, _tag(mac_key, header, index, ciphertext)):
+                        raise ValueError(f"{src}: chunk {index} failed authentication")
+                    out.seek(index * chunk_size)
+                    out.write(_xor_keystream(ciphertext, encryption_key, index))
+                else:
+                    offset = index * chunk_size
+                    ciphertext = _xor_keystream(mapped[offset:offset + length], encryption_key, index)
+                    out.seek(HEADER_BYTES + index * record)
+                    out.write(ciphertext)
+                    out.write(_tag(mac_key, header, index, ciphertext))
+                done += length
+                if release:
+                    if released is None:
+                        released = offset - offset % mmap.PAGESIZE
+                    end = offset + length
+                    end -= end % mmap.PAGESIZE
+                    if end > released:
+                        mapped.madvise(mmap.MADV_DONTNEED, released, end - released)
+                        released = end
+    return done
+
+
+class ContentCipher:
+    """Authenticated encryption of content files of any size.
+
+    A file is split into ``chunk_size`` chunks; each is XORed with a
+    SHAKE-128 keystream keyed per file and chunk index, and followed by a
+    keyed BLAKE2b tag over the header, the index and the ciphertext, so
+    tampering, reordering and truncation are all detected. The header
+    (chunk size, plaintext size, random nonce) carries its own tag.
+
+    Sources are read through mmap and every chunk lands at a fixed offset,
+    so memory stays at a few chunk buffers whatever the file size, and
+    with ``workers`` > 1 contiguous chunk ranges are processed by a process
+    pool, scaling throughput with cores. Output is written to a ``.part``
+    file and renamed only once every chunk is done (and, for decryption,
+    verified).
+    """
+
+    def __init__(self, secret=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, shards_per_worker=4):
+        self._master_key = derive_master_key(secret if secret is not None else os.urandom(32))
+        self.chunk_size = int(chunk_size)
+        self.workers = int(workers)
+        self.shards_per_worker = int(shards_per_worker)
+        self._lock = threading.Lock()
+        self.files_encrypted = 0
+        self.files_decrypted = 0
+        self.bytes_processed = 0
+        self.seconds = 0.0
+
+    def configure(self, secret=None, chunk_size=None, workers=None):
+        if secret is not None:
+            self._master_key = derive_master_key(secret)
+        if chunk_size is not None:
+            if chunk_size <= 0:
+                raise ValueError("chunk_size must be positive")
+            self.chunk_size = int(chunk_size)
+        if workers is not None:
+            self.workers = max(1, int(workers))
+
+    @staticmethod
+    def read_header(path):
+        """``{chunk_size, size, chunks}`` of an encrypted file (not authenticated)"""
+        with open(path, "rb") as f:
+            magic, chunk_size, size, _ = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != CONTENT_MAGIC:
+            raise ValueError(f"{path} is not an encrypted content file")
+        return {"chunk_size": chunk_size, "size": size, "chunks": chunk_count(size, chunk_size)}
+
+    def encrypt_file(self, src, dst, workers=None):
+        """Encrypt ``src`` into ``dst``; returns a throughput summary"""
+        size = os.path.getsize(src)
+        header = _HEADER.pack(CONTENT_MAGIC, self.chunk_size, size, os.urandom(16))
+        _, mac_key = _file_keys(self._master_key, header[-16:])
+        chunks = chunk_count(size, self.chunk_size)
+        total = HEADER_BYTES + size + chunks * TAG_BYTES
+        prefix = header + _header_tag(mac_key, header)
+        return self._run(src, dst, header, prefix, total, chunks, False, workers, "encrypted")
+
+    def decrypt_file(self, src, dst, workers=None):
+        """Decrypt and verify ``src`` into ``dst``; raises ValueError (and
+        leaves no output) if any part of the file fails authentication"""
+        with open(src, "rb") as f:
+            prefix = f.read(HEADER_BYTES)
+        header, tag = prefix[:_HEADER.size], prefix[_HEADER.size:]
+        if len(prefix) != HEADER_BYTES or header[:8] != CONTENT_MAGIC:
+            raise ValueError(f"{src} is not an encrypted content file")
+        _, chunk_size, size, nonce = _HEADER.unpack(header)
+        _, mac_key = _file_keys(self._master_key, nonce)
+        if not hmac.compare_digest(tag, _header_tag(mac_key, header)):
+            raise ValueError(f"{src}: header failed authentication (wrong key or corrupted file)")
+        chunks = chunk_count(size, chunk_size)
+        if os.path.getsize(src) != HEADER_BYTES + size + chunks * TAG_BYTES:
+            raise ValueError(f"{src}: truncated or extended content file")
+        return self._run(src, dst, header, b"", size, chunks, True, workers, "decrypted")
+
+    def _run(self, src, dst, header, prefix, total, chunks, decrypt, workers, verb):
+        workers = max(1, min(workers or self.workers, chunks or 1))
+        started = time.perf_counter()
+        part = f"{dst}.part"
+        try:
+            with open(part, "wb") as out:
+                out.write(prefix)
+                out.truncate(total)
+            if chunks == 0:
+                done = 0
+            elif workers == 1:
+                done = _crypt_range(src, part, self._master_key, header, 0, chunks, decrypt)
+            else:
+                shards = min(chunks, workers * self.shards_per_worker)
+                bounds = [chunks * i // shards for i in range(shards + 1)]
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [
+                        pool.submit(_crypt_range, src, part, self._master_key, header, first, last, decrypt)
+                        for first, last in zip(bounds[:-1], bounds[1:])
+                    ]
+                    done = sum(future.result() for future in futures)
+            os.replace(part, dst)
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            if decrypt:
+                self.files_decrypted += 1
+            else:
+                self.files_encrypted += 1
+            self.bytes_processed += done
+            self.seconds += elapsed
+        return {
+            "source": src,
+            "output": dst,
+            verb: done,
+            "chunks": chunks,
+            "workers": workers,
+            "seconds": round(elapsed, 3),
+            "mb_per_second": round(done / elapsed / 1e6, 1) if elapsed else 0.0
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "scheme": "SHAKE128-XOR + BLAKE2b-256 per chunk",
+                "chunk_size": self.chunk_size,
+                "workers": self.workers,
+                "files_encrypted": self.files_encrypted,
+                "files_decrypted": self.files_decrypted,
+                "bytes_processed": self.bytes_processed,
+                "mb_per_second": round(self.bytes_processed / self.seconds / 1e6, 1) if self.seconds else 0.0
+            }
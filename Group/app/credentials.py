@@ -0,0 +1,193 @@
+"""
+Despite Group Access Control System
+Password Hashing (scrypt) and Bounded Off-Thread Credential Verifier
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+HASH_SCHEME = "scrypt"
+
+# scrypt work factor: N (CPU/memory cost, power of two), r (block size), p (parallelism)
+DEFAULT_N = 2 ** 14
+DEFAULT_R = 8
+DEFAULT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# ============================================================
+# HASHING PRIMITIVES
+# ============================================================
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+        maxmem=128 * r * (n + p + 2) + (1 << 20), dklen=KEY_BYTES
+    )
+
+
+def hash_password(password, n=DEFAULT_N, r=DEFAULT_R, p=DEFAULT_P, salt=None):
+    """Encode ``password`` as ``scrypt$N$r$p$salt$key``"""
+    salt = salt if salt is not None else os.urandom(SALT_BYTES)
+    key = _scrypt(password, salt, n, r, p)
+    return f"{HASH_SCHEME}${n}${r}${p}${_b64(salt)}${_b64(key)}"
+
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(HASH_SCHEME + "$")
+
+
+def verify_password(password, stored):
+    """Check ``password`` against an encoded hash (constant-time compare).
+
+    Records created before hashing was introduced hold the plaintext; those
+    are compared directly so they can be upgraded on the next login.
+    """
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), str(stored).encode("utf-8"))
+    try:
+        _, n, r, p, salt, key = stored.split("$")
+        expected = _unb64(key)
+        actual = _scrypt(password, _unb64(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(stored, n=DEFAULT_N, r=DEFAULT_R, p=DEFAULT_P):
+    """True for plaintext records or hashes made with a different work factor"""
+    if not is_hashed(stored):
+        return True
+    return stored.split("$")[1:4] != [str(n), str(r), str(p)]
+
+
+# ============================================================
+# PROCESS-POOL VERIFIER
+# ============================================================
+
+class VerifierSaturated(Exception):
+    """Too many credential checks are queued; the caller should shed load"""
+
+
+class CredentialVerifier:
+    """Runs scrypt in a small process pool so request threads stay free.
+
+    At most ``max_pending`` checks may be queued or running; beyond that
+    ``verify`` and ``hash`` raise VerifierSaturated immediately instead of
+    blocking, so a login storm cannot tie up every request thread. A
+    check that takes longer than ``timeout`` also raises it. With
+    ``workers=0`` hashing runs inline on the calling thread.
+    """
+
+    def __init__(self, workers=2, max_pending=16, n=DEFAULT_N, r=DEFAULT_R, p=DEFAULT_P, timeout=5.0):
+        self._pool = None
+        self._pool_pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._dummy_hash = None
+        self.rejected = 0
+        self.completed = 0
+        self.configure(workers, max_pending, n, r, p, timeout)
+
+    def configure(self, workers=None, max_pending=None, n=None, r=None, p=None, timeout=None):
+        """Change pool size, queue bound or work factor (the pool is restarted)"""
+        with self._lock:
+            if workers is not None:
+                self.workers = int(workers)
+            if max_pending is not None:
+                self.max_pending = int(max_pending)
+            if n is not None:
+                self.n = int(n)
+            if r is not None:
+                self.r = int(r)
+            if p is not None:
+                self.p = int(p)
+            if timeout is not None:
+                self.timeout = float(timeout)
+            n, r, p = self.n, self.r, self.p
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        # Hashed here, not on the first unknown-user login's request thread
+        dummy = hash_password(os.urandom(8).hex(), n, r, p)
+        with self._lock:
+            self._dummy_hash = dummy
+
+    def _executor(self):
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise VerifierSaturated(f"{self._pending} credential checks pending")
+            self._pending += 1
+            executor = self._executor() if self.workers > 0 else None
+        if executor is None:
+            try:
+                return fn(*args)
+            finally:
+                self._release()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # A check stays pending until its worker is done with it, even if
+        # the caller gave up waiting, so timeouts cannot overfill the pool
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise VerifierSaturated(f"credential check exceeded {self.timeout}s") from None
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def hash(self, password):
+        """Hash with the configured work factor"""
+        return self._run(hash_password, password, self.n, self.r, self.p)
+
+    def verify(self, password, stored):
+        """Check ``password`` against ``stored``; a None ``stored`` (unknown
+        user) is checked against a dummy hash so timing does not reveal it"""
+        if stored is None:
+            self._run(verify_password, password, self._dummy_hash)
+            return False
+        return self._run(verify_password, password, stored)
+
+    def needs_rehash(self, stored):
+        return needs_rehash(stored, self.n, self.r, self.p)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "work_factor": {"n": self.n, "r": self.r, "p": self.p}
+            }
+
+
+credential_verifier = CredentialVerifier()
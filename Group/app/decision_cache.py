@@ -0,0 +1,119 @@
+"""
+Despite Group Access Control System
+Access Decision Cache - TTL + LRU with Explicit Invalidation
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class DecisionCache:
+    """Bounded cache of Zero Trust decisions keyed by request tuple.
+
+    Entries expire after ``ttl`` seconds and the least recently used
+    entry is evicted once ``max_entries`` is reached. Invalidating a user
+    drops that user's entries through a per-user key index; invalidating
+    everything clears the cache. Either bumps the generation, and a
+    decision evaluated under an older generation (see ``generation()``)
+    is not stored.
+    """
+
+    def __init__(self, ttl=30.0, max_entries=10000):
+        self.ttl = float(ttl)
+        self.max_entries = int(max_entries)
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def configure(self, ttl=None, max_entries=None):
+        """Change TTL or size bound; cached decisions are dropped"""
+        with self._lock:
+            if ttl is not None:
+                self.ttl = float(ttl)
+            if max_entries is not None:
+                self.max_entries = int(max_entries)
+            self._clear()
+
+    def generation(self):
+        """Current generation; take it before evaluating a decision to ``put``"""
+        with self._lock:
+            return self._generation
+
+    def get(self, key):
+        """Return the cached decision for ``key`` or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, decision = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return decision
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, decision, generation=None):
+        """Cache ``decision`` for ``key``, unless an invalidation happened
+        since ``generation`` (from ``generation()``) was taken"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, decision)
+            self._keys_by_user.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_user(self, username):
+        """Drop decisions for one user (role or device posture changed)"""
+        with self._lock:
+            self._generation += 1
+            for key in list(self._keys_by_user.get(username, ())):
+                self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_all(self):
+        """Drop every decision (policy tables changed)"""
+        with self._lock:
+            self._generation += 1
+            self._clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Hit/miss statistics snapshot"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl
+            }
+
+    # Callers hold self._lock
+    def _remove(self, key):
+        if self._entries.pop(key, None) is None:
+            return
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+    def _clear(self):
+        self._entries.clear()
+        self._keys_by_user.clear()
@@ -0,0 +1,371 @@
+"""
+Despite Group Access Control System
+Device Registry - Fingerprint-Keyed Posture Cache Persisted in SQLite
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.bloom import CountingBloomFilter
+
+
+class DevicePosture:
+    """Posture of one device as last assessed"""
+
+    __slots__ = (
+        "fingerprint", "username", "user_agent", "ip_address", "integrity_valid",
+        "encryption_enabled", "malware_detected", "assessed_at", "last_seen"
+    )
+
+    def __init__(self, fingerprint, username, user_agent, ip_address, integrity_valid,
+                 encryption_enabled, malware_detected, assessed_at, last_seen=None):
+        self.fingerprint = fingerprint
+        self.username = username
+        self.user_agent = user_agent
+        self.ip_address = ip_address
+        self.integrity_valid = bool(integrity_valid)
+        self.encryption_enabled = bool(encryption_enabled)
+        self.malware_detected = bool(malware_detected)
+        self.assessed_at = float(assessed_at)
+        self.last_seen = float(last_seen if last_seen is not None else assessed_at)
+
+    @property
+    def secure(self):
+        return self.integrity_valid and self.encryption_enabled and not self.malware_detected
+
+    def to_dict(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "username": self.username,
+            "integrity_valid": self.integrity_valid,
+            "encryption_enabled": self.encryption_enabled,
+            "malware_detected": self.malware_detected,
+            "secure": self.secure,
+            "assessed_at": self.assessed_at,
+            "last_seen": self.last_seen
+        }
+
+
+class DeviceRegistry:
+    """Known devices keyed by fingerprint, with posture results cached.
+
+    Posture checks are expensive and should not be re-rolled per request,
+    so a device's result is reused for ``ttl`` seconds. Lookups hit an
+    in-memory LRU of ``max_entries`` devices in O(1); misses fall back to
+    SQLite at ``path`` (None keeps the registry in memory only), which
+    keeps devices across restarts. Each user's most recently assessed
+    device is tracked so their posture is one lookup as well; users found
+    to have no device are remembered for ``negative_ttl`` seconds so they
+    do not cost a SQLite query per request.
+
+    Counting Bloom filters over the registered and the revoked
+    fingerprints answer "definitely unknown" / "definitely not revoked"
+    without touching SQLite; only probable hits are confirmed there. The
+    filters live next to the database as mmap-ed ``.bloom`` files and are
+    rebuilt from the tables when missing or out of date.
+    """
+
+    COLUMNS = (
+        "fingerprint, username, user_agent, ip_address, integrity_valid, "
+        "encryption_enabled, malware_detected, assessed_at, last_seen"
+    )
+
+    def __init__(self, path=None, ttl=3600.0, max_entries=10000, busy_timeout=5000,
+                 filter_capacity=100000, filter_error_rate=0.01, negative_ttl=60.0):
+        self.path = None
+        self.ttl = float(ttl)
+        self.negative_ttl = float(negative_ttl)
+        self.max_entries = int(max_entries)
+        self.busy_timeout = busy_timeout
+        self.filter_capacity = int(filter_capacity)
+        self.filter_error_rate = float(filter_error_rate)
+        self.known = CountingBloomFilter(self.filter_capacity, self.filter_error_rate)
+        self.revoked = CountingBloomFilter(self.filter_capacity, self.filter_error_rate)
+        self._revoked_exact = set()  # memory-only registries confirm revocations here
+        self.filter_skips = 0
+        self._entries = OrderedDict()
+        self._latest = OrderedDict()
+        self._no_device = OrderedDict()  # username -> monotonic time of the empty lookup
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.assessments = 0
+        if path is not None:
+            self.configure(path=path)
+
+    def configure(self, path=None, ttl=None, max_entries=None, filter_capacity=None):
+        """Change persistence path, TTL, cache or filter size; cached devices are dropped"""
+        with self._lock:
+            if ttl is not None:
+                self.ttl = float(ttl)
+            if max_entries is not None:
+                self.max_entries = int(max_entries)
+            resize = filter_capacity is not None and int(filter_capacity) != self.filter_capacity
+            if resize:
+                self.filter_capacity = int(filter_capacity)
+            if path is not None and path != self.path:
+                self.path = path
+                self._local = threading.local()
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = self._conn()
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS devices ("
+                    " fingerprint TEXT PRIMARY KEY, username TEXT NOT NULL,"
+                    " user_agent TEXT, ip_address TEXT,"
+                    " integrity_valid INTEGER NOT NULL, encryption_enabled INTEGER NOT NULL,"
+                    " malware_detected INTEGER NOT NULL,"
+                    " assessed_at REAL NOT NULL, last_seen REAL NOT NULL"
+                    ") WITHOUT ROWID"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS devices_user ON devices(username, last_seen)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS revoked_devices ("
+                    " fingerprint TEXT PRIMARY KEY, revoked_at REAL NOT NULL, reason TEXT"
+                    ") WITHOUT ROWID"
+                )
+                self._load_filters()
+            elif resize:
+                self._load_filters(rebuild=True)
+            self._entries.clear()
+            self._latest.clear()
+            self._no_device.clear()
+
+    def _load_filters(self, rebuild=False):
+        # Caller holds self._lock. Maps each filter file, rebuilding it from
+        # its table when missing, a different size, or out of step with it.
+        for name, table in (("known", "devices"), ("revoked", "revoked_devices")):
+            current = getattr(self, name)
+            if current is not None:
+                current.close()
+            if self.path is None:
+                bloom = CountingBloomFilter(self.filter_capacity, self.filter_error_rate)
+                if name == "revoked":
+                    bloom.update(self._revoked_exact)
+                setattr(self, name, bloom)
+                continue
+            filter_path = f"{self.path}.{name}.bloom"
+            rows = self._conn().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            bloom = None
+            if not rebuild and os.path.exists(filter_path):
+                try:
+                    bloom = CountingBloomFilter.open(filter_path, writable=True, error_rate=self.filter_error_rate)
+                except ValueError:
+                    bloom = None
+                if bloom is not None and (len(bloom) != rows or bloom.capacity != self.filter_capacity):
+                    bloom.close()
+                    bloom = None
+            if bloom is None:
+                fresh = CountingBloomFilter(self.filter_capacity, self.filter_error_rate)
+                for (fingerprint,) in self._conn().execute(f"SELECT fingerprint FROM {table}"):
+                    fresh.add(fingerprint)
+                fresh.save(filter_path)
+                bloom = CountingBloomFilter.open(filter_path, writable=True, error_rate=self.filter_error_rate)
+            setattr(self, name, bloom)
+
+    def _conn(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn = conn
+            local.pid = os.getpid()
+        return local.conn
+
+    # ---- lookups ---------------------------------------------------------
+
+    def get(self, fingerprint):
+        """Known posture for a fingerprint (possibly stale) or None"""
+        with self._lock:
+            posture = self._entries.get(fingerprint)
+            if posture is not None:
+                self._entries.move_to_end(fingerprint)
+                self.hits += 1
+                return posture
+            self.misses += 1
+            if fingerprint not in self.known:
+                self.filter_skips += 1
+                return None
+        if self.path is None:
+            return None
+        row = self._conn().execute(
+            f"SELECT {self.COLUMNS} FROM devices WHERE fingerprint = ?", (fingerprint,)
+        ).fetchone()
+        if row is None:
+            return None
+        posture = DevicePosture(*row)
+        with self._lock:
+            self._remember(posture)
+        return posture
+
+    def latest_for_user(self, username):
+        """The user's most recently assessed device, or None if they have none"""
+        with self._lock:
+            fingerprint = self._latest.get(username)
+            checked_at = self._no_device.get(username)
+            if fingerprint is None and checked_at is not None:
+                if time.monotonic() - checked_at < self.negative_ttl:
+                    return None
+                del self._no_device[username]
+        if fingerprint is not None:
+            posture = self.get(fingerprint)
+            if posture is not None:
+                return posture
+        if self.path is None:
+            return None
+        row = self._conn().execute(
+            f"SELECT {self.COLUMNS} FROM devices WHERE username = ? ORDER BY last_seen DESC LIMIT 1",
+            (username,)
+        ).fetchone()
+        if row is None:
+            with self._lock:
+                self._no_device[username] = time.monotonic()
+                while len(self._no_device) > self.max_entries:
+                    self._no_device.popitem(last=False)
+            return None
+        posture = DevicePosture(*row)
+        with self._lock:
+            self._remember(posture)
+        return posture
+
+    def is_fresh(self, posture, now=None):
+        now = time.time() if now is None else now
+        return posture is not None and now - posture.assessed_at < self.ttl
+
+    # ---- assessment --------------------------------------------------------
+
+    def assess(self, fingerprint, username, user_agent, ip_address, probe, now=None):
+        """Posture for a device, running ``probe()`` only when the cached
+        result is missing or older than ``ttl``.
+
+        ``probe`` returns ``(integrity_valid, encryption_enabled,
+        malware_detected)``. Returns ``(posture, assessed)``.
+        """
+        now = time.time() if now is None else now
+        posture = self.get(fingerprint)
+        if self.is_fresh(posture, now) and posture.username == username:
+            with self._lock:
+                posture.last_seen = now
+                self._no_device.pop(username, None)
+                self._latest[username] = fingerprint
+                self._latest.move_to_end(username)
+            return posture, False
+
+        new_device = posture is None
+        integrity_valid, encryption_enabled, malware_detected = probe()
+        posture = DevicePosture(
+            fingerprint, username, user_agent, ip_address,
+            integrity_valid, encryption_enabled, malware_detected, now
+        )
+        if self.path is not None:
+            self._conn().execute(
+                f"INSERT OR REPLACE INTO devices ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (fingerprint, username, user_agent, ip_address, int(posture.integrity_valid),
+                 int(posture.encryption_enabled), int(posture.malware_detected), now, now)
+            )
+        with self._lock:
+            self.assessments += 1
+            if new_device:
+                self.known.add(fingerprint)
+            self._remember(posture)
+        return posture, True
+
+    # ---- revocation --------------------------------------------------------
+
+    def is_revoked(self, fingerprint):
+        """Exact answer; the revoked filter settles the usual "no" without a query"""
+        if fingerprint not in self.revoked:
+            return False
+        if self.path is None:
+            return fingerprint in self._revoked_exact
+        return self._conn().execute(
+            "SELECT 1 FROM revoked_devices WHERE fingerprint = ?", (fingerprint,)
+        ).fetchone() is not None
+
+    def revoke(self, fingerprint, reason="", now=None):
+        """Revoke a device: it fails integrity from now on. Returns its
+        posture (now insecure) or None if it was never registered."""
+        now = time.time() if now is None else now
+        if not self.is_revoked(fingerprint):
+            # Only the process whose insert lands counts the key into the shared filter
+            if self.path is None:
+                added = fingerprint not in self._revoked_exact
+                self._revoked_exact.add(fingerprint)
+            else:
+                added = self._conn().execute(
+                    "INSERT OR IGNORE INTO revoked_devices (fingerprint, revoked_at, reason) VALUES (?, ?, ?)",
+                    (fingerprint, now, reason)
+                ).rowcount == 1
+            if added:
+                with self._lock:
+                    self.revoked.add(fingerprint)
+        posture = self.get(fingerprint)
+        if posture is not None:
+            posture.integrity_valid = False
+            if self.path is not None:
+                self._conn().execute(
+                    "UPDATE devices SET integrity_valid = 0 WHERE fingerprint = ?", (fingerprint,)
+                )
+        return posture
+
+    def reinstate(self, fingerprint):
+        """Lift a revocation; the device is re-assessed on its next check.
+        Returns False if it was not revoked."""
+        if not self.is_revoked(fingerprint):
+            return False
+        # Removing a key twice would zero counters other revoked keys need
+        if self.path is None:
+            removed = fingerprint in self._revoked_exact
+            self._revoked_exact.discard(fingerprint)
+        else:
+            removed = self._conn().execute(
+                "DELETE FROM revoked_devices WHERE fingerprint = ?", (fingerprint,)
+            ).rowcount == 1
+        if not removed:
+            return False
+        with self._lock:
+            self.revoked.remove(fingerprint)
+        posture = self.get(fingerprint)
+        if posture is not None:
+            posture.assessed_at = 0.0
+            if self.path is not None:
+                self._conn().execute("UPDATE devices SET assessed_at = 0 WHERE fingerprint = ?", (fingerprint,))
+        return True
+
+    # Callers hold self._lock
+    def _remember(self, posture):
+        self._no_device.pop(posture.username, None)
+        self._entries[posture.fingerprint] = posture
+        self._entries.move_to_end(posture.fingerprint)
+        latest = self._entries.get(self._latest.get(posture.username))
+        if latest is None or latest.last_seen <= posture.last_seen:
+            self._latest[posture.username] = posture.fingerprint
+            self._latest.move_to_end(posture.username)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        while len(self._latest) > self.max_entries:
+            self._latest.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cached_devices": len(self._entries),
+                "users_without_device": len(self._no_device),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "assessments": self.assessments,
+                "filter_skips": self.filter_skips,
+                "persistent": self.path is not None,
+                "known_filter": self.known.stats(),
+                "revoked_filter": self.revoked.stats()
+            }
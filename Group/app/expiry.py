@@ -0,0 +1,124 @@
+"""
+Despite Group Access Control System
+Timer Wheel - O(1) Deadlines with Background Expiry (MFA Challenges, Sessions)
+"""
+
+import math
+import os
+import threading
+import time
+
+
+class TimerWheel:
+    """Hashed timing wheel for keyed deadlines.
+
+    A deadline is rounded up to the next ``tick`` and hashed into one of
+    ``slots`` buckets, so ``schedule``, ``cancel`` and re-``schedule``
+    are O(1). A daemon thread visits one bucket per tick and passes every
+    key whose deadline has passed to ``on_expire(key)``. Keys more than
+    one rotation (``slots * tick`` seconds) out stay in their bucket and
+    are re-checked once per rotation, so size the wheel above the usual
+    delay to keep expiry amortized O(1).
+    """
+
+    def __init__(self, on_expire=None, tick=1.0, slots=1024, name="timer-wheel"):
+        self.on_expire = on_expire
+        self.tick = float(tick)
+        self.name = name
+        self._buckets = [{} for _ in range(int(slots))]
+        self._where = {}
+        self._cursor = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.expired = 0
+
+    def schedule(self, key, delay, now=None):
+        """Expire ``key`` after ``delay`` seconds, replacing any earlier deadline"""
+        now = time.time() if now is None else now
+        deadline = now + delay
+        index = math.ceil(deadline / self.tick) % len(self._buckets)
+        with self._lock:
+            previous = self._where.get(key)
+            if previous is not None:
+                del self._buckets[previous][key]
+            self._buckets[index][key] = deadline
+            self._where[key] = index
+            if self._cursor is None:
+                self._cursor = int(now // self.tick)
+        self._ensure_ticker()
+
+    def cancel(self, key):
+        """Forget ``key``; True if it was scheduled"""
+        with self._lock:
+            index = self._where.pop(key, None)
+            if index is None:
+                return False
+            del self._buckets[index][key]
+            return True
+
+    def deadline(self, key):
+        """Epoch deadline for ``key`` or None"""
+        with self._lock:
+            index = self._where.get(key)
+            return None if index is None else self._buckets[index][key]
+
+    def advance(self, now=None):
+        """Expire everything due by ``now``; returns the number of keys fired"""
+        now = time.time() if now is None else now
+        current = int(now // self.tick)
+        fired = []
+        with self._lock:
+            if self._cursor is None:
+                self._cursor = current
+                return 0
+            # Catching up after a long pause never needs more than one rotation
+            first = max(self._cursor + 1, current - len(self._buckets) + 1)
+            for tick in range(first, current + 1):
+                bucket = self._buckets[tick % len(self._buckets)]
+                if not bucket:
+                    continue
+                due = [key for key, deadline in bucket.items() if deadline <= now]
+                for key in due:
+                    del bucket[key]
+                    del self._where[key]
+                fired.extend(due)
+            self._cursor = max(self._cursor, current)
+            self.expired += len(fired)
+        if self.on_expire is not None:
+            for key in fired:
+                try:
+                    self.on_expire(key)
+                except Exception:
+                    pass
+        return len(fired)
+
+    def _ensure_ticker(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.tick)
+            self.advance()
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def __len__(self):
+        return len(self._where)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "scheduled": len(self._where),
+                "expired": self.expired,
+                "tick_seconds": self.tick,
+                "slots": len(self._buckets)
+            }
@@ -0,0 +1,141 @@
+"""
+Despite Group Access Control System
+Zero Trust Pipeline Stage Latency Instrumentation
+"""
+
+import bisect
+import threading
+from time import perf_counter
+
+# Stages of AccessController.request_access, in pipeline order
+STAGES = (
+    "identity", "device", "rate_limit", "cache_lookup", "risk", "behavior",
+    "permission", "compliance", "enforce_logging", "drm", "grant", "total"
+)
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+DEFAULT_BUCKETS_MS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (cumulative counts computed on read)"""
+
+    __slots__ = ("bounds", "counts", "total", "count", "_lock")
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(b / 1000.0 for b in buckets_ms)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.count += 1
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.total = 0.0
+            self.count = 0
+
+    def raw(self):
+        """Consistent (bucket counts, sum, count) triple"""
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+    def quantile(self, q, counts=None, count=None):
+        """Upper bucket bound holding the q-th quantile, in seconds"""
+        counts = self.counts if counts is None else counts
+        count = self.count if count is None else count
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket in enumerate(counts):
+            seen += bucket
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else float("inf")
+        return float("inf")
+
+    def snapshot(self):
+        counts, total, count = self.raw()
+        buckets = {}
+        cumulative = 0
+        for bound, bucket in zip(self.bounds + (float("inf"),), counts):
+            cumulative += bucket
+            buckets["+Inf" if bound == float("inf") else f"{bound * 1000:g}"] = cumulative
+
+        def ms(value):
+            return None if value == float("inf") else round(value * 1000, 3)
+
+        return {
+            "count": count,
+            "mean_ms": round(total / count * 1000, 4) if count else 0.0,
+            "p50_ms": ms(self.quantile(0.50, counts, count)),
+            "p95_ms": ms(self.quantile(0.95, counts, count)),
+            "p99_ms": ms(self.quantile(0.99, counts, count)),
+            "buckets_ms": buckets
+        }
+
+
+class StageTimer:
+    """Per-stage latency recorder for the access decision pipeline.
+
+    ``begin()`` starts a request on the current thread; each ``mark(stage)``
+    records the time since the previous mark under that stage; ``finish()``
+    records the whole request as ``total``. When disabled every call is a
+    single attribute check.
+    """
+
+    def __init__(self, stages=STAGES, buckets_ms=DEFAULT_BUCKETS_MS, enabled=True):
+        self.enabled = enabled
+        self.histograms = {stage: LatencyHistogram(buckets_ms) for stage in stages}
+        self._local = threading.local()
+
+    def begin(self):
+        if self.enabled:
+            now = perf_counter()
+            self._local.last = now
+            self._local.start = now
+
+    def mark(self, stage):
+        if not self.enabled:
+            return
+        local = self._local
+        last = getattr(local, "last", None)
+        now = perf_counter()
+        if last is not None:
+            self.histograms[stage].observe(now - last)
+        local.last = now
+
+    def finish(self):
+        if not self.enabled:
+            return
+        local = self._local
+        start = getattr(local, "start", None)
+        if start is not None:
+            self.histograms["total"].observe(perf_counter() - start)
+        local.start = None
+        local.last = None
+
+    def set_enabled(self, enabled):
+        self.enabled = bool(enabled)
+        if not self.enabled:
+            self._local = threading.local()
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def snapshot(self):
+        return {
+            "enabled": self.enabled,
+            "stages": {stage: histogram.snapshot() for stage, histogram in self.histograms.items()}
+        }
+
+
+stage_timer = StageTimer()
@@ -0,0 +1,195 @@
+"""
+Despite Group Access Control System
+IP Location Risk - Range Table with Binary-Search Lookups
+"""
+
+import bisect
+import csv
+import ipaddress
+import socket
+import threading
+from array import array
+
+MAX_LOCATION_RISK = 10
+
+# ============================================================
+# ADDRESS PARSING
+# ============================================================
+
+def parse_address(address):
+    """(version, integer) for an IPv4/IPv6 string; ValueError if malformed"""
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, address), "big")
+    except (OSError, TypeError):
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, address.split("%", 1)[0]), "big")
+    except (OSError, TypeError, AttributeError):
+        raise ValueError(f"invalid IP address: {address!r}") from None
+
+
+def parse_range(row):
+    """(version, first, last) from a CSV row with ``network`` (CIDR) or ``start``/``end``"""
+    network = (row.get("network") or "").strip()
+    if network:
+        net = ipaddress.ip_network(network, strict=False)
+        return net.version, int(net.network_address), int(net.broadcast_address)
+    start_version, start = parse_address((row.get("start") or "").strip())
+    end_version, end = parse_address((row.get("end") or "").strip())
+    if start_version != end_version or start > end:
+        raise ValueError(f"invalid range {row.get('start')} - {row.get('end')}")
+    return start_version, start, end
+
+
+# ============================================================
+# RANGE TABLE
+# ============================================================
+
+def _disjoint(ranges):
+    """Flatten (first, last, risk, label) ranges into sorted, non-overlapping
+    segments; where ranges overlap the one starting later (the more
+    specific one, for nested CIDRs) wins."""
+    ranges.sort(key=lambda item: (item[0], -item[1]))
+    segments = []
+    stack = []
+    cursor = 0
+
+    def emit(first, item):
+        last = item[1]
+        if first <= last:
+            segments.append((first, last, item[2], item[3]))
+        return max(first, last + 1)
+
+    for item in ranges:
+        first = item[0]
+        while stack and stack[-1][1] < first:
+            cursor = emit(cursor, stack.pop())
+        if stack and cursor < first:
+            top = stack[-1]
+            segments.append((cursor, min(first - 1, top[1]), top[2], top[3]))
+        stack.append(item)
+        cursor = first
+    while stack:
+        cursor = emit(cursor, stack.pop())
+    return segments
+
+
+class RangeTable:
+    """Sorted, disjoint address ranges for one IP version.
+
+    Bounds live in parallel typed arrays (``I`` for IPv4, Python ints for
+    IPv6); a lookup is one ``bisect`` over the range starts plus a bound
+    check, O(log n).
+    """
+
+    __slots__ = ("starts", "ends", "risks", "labels")
+
+    def __init__(self, segments, version, label_ids):
+        typecode = "I" if version == 4 else None
+        self.starts = array(typecode) if typecode else []
+        self.ends = array(typecode) if typecode else []
+        self.risks = array("B")
+        self.labels = array("I")
+        for first, last, risk, label in segments:
+            self.starts.append(first)
+            self.ends.append(last)
+            self.risks.append(risk)
+            self.labels.append(label_ids.setdefault(label, len(label_ids)))
+
+    def find(self, value):
+        """Index of the range holding ``value`` or -1"""
+        index = bisect.bisect_right(self.starts, value) - 1
+        if index >= 0 and value <= self.ends[index]:
+            return index
+        return -1
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class IPReputationTable:
+    """IP range -> (location risk, label) table loaded from CSV.
+
+    The CSV has a header and either a ``network`` column (CIDR) or
+    ``start`` and ``end`` columns, plus ``risk`` (0-10) and an optional
+    ``label`` (country, ASN, "tor-exit", ...). Reloading builds new
+    tables and swaps them in one assignment, so lookups never see a
+    half-loaded table. Addresses outside every range score 0 when they
+    are private/loopback and ``default_risk`` otherwise.
+    """
+
+    def __init__(self, default_risk=5):
+        self.default_risk = int(default_risk)
+        self._tables = ({}, [])
+        self._lock = threading.Lock()
+        self.source = None
+
+    def configure(self, default_risk=None):
+        if default_risk is not None:
+            self.default_risk = int(default_risk)
+
+    def load_ranges(self, ranges, source=None):
+        """Install ``(version, first, last, risk, label)`` tuples; returns the range count"""
+        by_version = {4: [], 6: []}
+        for version, first, last, risk, label in ranges:
+            by_version[version].append((first, last, max(0, min(int(risk), MAX_LOCATION_RISK)), label or ""))
+        label_ids = {}
+        tables = {
+            version: RangeTable(_disjoint(items), version, label_ids)
+            for version, items in by_version.items()
+        }
+        labels = [None] * len(label_ids)
+        for label, index in label_ids.items():
+            labels[index] = label
+        with self._lock:
+            self._tables = (tables, labels)
+            self.source = source
+        return sum(len(table) for table in tables.values())
+
+    def load_csv(self, path):
+        """Replace the table with the ranges in ``path``; bad rows raise ValueError"""
+        def rows():
+            with open(path, newline="", encoding="utf-8") as f:
+                for line, row in enumerate(csv.DictReader(f), start=2):
+                    try:
+                        version, first, last = parse_range(row)
+                        yield version, first, last, int(row["risk"]), (row.get("label") or "").strip()
+                    except (KeyError, TypeError, ValueError) as e:
+                        raise ValueError(f"{path}:{line}: {e}") from None
+        return self.load_ranges(rows(), source=path)
+
+    def _resolve(self, address):
+        """(risk, label or None, matched)"""
+        tables, labels = self._tables
+        try:
+            version, value = parse_address(address)
+        except ValueError:
+            return self.default_risk, None, False
+        table = tables.get(version)
+        index = table.find(value) if table is not None else -1
+        if index >= 0:
+            return table.risks[index], labels[table.labels[index]] or None, True
+        parsed = ipaddress.IPv4Address(value) if version == 4 else ipaddress.IPv6Address(value)
+        return (0 if parsed.is_private else self.default_risk), None, False
+
+    def lookup(self, address):
+        """{"risk", "label", "matched"} for an address string"""
+        risk, label, matched = self._resolve(address)
+        return {"risk": risk, "label": label, "matched": matched}
+
+    def location_risk(self, address):
+        """Location risk factor (0-10) for an address string"""
+        return self._resolve(address)[0]
+
+    def stats(self):
+        tables, labels = self._tables
+        return {
+            "source": self.source,
+            "ipv4_ranges": len(tables.get(4, ())),
+            "ipv6_ranges": len(tables.get(6, ())),
+            "labels": len(labels),
+            "default_risk": self.default_risk
+        }
+
+
+ip_reputation = IPReputationTable()
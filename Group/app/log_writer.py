@@ -0,0 +1,238 @@
+"""
+Despite Group Access Control System
+Background Batched Log Writer
+"""
+
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+
+# ============================================================
+# FSYNC POLICIES
+# ============================================================
+
+FSYNC_NONE = "none"          # Flush to the OS only, never fsync
+FSYNC_BATCH = "batch"        # fsync every file touched by a group commit
+FSYNC_INTERVAL = "interval"  # fsync at most once per fsync_interval seconds
+
+FSYNC_POLICIES = (FSYNC_NONE, FSYNC_BATCH, FSYNC_INTERVAL)
+
+_STOP = object()
+
+
+class _Call:
+    """A function queued to run on the writer thread after the lines before it"""
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+
+
+class LogWriter:
+    """Queue-backed writer thread that group-commits log lines.
+
+    Request threads only enqueue ``(path, lines)`` records. A single
+    daemon thread keeps every log file open, collects records for up to
+    ``flush_interval`` seconds (or ``batch_size`` lines), then writes
+    each file's lines with one ``write`` call and applies the fsync
+    policy. ``shutdown`` drains the queue before closing the files.
+    """
+
+    def __init__(self, flush_interval=0.05, batch_size=512, fsync_policy=FSYNC_NONE,
+                 fsync_interval=1.0, echo=True, max_queue=100000):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._queue = None
+        self._files = {}
+        self._last_fsync = 0.0
+        self.commits = 0  # group commits so far (calls see the number of theirs)
+        self.configure(flush_interval, batch_size, fsync_policy, fsync_interval, echo, max_queue)
+        atexit.register(self.shutdown)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def configure(self, flush_interval=None, batch_size=None, fsync_policy=None,
+                  fsync_interval=None, echo=None, max_queue=None):
+        """Update writer settings; takes effect from the next batch"""
+        if fsync_policy is not None and fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        if flush_interval is not None:
+            self.flush_interval = float(flush_interval)
+        if batch_size is not None:
+            self.batch_size = max(1, int(batch_size))
+        if fsync_policy is not None:
+            self.fsync_policy = fsync_policy
+        if fsync_interval is not None:
+            self.fsync_interval = float(fsync_interval)
+        if echo is not None:
+            self.echo = bool(echo)
+        if max_queue is not None:
+            self.max_queue = int(max_queue)
+
+    # --------------------------------------------------------
+    # Producer side (request threads)
+    # --------------------------------------------------------
+
+    def write(self, path, line):
+        """Queue a single log line for ``path``"""
+        self._ensure_started().put((path, (line,)))
+
+    def write_many(self, path, lines):
+        """Queue several lines for ``path`` as one grouped record"""
+        lines = tuple(lines)
+        if lines:
+            self._ensure_started().put((path, lines))
+
+    def call(self, fn, *args):
+        """Run ``fn(*args)`` on the writer thread, after every line queued
+        before it; for secondary sinks that must stay off request threads"""
+        self._ensure_started().put(_Call(fn, args))
+
+    def flush(self, timeout=5.0):
+        """Block until every line queued so far has been written"""
+        if self._thread is None:
+            return True
+        if threading.current_thread() is self._thread:
+            # called from a queued call: the lines before it are already written
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def shutdown(self, timeout=5.0):
+        """Drain pending lines, stop the writer thread and close files"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+            self._queue = None
+
+    def pending(self):
+        """Number of records waiting in the queue"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self):
+        q = self._queue
+        if q is not None:
+            return q
+        with self._lock:
+            if self._queue is None:
+                self._queue = queue.Queue(self.max_queue)
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name="log-writer", daemon=True
+                )
+                self._thread.start()
+            return self._queue
+
+    def _reset_after_fork(self):
+        # The writer thread does not survive fork(); children start their own
+        self._lock = threading.Lock()
+        self._thread = None
+        self._queue = None
+        self._files = {}
+
+    # --------------------------------------------------------
+    # Consumer side (writer thread)
+    # --------------------------------------------------------
+
+    def _run(self, q):
+        stopping = False
+        while not stopping:
+            item = q.get()
+            batch = {}
+            waiters = []
+            calls = []
+            count = 0
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif isinstance(item, _Call):
+                    calls.append(item)
+                    count += 1
+                else:
+                    path, lines = item
+                    batch.setdefault(path, []).extend(lines)
+                    count += len(lines)
+                if stopping or waiters or count >= self.batch_size:
+                    # Drain whatever is already queued without waiting further
+                    try:
+                        item = q.get_nowait()
+                        continue
+                    except queue.Empty:
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            self._commit(batch)
+            self.commits += 1
+            for call in calls:
+                try:
+                    call.fn(*call.args)
+                except Exception as e:
+                    print(f"✗ Log writer call {getattr(call.fn, '__name__', call.fn)} failed: {e}", file=sys.stderr)
+            for waiter in waiters:
+                waiter.set()
+        self._close_files()
+
+    def _commit(self, batch):
+        """Write one group of lines per file and apply the fsync policy"""
+        if not batch:
+            return
+        touched = []
+        echo = []
+        for path, lines in batch.items():
+            data = "\n".join(lines) + "\n"
+            try:
+                handle = self._files.get(path)
+                if handle is None:
+                    handle = open(path, "a")
+                    self._files[path] = handle
+                handle.write(data)
+                handle.flush()
+                touched.append(handle)
+            except OSError as e:
+                print(f"✗ Log writer failed for {path}: {e}", file=sys.stderr)
+            if self.echo:
+                echo.append(data)
+
+        if self.fsync_policy == FSYNC_BATCH or (
+            self.fsync_policy == FSYNC_INTERVAL
+            and time.monotonic() - self._last_fsync >= self.fsync_interval
+        ):
+            for handle in touched:
+                try:
+                    os.fsync(handle.fileno())
+                except OSError:
+                    pass
+            self._last_fsync = time.monotonic()
+
+        if echo:
+            sys.stdout.write("".join(echo))
+            sys.stdout.flush()
+
+    def _close_files(self):
+        for handle in self._files.values():
+            try:
+                handle.flush()
+                if self.fsync_policy != FSYNC_NONE:
+                    os.fsync(handle.fileno())
+                handle.close()
+            except OSError:
+                pass
+        self._files = {}
@@ -0,0 +1,238 @@
+"""
+Despite Group Access Control System
+Process-Wide Metrics Registry - Counters, Gauges, Rolling Windows
+"""
+
+import threading
+import time
+
+# ============================================================
+# COUNTERS
+# ============================================================
+
+class ShardedCounter:
+    """Monotonic counter split over a fixed number of lock-striped cells.
+
+    A thread increments the cell picked by its thread id, so concurrent
+    increments rarely share a lock; reads sum every cell. The cell count is
+    fixed, so memory does not grow with the number of threads served.
+    """
+
+    SHARDS = 16
+
+    __slots__ = ("_cells", "_locks")
+
+    def __init__(self):
+        self._cells = [0] * self.SHARDS
+        self._locks = [threading.Lock() for _ in range(self.SHARDS)]
+
+    def inc(self, amount=1):
+        # thread ids are aligned addresses: mix the bits before picking a cell
+        index = (threading.get_ident() * 0x9E3779B97F4A7C15 >> 40) % self.SHARDS
+        with self._locks[index]:
+            self._cells[index] += amount
+
+    @property
+    def value(self):
+        return sum(self._cells)
+
+
+class Counter:
+    """Named counter family, optionally split by label values"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = ShardedCounter()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, ShardedCounter())
+        return child
+
+    def inc(self, amount=1):
+        self._children[()].inc(amount)
+
+    @property
+    def value(self):
+        return sum(child.value for child in list(self._children.values()))
+
+    def get(self, *values):
+        child = self._children.get(values)
+        return child.value if child is not None else 0
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield self.name, dict(zip(self.labelnames, values)), child.value
+
+
+# ============================================================
+# GAUGES
+# ============================================================
+
+class Gauge:
+    """Point-in-time value, either set directly or read from a callback"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, callback=None):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self._value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1, floor=None):
+        with self._lock:
+            self._value -= amount
+            if floor is not None and self._value < floor:
+                self._value = floor
+
+    @property
+    def value(self):
+        return self.callback() if self.callback is not None else self._value
+
+    def samples(self):
+        yield self.name, {}, self.value
+
+
+# ============================================================
+# ROLLING TIME WINDOWS
+# ============================================================
+
+class RollingWindow:
+    """Event counts over the last ``span`` seconds in per-second slots.
+
+    Memory is fixed at ``span`` slots; a slot is cleared lazily when its
+    second comes around again.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, span=300):
+        self.name = name
+        self.help = help_text
+        self.span = int(span)
+        self._seconds = [0] * self.span
+        self._counts = [0] * self.span
+        self._lock = threading.Lock()
+
+    def add(self, amount=1, now=None):
+        second = int(time.time() if now is None else now)
+        slot = second % self.span
+        with self._lock:
+            if self._seconds[slot] != second:
+                self._seconds[slot] = second
+                self._counts[slot] = 0
+            self._counts[slot] += amount
+
+    def total(self, seconds=None, now=None):
+        """Events in the last ``seconds`` (default: the whole span)"""
+        seconds = self.span if seconds is None else min(int(seconds), self.span)
+        current = int(time.time() if now is None else now)
+        oldest = current - seconds
+        with self._lock:
+            return sum(
+                count for second, count in zip(self._seconds, self._counts)
+                if oldest < second <= current
+            )
+
+    def rate(self, seconds=60, now=None):
+        """Average events per second over the last ``seconds``"""
+        seconds = min(int(seconds), self.span)
+        return self.total(seconds, now) / seconds if seconds else 0.0
+
+    def samples(self):
+        yield self.name, {"window": f"{self.span}s"}, self.total()
+
+
+# ============================================================
+# REGISTRY & PROMETHEUS EXPOSITION
+# ============================================================
+
+class MetricsRegistry:
+    """Holds every metric in the process and renders Prometheus text"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, callback=None):
+        return self._register(Gauge(name, help_text, callback))
+
+    def window(self, name, help_text, span=300):
+        return self._register(RollingWindow(name, help_text, span))
+
+    def register_collector(self, collector):
+        """``collector()`` returns ready-made exposition lines (e.g. histograms)"""
+        self._collectors.append(collector)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    @staticmethod
+    def _format(name, labels, value):
+        if labels:
+            rendered = ",".join(
+                '{}="{}"'.format(key, str(val).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                for key, val in labels.items()
+            )
+            return f"{name}{{{rendered}}} {value}"
+        return f"{name} {value}"
+
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(self._format(name, labels, value))
+        for collector in list(self._collectors):
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def histogram_lines(name, help_text, histograms, label="stage"):
+    """Prometheus lines for a dict of instrumentation.LatencyHistogram"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, histogram in histograms.items():
+        counts, total, count = histogram.raw()
+        cumulative = 0
+        for bound, bucket in zip(histogram.bounds + (float("inf"),), counts):
+            cumulative += bucket
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {total}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {count}')
+    return lines
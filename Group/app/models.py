@@ -3,11 +3,36 @@ Despite Group Access Control and DRM System
 Backend Models and Business Logic - Enhanced Security Features
 """
 
+import atexit
 import hashlib
-from datetime import datetime, timedelta
-import json
+import hmac
+import os
+import threading
+from datetime import datetime
 import random
 import string
+import time
+
+from app.audit_store import AuditLogStore
+from app.behavior import DEFAULT_BASELINE, BehaviorModel
+from app.compliance import ComplianceAggregator
+from app.content_crypto import ContentCipher
+from app.credentials import VerifierSaturated, credential_verifier
+from app.decision_cache import DecisionCache
+from app.device_registry import DeviceRegistry
+from app.expiry import TimerWheel
+from app.instrumentation import stage_timer
+from app.ip_reputation import ip_reputation
+from app.log_writer import LogWriter
+from app.metrics import histogram_lines, registry
+from app.policy import policy_store
+from app.principal import Principal, principal_cache, session_expiry
+from app.rate_limit import LIMITER_BACKENDS, create_limiter
+from app.risk_batch import population_risk
+from app.risk_history import RiskHistory
+from app.shared_state import get_state_store
+from app.user_repository import create_user_repository
+from app.watermark import Watermarker
 
 # ============================================================
 # DEVICE FINGERPRINTING & SECURITY VALIDATION
@@ -16,6 +41,13 @@ import string
 class DeviceFingerprint:
     """Advanced device fingerprinting for Zero Trust validation"""
     
+    # Known devices and their cached posture results (persisted when configured)
+    registry = DeviceRegistry()
+    # The posture probes below are simulated (random rolls), so by default
+    # only revocations override the directory's device_secure flag. Set
+    # DEVICE_POSTURE_AUTHORITATIVE once real endpoint checks back them.
+    posture_authoritative = False
+    
     @staticmethod
     def generate_fingerprint(user_agent, ip_address):
         """Generate device fingerprint hash"""
@@ -25,6 +57,9 @@ class DeviceFingerprint:
     @staticmethod
     def validate_device_integrity(fingerprint):
         """Validate device security compliance"""
+        # Revoked devices never pass; the registry's filter answers most "no"s
+        if DeviceFingerprint.registry.is_revoked(fingerprint):
+            return False
         # Check against known secure devices
         secure_devices = ["windows_secure", "mac_secure", "linux_secure"]
         return fingerprint in secure_devices or random.random() > 0.3
@@ -34,21 +69,71 @@ class DeviceFingerprint:
         """Check if device encryption is enabled"""
         return random.choice([True, True, True, False])  # 75% chance of encryption
     
+    @staticmethod
+    def locate(ip_address):
+        """Location risk (0-10) and label of an address from the IP range table"""
+        return ip_reputation.lookup(ip_address)
+    
+    @staticmethod
+    def location_risk(ip_address):
+        """Location risk factor (0-10) for an address"""
+        return ip_reputation.location_risk(ip_address)
+    
     @staticmethod
     def check_malware_status():
         """Check if device has known malware"""
         return random.random() > 0.95  # 95% clean, 5% potentially compromised
+    
+    @staticmethod
+    def assess_device(username, user_agent, ip_address):
+        """Register the user's device and return its posture.
+        
+        Posture checks only run when the registry has no result for the
+        fingerprint younger than its TTL. While fresh, and only when probes
+        are authoritative, the verdict overrides the user's directory flag
+        (see User.apply_device_posture).
+        """
+        fingerprint = DeviceFingerprint.generate_fingerprint(user_agent, ip_address)
+        posture, _ = DeviceFingerprint.registry.assess(
+            fingerprint, username, user_agent, ip_address,
+            lambda: (
+                DeviceFingerprint.validate_device_integrity(fingerprint),
+                DeviceFingerprint.check_encryption_status(),
+                DeviceFingerprint.check_malware_status()
+            )
+        )
+        User.device_posture_changed(username)
+        return posture
+    
+    @staticmethod
+    def revoke_device(fingerprint, reason="", reinstate=False):
+        """Revoke (or reinstate) a device fingerprint. A revoked device fails
+        integrity checks and its owner's posture turns insecure at once;
+        a reinstated one is re-assessed on its next registration. Returns
+        the device's posture, or None if it was never registered."""
+        registry = DeviceFingerprint.registry
+        if reinstate:
+            registry.reinstate(fingerprint)
+            posture = registry.get(fingerprint)
+        else:
+            posture = registry.revoke(fingerprint, reason)
+        if posture is not None:
+            User.device_posture_changed(posture.username)
+        return posture
 
 
 class RiskScoring:
     """Dynamic risk scoring based on multiple factors"""
     
-    def __init__(self):
-        self.risk_history = []
+    # Recent scores per user, for rolling mean / p95 / trend queries
+    history = RiskHistory()
     
     @staticmethod
-    def calculate_risk_score(user_data):
-        """Calculate comprehensive risk score (0-100)"""
+    def calculate_risk_score(user_data, location_risk=None):
+        """Calculate comprehensive risk score (0-100).
+        ``location_risk`` is DeviceFingerprint.location_risk of the request
+        address; without one the user's last recorded login location is used.
+        """
         score = 0
         
         # Factor 1: Failed login attempts (0-25)
@@ -70,7 +155,8 @@ class RiskScoring:
         escalation_risk = min(escalation_attempts * 10, 25)
         
         # Factor 5: Location anomaly (0-10)
-        location_risk = random.randint(0, 10)
+        if location_risk is None:
+            location_risk = user_data.get('location_risk', 0)
         
         total_score = attempt_risk + device_risk + time_risk + escalation_risk + location_risk
         return min(total_score, 100)
@@ -95,49 +181,118 @@ class RiskScoring:
 class MFA:
     """Multi-Factor Authentication system"""
     
-    active_challenges = {}
+    # A user's open challenge, attempt count and recent sends live in the
+    # shared state store under "mfa:<user>"; the timer wheel evicts each
+    # challenge when it expires, and caps how many this process keeps open.
+    # Only the newest challenge is valid and each send resets the attempts,
+    # so sends per user are capped to bound the guesses per TTL window.
+    CHALLENGE_TTL = 300  # 5 minutes
+    MAX_ATTEMPTS = 3
+    MAX_CHALLENGES_PER_USER = 3  # sends per user within CHALLENGE_TTL
+    MAX_ACTIVE_CHALLENGES = 10000  # per process
+    
+    expiry = TimerWheel(
+        on_expire=lambda key: MFA._expire_challenge(*key), tick=1.0, slots=512, name="mfa-expiry"
+    )
+    
+    @staticmethod
+    def configure(ttl=None, max_per_user=None, max_active=None):
+        if ttl is not None:
+            MFA.CHALLENGE_TTL = int(ttl)
+        if max_per_user is not None:
+            MFA.MAX_CHALLENGES_PER_USER = int(max_per_user)
+        if max_active is not None:
+            MFA.MAX_ACTIVE_CHALLENGES = int(max_active)
     
     @staticmethod
     def generate_challenge():
         """Generate MFA challenge token"""
         return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
     
+    @staticmethod
+    def _live(challenges, now):
+        return [c for c in challenges if now - c['timestamp'] <= MFA.CHALLENGE_TTL]
+    
     @staticmethod
     def send_challenge(user, challenge_type="EMAIL"):
-        """Send MFA challenge to user"""
+        """Send MFA challenge to user, replacing any open one; None if too
+        many challenges are open or the user has sent too many recently"""
+        if len(MFA.expiry) >= MFA.MAX_ACTIVE_CHALLENGES:
+            AlertSystem.send_alert(user, "MFA challenge refused - too many open challenges", "MEDIUM")
+            return None
+        
         challenge_token = MFA.generate_challenge()
-        MFA.active_challenges[user] = {
+        challenge = {
+            "id": os.urandom(6).hex(),
             "token": challenge_token,
-            "timestamp": datetime.now(),
-            "type": challenge_type,
-            "attempts": 0
+            "timestamp": time.time(),
+            "type": challenge_type
         }
+        
+        def add(record):
+            record = record or {"attempts": 0, "challenges": []}
+            now = challenge['timestamp']
+            sent = [t for t in record.get('sent', []) if now - t <= MFA.CHALLENGE_TTL]
+            if len(sent) >= MFA.MAX_CHALLENGES_PER_USER:
+                return record, None
+            replaced = [c['id'] for c in record['challenges']]
+            record['challenges'] = [challenge]
+            record['attempts'] = 0
+            record['sent'] = sent + [now]
+            return record, replaced
+        
+        replaced = get_state_store().update(f"mfa:{user}", add, ttl=MFA.CHALLENGE_TTL)
+        if replaced is None:
+            AlertSystem.send_alert(user, "MFA challenge refused - too many challenges sent", "MEDIUM")
+            return None
+        for challenge_id in replaced:
+            MFA.expiry.cancel((user, challenge_id))
+        MFA.expiry.schedule((user, challenge['id']), MFA.CHALLENGE_TTL)
         Log.audit_trail(user, "MFA_CHALLENGE_SENT", challenge_type, "INITIATED")
         return challenge_token
     
     @staticmethod
-    def verify_challenge(user, provided_token):
-        """Verify MFA challenge response"""
-        if user not in MFA.active_challenges:
-            return False
+    def _expire_challenge(user, challenge_id):
+        """Timer wheel callback: drop one expired challenge"""
+        def drop(record):
+            if record is None:
+                return None, None
+            record['challenges'] = [c for c in record['challenges'] if c['id'] != challenge_id]
+            return (record if record['challenges'] or record.get('sent') else None), None
         
-        challenge = MFA.active_challenges[user]
+        get_state_store().update(f"mfa:{user}", drop, ttl=MFA.CHALLENGE_TTL)
+    
+    @staticmethod
+    def verify_challenge(user, provided_token):
+        """Verify MFA challenge response against the user's newest challenge"""
+        def attempt(record):
+            if record is None or not record['challenges']:
+                return record, ("missing", [])
+            ids = [c['id'] for c in record['challenges']]
+            # Drop challenges older than 5 minutes; the send history stays
+            # so expiring or locking a challenge does not lift the send cap
+            live = MFA._live(record['challenges'], time.time())
+            if not live:
+                record['challenges'] = []
+                return record, ("expired", ids)
+            # Check max attempts (3) against the current challenge
+            if record['attempts'] >= MFA.MAX_ATTEMPTS:
+                record['challenges'] = []
+                return record, ("locked", ids)
+            record['attempts'] += 1
+            # bytes: compare_digest rejects non-ASCII str, which must count as a miss
+            if hmac.compare_digest(live[-1]['token'].encode(), str(provided_token).encode()):
+                return None, ("verified", ids)
+            record['challenges'] = live[-1:]
+            return record, ("mismatch", [])
         
-        # Check if challenge has expired (5 minutes)
-        if datetime.now() - challenge['timestamp'] > timedelta(minutes=5):
-            del MFA.active_challenges[user]
-            return False
+        outcome, closed = get_state_store().update(f"mfa:{user}", attempt, ttl=MFA.CHALLENGE_TTL)
+        for challenge_id in closed:
+            MFA.expiry.cancel((user, challenge_id))
         
-        # Check max attempts (3)
-        if challenge['attempts'] >= 3:
-            del MFA.active_challenges[user]
+        if outcome == "locked":
             AlertSystem.send_alert(user, "MFA verification failed - max attempts exceeded", "HIGH")
-            return False
-        
-        challenge['attempts'] += 1
-        
-        if challenge['token'] == provided_token:
-            del MFA.active_challenges[user]
+        elif outcome == "verified":
             Log.audit_trail(user, "MFA_VERIFIED", "SUCCESS", "PASSED")
             return True
         
@@ -151,45 +306,37 @@ class MFA:
 class BehaviorAnalysis:
     """Behavioral analysis for anomaly detection"""
     
-    user_profiles = {}
+    # Per-user baselines learned online from access requests (see app/behavior.py)
+    model = BehaviorModel()
+    
+    @staticmethod
+    def _activity(activity):
+        return (
+            activity.get('hour', datetime.now().hour),
+            activity.get('action'),
+            activity.get('resource')
+        )
     
     @staticmethod
     def establish_baseline(user):
-        """Establish normal behavior baseline"""
-        BehaviorAnalysis.user_profiles[user] = {
-            "typical_login_times": [9, 10, 14, 15],  # Business hours
-            "typical_resources": ["DOCUMENT", "REPORT", "DATABASE"],
-            "typical_actions": ["VIEW", "EDIT", "APPROVE"],
-            "typical_locations": ["Office", "VPN"],
-            "logins_per_day": 2,
-            "failed_logins_per_month": 0
-        }
+        """Reset a user to the default baseline until new history is learned"""
+        BehaviorAnalysis.model.reset(user)
+        return dict(DEFAULT_BASELINE)
+    
+    @staticmethod
+    def record_activity(user, activity):
+        """Learn from one request (hour, action, resource)"""
+        BehaviorAnalysis.model.observe(user, *BehaviorAnalysis._activity(activity))
+    
+    @staticmethod
+    def get_profile(user):
+        """Learned baseline summary, or None before the first request"""
+        return BehaviorAnalysis.model.profile(user)
     
     @staticmethod
     def detect_anomalies(user, activity):
         """Detect behavioral anomalies"""
-        if user not in BehaviorAnalysis.user_profiles:
-            BehaviorAnalysis.establish_baseline(user)
-        
-        profile = BehaviorAnalysis.user_profiles[user]
-        anomalies = []
-        
-        # Check time anomaly
-        current_hour = activity.get('hour', datetime.now().hour)
-        if current_hour not in profile['typical_login_times']:
-            anomalies.append("Off-hours activity")
-        
-        # Check action anomaly
-        action = activity.get('action')
-        if action not in profile['typical_actions']:
-            anomalies.append(f"Unusual action: {action}")
-        
-        # Check resource anomaly
-        resource = activity.get('resource')
-        if resource not in profile['typical_resources']:
-            anomalies.append(f"New resource access: {resource}")
-        
-        return anomalies
+        return BehaviorAnalysis.model.check(user, *BehaviorAnalysis._activity(activity))
 
 
 # ============================================================
@@ -209,6 +356,16 @@ class ComplianceEngine:
         "audit_log_retention": 365  # days
     }
     
+    # Directory-wide violation counters, updated per user change
+    state = ComplianceAggregator(
+        check=lambda record: ComplianceEngine.check_compliance(record),
+        rules=compliance_rules,
+        loader=lambda username: User.get_record(username),
+        users=lambda: User.repository.iter_users(),
+        count=lambda: User.repository.count(),
+        write=lambda path, line: Log.writer.write(path, line)
+    )
+    
     @staticmethod
     def check_compliance(user_data):
         """Check user compliance with policies"""
@@ -220,6 +377,11 @@ class ComplianceEngine:
         
         # Check session timeout
         last_activity = user_data.get('last_activity')
+        if isinstance(last_activity, str):  # ISO text from JSON-backed directories
+            try:
+                last_activity = datetime.fromisoformat(last_activity)
+            except ValueError:
+                last_activity = None
         if last_activity:
             inactive_time = (datetime.now() - last_activity).total_seconds() / 60
             if inactive_time > ComplianceEngine.compliance_rules['session_timeout']:
@@ -235,22 +397,17 @@ class ComplianceEngine:
         
         return violations
     
+    @staticmethod
+    def update_rules(**rules):
+        """Change compliance policies; cached access decisions are dropped"""
+        ComplianceEngine.compliance_rules.update(rules)
+        AccessController.decision_cache.invalidate_all()
+        ComplianceEngine.state.invalidate()
+    
     @staticmethod
     def generate_compliance_report():
-        """Generate compliance report"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        report = {
-            "timestamp": timestamp,
-            "compliance_policies": ComplianceEngine.compliance_rules,
-            "violations_detected": 0,
-            "compliant_users": 4,
-            "status": "PASSED"
-        }
-        
-        with open("app/logs/compliance_report.log", "a") as f:
-            f.write(json.dumps(report) + "\n")
-        
-        return report
+        """Current compliance report (cached; written to compliance_report.log on a schedule)"""
+        return ComplianceEngine.state.report()
 
 
 # ============================================================
@@ -260,6 +417,9 @@ class ComplianceEngine:
 class EncryptionEngine:
     """Advanced encryption and data protection"""
     
+    # Streaming chunked encryption of content files (see app/content_crypto.py)
+    content = ContentCipher()
+    
     @staticmethod
     def encrypt_sensitive_data(data, key="security_key"):
         """Encrypt sensitive data (simplified for demo)"""
@@ -275,11 +435,26 @@ class EncryptionEngine:
             return "decrypted_data"
         return None
     
+    @staticmethod
+    def encrypt_file(source_path, output_path, workers=None):
+        """Encrypt a content file of any size in fixed-size authenticated
+        chunks; ``workers`` > 1 spreads chunks over a process pool"""
+        return EncryptionEngine.content.encrypt_file(source_path, output_path, workers)
+    
+    @staticmethod
+    def decrypt_file(encrypted_path, output_path, workers=None):
+        """Decrypt a file from encrypt_file; raises ValueError if it was tampered with"""
+        return EncryptionEngine.content.decrypt_file(encrypted_path, output_path, workers)
+    
     @staticmethod
     def hash_password(password):
-        """Securely hash password with salt"""
-        salt = "DESPITE_GROUP_SALT_2024"
-        return hashlib.sha256((password + salt).encode()).hexdigest()
+        """Hash a password with scrypt and a random salt (runs in the verifier pool)"""
+        return credential_verifier.hash(password)
+    
+    @staticmethod
+    def verify_password(password, stored_hash):
+        """Check a password against a stored hash (runs in the verifier pool)"""
+        return credential_verifier.verify(password, stored_hash)
 
 
 # ============================================================
@@ -289,29 +464,105 @@ class EncryptionEngine:
 class RateLimiter:
     """API rate limiting and DDoS protection"""
     
-    request_history = {}
+    backend = "sliding_window"  # sliding_window | token_bucket
+    engines = {}
+    
+    @staticmethod
+    def configure(backend=None):
+        """Switch limiter backend or re-bind to the current state store"""
+        backend = backend or RateLimiter.backend
+        if backend not in LIMITER_BACKENDS:
+            raise ValueError(f"Unknown rate limit backend: {backend}")
+        RateLimiter.backend = backend
+        RateLimiter.engines = {}
+    
+    @staticmethod
+    def get_engine(limit=100, time_window=3600):
+        """Get the shared engine for a (limit, window) policy"""
+        engine = RateLimiter.engines.get((limit, time_window))
+        if engine is None:
+            engine = RateLimiter.engines.setdefault(
+                (limit, time_window),
+                create_limiter(RateLimiter.backend, limit, time_window, store=get_state_store())
+            )
+        return engine
     
     @staticmethod
-    def check_rate_limit(user, limit=100, time_window=3600):
+    def check_rate_limit(user, limit=100, time_window=3600, cost=1):
         """Check if user has exceeded rate limit"""
-        if user not in RateLimiter.request_history:
-            RateLimiter.request_history[user] = []
-        
-        now = datetime.now()
-        # Remove old requests outside time window
-        RateLimiter.request_history[user] = [
-            req_time for req_time in RateLimiter.request_history[user]
-            if (now - req_time).total_seconds() < time_window
-        ]
-        
-        # Check if limit exceeded
-        if len(RateLimiter.request_history[user]) >= limit:
+        if not RateLimiter.get_engine(limit, time_window).hit(user, cost):
             AlertSystem.send_alert(user, f"Rate limit exceeded", "HIGH")
             return False
-        
-        # Record request
-        RateLimiter.request_history[user].append(now)
         return True
+    
+    @staticmethod
+    def get_status(user, limit=100, time_window=3600):
+        """Get current rate limit usage for user"""
+        return RateLimiter.get_engine(limit, time_window).status(user)
+
+
+# ============================================================
+# SECURITY METRICS
+# ============================================================
+
+class AccessMetrics:
+    """Process-wide security metrics fed by the access decision path"""
+    
+    RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+    
+    decisions = registry.counter(
+        "access_decisions_total", "Access decisions by status and reason", ("status", "reason")
+    )
+    recent_decisions = registry.window(
+        "access_decisions_recent", "Access decisions in the last 5 minutes", span=300
+    )
+    risk_levels = registry.counter(
+        "access_risk_level_total", "Evaluated access decisions by risk level", ("level",)
+    )
+    recent_risk = {
+        level: registry.window(
+            f"access_risk_{level.lower()}_recent", f"{level} risk decisions in the last hour", span=3600
+        )
+        for level in RISK_LEVELS
+    }
+    anomalous_requests = registry.counter(
+        "access_anomalous_requests_total", "Access requests with at least one behavioral anomaly"
+    )
+    threats = registry.counter("security_threats_total", "Threats logged, by type", ("type",))
+    recent_threats = registry.window("security_threats_recent", "Threats logged in the last hour", span=3600)
+    alerts = registry.counter("security_alerts_total", "Administrator alerts, by severity", ("severity",))
+    elevated_requests = registry.counter(
+        "elevated_access_requests_total", "Elevated access requests awaiting approval"
+    )
+    active_sessions = registry.gauge(
+        "active_sessions", "Sessions active in this process within SESSION_TIMEOUT",
+        callback=lambda: len(session_expiry)
+    )
+    last_threat_at = None
+    
+    @staticmethod
+    def record_decision(result):
+        """Count one access decision (a request_access result dict)"""
+        AccessMetrics.decisions.labels(result["status"], result.get("reason", "")).inc()
+        AccessMetrics.recent_decisions.add()
+        level = result.get("risk_level")
+        if level in AccessMetrics.recent_risk:
+            AccessMetrics.risk_levels.labels(level).inc()
+            AccessMetrics.recent_risk[level].add()
+        if result.get("anomalies"):
+            AccessMetrics.anomalous_requests.inc()
+    
+    @staticmethod
+    def record_threat(threat_type):
+        AccessMetrics.threats.labels(threat_type).inc()
+        AccessMetrics.recent_threats.add()
+        AccessMetrics.last_threat_at = datetime.now().isoformat()
+    
+    @staticmethod
+    def decisions_with_status(status):
+        return sum(
+            value for _, labels, value in AccessMetrics.decisions.samples() if labels["status"] == status
+        )
 
 
 # ============================================================
@@ -321,41 +572,96 @@ class RateLimiter:
 class Log:
     """Centralized logging for security events and access control"""
     
+    # Shared background writer; request threads only enqueue lines
+    writer = LogWriter()
+    
+    # Indexed audit store, opened on first use (see app/audit_store.py)
+    audit_store = None
+    _audit_store_lock = threading.Lock()
+    _audit_import_commit = None  # writer commit whose lines the initial import already holds
+    
+    @staticmethod
+    def get_audit_store():
+        """Get the indexed audit store, importing audit_trail.log on first open"""
+        if Log.audit_store is None:
+            with Log._audit_store_lock:
+                if Log.audit_store is None:
+                    # One store shared by every worker process (see AuditLogStore)
+                    store = AuditLogStore("app/logs/audit")
+                    if len(store) == 0 and os.path.exists("app/logs/audit_trail.log"):
+                        Log.writer.flush()
+                        if store.import_log("app/logs/audit_trail.log", if_empty=True):
+                            Log._audit_import_commit = Log.writer.commits
+                    # exit hooks run last-registered first: drain queued entries before the store closes
+                    atexit.register(Log.writer.flush)
+                    Log.audit_store = store
+        return Log.audit_store
+    
     @staticmethod
     def security_event(user, message):
         """Log security alerts"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[SECURITY ALERT] {timestamp} - {user}: {message}"
-        print(log_entry)
-        with open("app/logs/security_events.log", "a") as log_file:
-            log_file.write(log_entry + "\n")
+        Log.writer.write("app/logs/security_events.log", log_entry)
 
     @staticmethod
     def access_grant(user, resource):
         """Log successful access grants"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[ACCESS GRANTED] {timestamp} - {user} accessed {resource}"
-        print(log_entry)
-        with open("app/logs/access_logs.log", "a") as log_file:
-            log_file.write(log_entry + "\n")
+        Log.writer.write("app/logs/access_logs.log", log_entry)
 
     @staticmethod
     def audit_trail(user, action, resource, status):
         """Audit trail for compliance and monitoring"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         audit_entry = f"[AUDIT] {timestamp} - User: {user} | Action: {action} | Resource: {resource} | Status: {status}"
-        print(audit_entry)
-        with open("app/logs/audit_trail.log", "a") as log_file:
-            log_file.write(audit_entry + "\n")
+        Log.writer.write("app/logs/audit_trail.log", audit_entry)
+        Log.writer.call(Log._index_audit, user, ((action, resource, status),), time.time())
+    
+    @staticmethod
+    def audit_trail_batch(user, entries):
+        """Audit many (action, resource, status) entries as one grouped write"""
+        if not entries:
+            return
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        Log.writer.write_many("app/logs/audit_trail.log", [
+            f"[AUDIT] {timestamp} - User: {user} | Action: {action} | Resource: {resource} | Status: {status}"
+            for action, resource, status in entries
+        ])
+        Log.writer.call(Log._index_audit, user, tuple(entries), time.time())
+    
+    @staticmethod
+    def _index_audit(user, entries, timestamp):
+        """Writer-thread sink: add audit entries to the indexed store"""
+        store = Log.get_audit_store()
+        if Log._audit_import_commit == Log.writer.commits:
+            return  # imported from audit_trail.log along with this commit's lines
+        store.append_many(user, entries, timestamp)
+    
+    @staticmethod
+    def access_grant_batch(user, resources):
+        """Log many access grants as one grouped write"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        Log.writer.write_many("app/logs/access_logs.log", [
+            f"[ACCESS GRANTED] {timestamp} - {user} accessed {resource}" for resource in resources
+        ])
+    
+    @staticmethod
+    def security_event_batch(user, messages):
+        """Log many security alerts as one grouped write"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        Log.writer.write_many("app/logs/security_events.log", [
+            f"[SECURITY ALERT] {timestamp} - {user}: {message}" for message in messages
+        ])
     
     @staticmethod
     def threat_detected(user, threat_type, details):
         """Log detected threats"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         threat_entry = f"[THREAT] {timestamp} - User: {user} | Type: {threat_type} | Details: {details}"
-        print(threat_entry)
-        with open("app/logs/threat_log.log", "a") as threat_file:
-            threat_file.write(threat_entry + "\n")
+        Log.writer.write("app/logs/threat_log.log", threat_entry)
+        AccessMetrics.record_threat(threat_type)
 
 
 # ============================================================
@@ -370,9 +676,8 @@ class AlertSystem:
         """Send alert to administrator"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         alert_msg = f"ALERT [{severity}] {timestamp} - User: {user} | Message: {message}"
-        print(alert_msg)
-        with open("app/logs/admin_alerts.log", "a") as alert_file:
-            alert_file.write(alert_msg + "\n")
+        Log.writer.write("app/logs/admin_alerts.log", alert_msg)
+        AccessMetrics.alerts.labels(severity).inc()
 
     @staticmethod
     def notify_failed_login(user):
@@ -405,15 +710,36 @@ class AlertSystem:
 class DRM:
     """Digital Rights Management for protecting content"""
     
+    # Per-user watermarked copies of the files in CONTENT_DIR (see app/watermark.py)
+    watermarker = Watermarker()
+    
     @staticmethod
-    def apply_watermark(file_name):
-        """Apply digital watermark to content"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        watermark_info = f"DRM watermark applied to {file_name} at {timestamp}"
-        print(watermark_info)
-        with open("app/logs/drm_operations.log", "a") as drm_file:
-            drm_file.write(watermark_info + "\n")
-        return True
+    def apply_watermark(file_name, username=None):
+        """Apply digital watermark to content.
+        
+        When ``file_name`` exists in the content directory, ``username``
+        gets their own copy of it carrying a signed per-user, per-time mark;
+        returns that mark's details, or None for resources with no file.
+        Full copies (a user's first mark, or after the source changed) run
+        on the watermarker's workers, so access requests never wait on them.
+        """
+        now = datetime.now()
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        mark = None
+        if username is not None:
+            mark = DRM.watermarker.apply(file_name, username, now.timestamp(), wait=False)
+        if mark is not None:
+            watermark_info = (f"DRM watermark {mark['watermark_id']} applied to {file_name} for {username} "
+                              f"at {timestamp} ({mark['method']}, {mark['seconds'] * 1000:.2f} ms)")
+        else:
+            watermark_info = f"DRM watermark applied to {file_name} at {timestamp}"
+        Log.writer.write("app/logs/drm_operations.log", watermark_info)
+        return mark
+    
+    @staticmethod
+    def extract_watermark(path):
+        """Who a watermarked copy was issued to, and when (None if unmarked or forged)"""
+        return DRM.watermarker.extract(path)
 
     @staticmethod
     def verify_content_integrity(file_name, checksum):
@@ -423,13 +749,7 @@ class DRM:
     @staticmethod
     def enforce_license_restrictions(user_role):
         """Enforce content licensing based on user role"""
-        license_rules = {
-            "Admin": ["VIEW", "EDIT", "PUBLISH", "DISTRIBUTE"],
-            "Creator": ["VIEW", "EDIT", "PUBLISH"],
-            "PR_Manager": ["VIEW", "APPROVE", "PUBLISH"],
-            "Analyst": ["VIEW"]
-        }
-        return license_rules.get(user_role, [])
+        return list(policy_store.table.drm_rights(user_role))
 
 
 # ============================================================
@@ -439,13 +759,8 @@ class DRM:
 class User:
     """User model with authentication and role-based access"""
     
-    # In-memory database for demonstration
-    users_db = {
-        "alice": {"password": "securePass123", "role": "Creator", "device_secure": True},
-        "bob": {"password": "adminPass456", "role": "Admin", "device_secure": True},
-        "charlie": {"password": "analyst789", "role": "Analyst", "device_secure": False},
-        "diana": {"password": "pr_manager123", "role": "PR_Manager", "device_secure": True},
-    }
+    # User directory (see app/user_repository.py); swapped by configure_repository
+    repository = create_user_repository("memory")
     
     def __init__(self, username, role, device_secure=True):
         self.username = username
@@ -456,21 +771,113 @@ class User:
         self.last_login = None
 
     @staticmethod
-    def authenticate(username, password):
-        """Authenticate user with password"""
-        if username not in User.users_db:
+    def configure_repository(backend="memory", **options):
+        """Switch the user directory backend, e.g. ``("sqlite", path=...)``"""
+        previous = User.repository
+        User.repository = create_user_repository(backend, **options)
+        previous.close()
+        AccessController.decision_cache.invalidate_all()
+        principal_cache.invalidate_all()
+        population_risk.invalidate()
+        ComplianceEngine.state.invalidate()
+        return User.repository
+    
+    @staticmethod
+    def record_location(username, ip_address):
+        """Remember the location risk of the user's latest login (used for
+        scoring without a request address and by the population scorer)"""
+        risk = DeviceFingerprint.location_risk(ip_address)
+        record = User.get_record(username)
+        if record is not None and record.get('location_risk') != risk:
+            User.update_user(username, location_risk=risk)
+        return risk
+    
+    @staticmethod
+    def get_record(username):
+        """Directory record for ``username`` (a copy) or None"""
+        if username is None:
             return None
+        return User.repository.get(username)
+    
+    @staticmethod
+    def authenticate(username, password):
+        """Authenticate user with password.
         
-        user_data = User.users_db[username]
-        if user_data["password"] != password:
+        The scrypt check runs in the credential verifier pool and raises
+        VerifierSaturated when too many logins are already queued.
+        """
+        if not isinstance(password, str):
+            return None
+        user_data = User.get_record(username)
+        stored = user_data["password"] if user_data is not None else None
+        if not credential_verifier.verify(password, stored):
             return None
         
-        user = User(username, user_data["role"], user_data["device_secure"])
+        # Upgrade plaintext or old-work-factor records; retried on a later login if busy
+        if credential_verifier.needs_rehash(stored):
+            try:
+                User.repository.update(username, password=credential_verifier.hash(password))
+            except VerifierSaturated:
+                pass
+        
+        user = User(username, user_data["role"], User.apply_device_posture(username, user_data))
         user.authenticated = True
         user.last_login = datetime.now()
         Log.audit_trail(username, "LOGIN", "SYSTEM", "SUCCESS")
         return user
 
+    @staticmethod
+    def update_user(username, **changes):
+        """Update a user record (role, device_secure, ...) and drop cached decisions"""
+        record = User.repository.update(username, **changes)
+        if record is not None:
+            AccessController.decision_cache.invalidate_user(username)
+            principal_cache.invalidate_user(username)
+            ComplianceEngine.state.user_changed(username, record)
+        return record
+    
+    @staticmethod
+    def apply_device_posture(username, user_data=None):
+        """The user's effective device posture, also set on ``user_data`` (a
+        record copy). A revoked latest device is insecure; with authoritative
+        probes, a latest device assessed within the registry TTL decides;
+        otherwise the directory flag stands. The directory record itself is
+        never rewritten."""
+        user_data = user_data if user_data is not None else User.get_record(username)
+        if user_data is None:
+            return False
+        registry = DeviceFingerprint.registry
+        posture = registry.latest_for_user(username)
+        if posture is not None:
+            if registry.is_revoked(posture.fingerprint):
+                user_data["device_secure"] = False
+            elif DeviceFingerprint.posture_authoritative and registry.is_fresh(posture):
+                user_data["device_secure"] = posture.secure
+        return user_data["device_secure"]
+    
+    @staticmethod
+    def get_access_record(username):
+        """Directory record with the effective device posture applied, for access checks"""
+        user_data = User.get_record(username)
+        if user_data is not None:
+            User.apply_device_posture(username, user_data)
+        return user_data
+    
+    @staticmethod
+    def device_posture_changed(username):
+        """Drop the user's cached principals and decisions after a device (re)assessment"""
+        AccessController.decision_cache.invalidate_user(username)
+        principal_cache.invalidate_user(username)
+    
+    @staticmethod
+    def load_principal(session_id, username):
+        """Resolve a session's Principal from the directory (None if the user is gone)"""
+        user_data = User.get_record(username)
+        if user_data is None:
+            return None
+        User.apply_device_posture(username, user_data)
+        return Principal.from_record(session_id, username, user_data)
+
     def is_authenticated(self):
         """Check if user is authenticated"""
         return self.authenticated
@@ -481,13 +888,11 @@ class User:
 
     def get_permissions(self):
         """Get permissions based on user role"""
-        role_permissions = {
-            "Admin": ["CREATE", "APPROVE", "PUBLISH", "MONITOR", "DELETE", "CONFIGURE"],
-            "Creator": ["CREATE", "PUBLISH"],
-            "PR_Manager": ["APPROVE", "MONITOR", "CREATE"],
-            "Analyst": ["MONITOR", "VIEW"]
-        }
-        return role_permissions.get(self.role, [])
+        return list(policy_store.table.permissions(self.role))
+
+    def has_permission(self, action):
+        """Check one action against the compiled policy table"""
+        return policy_store.table.is_permitted(self.role, action)
 
     def get_drm_permissions(self):
         """Get DRM-related permissions"""
@@ -501,13 +906,26 @@ class User:
 class AccessController:
     """Access Control Module implementing Zero Trust Architecture"""
     
+    # Shared by every controller instance in the process
+    decision_cache = DecisionCache()
+    
+    # Batch evaluations are rate limited per item, separately from single requests
+    BATCH_ITEM_LIMIT = 100000  # items per hour
+    
     def __init__(self):
         self.access_logs = []
-        self.denied_attempts = 0
         self.risk_scorer = RiskScoring()
         self.behavior_analyzer = BehaviorAnalysis()
 
-    def request_access(self, user, resource, action, context=None):
+    @property
+    def denied_attempts(self):
+        """Denied decisions across every worker sharing the state store"""
+        return get_state_store().get("access:denied_attempts", 0)
+
+    def _record_denial(self, count=1):
+        get_state_store().incr("access:denied_attempts", count)
+
+    def request_access(self, user, resource, action, context=None, ip_address=None):
         """
         Advanced Zero Trust access request processing with:
         - Identity verification
@@ -516,17 +934,28 @@ class AccessController:
         - Behavioral analysis
         - Compliance validation
         - Context-aware decisions
+        ``ip_address`` (the client address) feeds the location risk factor.
+        Stage latencies are recorded by app.instrumentation.stage_timer.
         """
-        
-        if not isinstance(user, User):
+        stage_timer.begin()
+        try:
+            result = self._request_access(user, resource, action, context, ip_address)
+        finally:
+            stage_timer.finish()
+        AccessMetrics.record_decision(result)
+        return result
+
+    def _request_access(self, user, resource, action, context, ip_address=None):
+        if not isinstance(user, (User, Principal)):
             return {"status": "DENIED", "message": "Invalid user object", "reason": "invalid_user"}
         
         # Step 1: Verify authentication (Identity)
         if not user.is_authenticated():
             AlertSystem.notify_failed_login(user.username)
             Log.audit_trail(user.username, action, resource, "DENIED - Not Authenticated")
-            self.denied_attempts += 1
+            self._record_denial()
             return {"status": "DENIED", "message": "User not logged in", "reason": "not_authenticated"}
+        stage_timer.mark("identity")
 
         # Step 2: Verify device security (Device)
         if not user.device_is_secure():
@@ -534,17 +963,76 @@ class AccessController:
             Log.audit_trail(user.username, action, resource, "DENIED - Device Security Issue")
             Log.threat_detected(user.username, "INSECURE_DEVICE", f"Device security check failed for {resource}")
             return {"status": "DENIED", "message": "Device does not meet security standards", "reason": "device_insecure"}
+        stage_timer.mark("device")
 
         # Step 3: Rate limiting check (DDoS Protection)
         if not RateLimiter.check_rate_limit(user.username):
             return {"status": "DENIED", "message": "Rate limit exceeded", "reason": "rate_limit_exceeded"}
+        stage_timer.mark("rate_limit")
+
+        # Steps 4-7: evaluate, or reuse a cached decision for the same
+        # (user, role, resource, action, location risk). Caller-supplied contexts bypass the cache.
+        location_risk = DeviceFingerprint.location_risk(ip_address) if ip_address else None
+        cache_key = (user.username, user.role, resource, action, location_risk) if context is None else None
+        decision = AccessController.decision_cache.get(cache_key) if cache_key else None
+        stage_timer.mark("cache_lookup")
+        if decision is None:
+            generation = AccessController.decision_cache.generation()
+            decision = self._evaluate(user, resource, action, context, location_risk)
+            if cache_key:
+                AccessController.decision_cache.put(cache_key, decision, generation)
+        
+        RiskScoring.history.record(user.username, decision["risk_score"])
+        # Learn from every evaluated request, after it was checked against the baseline
+        BehaviorAnalysis.record_activity(user.username, context or {'action': action, 'resource': resource})
+        
+        return self._enforce(user, resource, action, decision)
 
+    def _evaluate(self, user, resource, action, context=None, location_risk=None):
+        """Steps 4-7 of the pipeline; side-effect free so results can be cached"""
         # Step 4: Risk scoring analysis
-        user_data = User.users_db.get(user.username, {})
-        risk_score = RiskScoring.calculate_risk_score(user_data)
-        risk_level = RiskScoring.get_risk_level(risk_score)
+        user_data = User.get_access_record(user.username) or {}
+        risk_score = RiskScoring.calculate_risk_score(user_data, location_risk)
+        decision = {
+            "outcome": "granted",
+            "risk_score": risk_score,
+            "risk_level": RiskScoring.get_risk_level(risk_score),
+            "anomalies": [],
+            "violations": []
+        }
+        stage_timer.mark("risk")
         
         if risk_score > 80:  # CRITICAL risk
+            decision["outcome"] = "high_risk_score"
+            return decision
+
+        # Step 5: Behavioral analysis
+        activity_context = context or {
+            'hour': datetime.now().hour,
+            'action': action,
+            'resource': resource
+        }
+        decision["anomalies"] = BehaviorAnalysis.detect_anomalies(user.username, activity_context)
+        stage_timer.mark("behavior")
+
+        # Step 6: Verify permissions (Authorization)
+        permitted = policy_store.table.is_permitted(user.role, action)
+        stage_timer.mark("permission")
+        if not permitted:
+            decision["outcome"] = "insufficient_permissions"
+            return decision
+
+        # Step 7: Compliance check
+        decision["violations"] = ComplianceEngine.check_compliance(user_data)
+        stage_timer.mark("compliance")
+        return decision
+
+    def _enforce(self, user, resource, action, decision):
+        """Alerts, audit logging, DRM and the response for a decision; runs on every request"""
+        risk_score = decision["risk_score"]
+        risk_level = decision["risk_level"]
+        
+        if decision["outcome"] == "high_risk_score":
             AlertSystem.send_alert(user.username, f"CRITICAL risk score: {risk_score}", "CRITICAL")
             Log.threat_detected(user.username, "HIGH_RISK_SCORE", f"Risk score: {risk_score}")
             return {
@@ -554,39 +1042,38 @@ class AccessController:
                 "risk_level": risk_level
             }
 
-        # Step 5: Behavioral analysis
-        activity_context = context or {
-            'hour': datetime.now().hour,
-            'action': action,
-            'resource': resource
-        }
-        anomalies = BehaviorAnalysis.detect_anomalies(user.username, activity_context)
-        
+        anomalies = decision["anomalies"]
         if len(anomalies) > 2:  # Multiple anomalies detected
             Log.threat_detected(user.username, "ANOMALOUS_BEHAVIOR", ", ".join(anomalies))
             AlertSystem.send_alert(user.username, f"Anomalous behavior detected: {', '.join(anomalies)}", "HIGH")
 
-        # Step 6: Verify permissions (Authorization)
-        if action not in user.get_permissions():
+        if decision["outcome"] == "insufficient_permissions":
             AlertSystem.notify_unauthorized_access(user.username, resource, action)
             Log.security_event(user.username, f"Unauthorized attempt to {action} {resource}")
             Log.audit_trail(user.username, action, resource, "DENIED - Insufficient Permissions")
-            self.denied_attempts += 1
-            return {"status": "DENIED", "message": "Insufficient permissions", "reason": "insufficient_permissions"}
+            self._record_denial()
+            return {
+                "status": "DENIED",
+                "message": "Insufficient permissions",
+                "reason": "insufficient_permissions",
+                "risk_level": risk_level
+            }
 
-        # Step 7: Compliance check
-        violations = ComplianceEngine.check_compliance(user_data)
+        violations = decision["violations"]
         if violations:
             Log.audit_trail(user.username, action, resource, f"COMPLIANCE_VIOLATION: {violations[0]}")
+        stage_timer.mark("enforce_logging")
 
         # Step 8: Apply DRM if publishing (Content Protection)
         if action == "PUBLISH":
-            DRM.apply_watermark(resource)
+            DRM.apply_watermark(resource, user.username)
             encrypted_resource = EncryptionEngine.encrypt_sensitive_data(resource)
+            stage_timer.mark("drm")
 
         # Step 9: Grant access and log
         Log.access_grant(user.username, resource)
         Log.audit_trail(user.username, action, resource, "GRANTED")
+        stage_timer.mark("grant")
         
         return {
             "status": "GRANTED",
@@ -594,16 +1081,145 @@ class AccessController:
             "reason": "access_granted",
             "risk_score": risk_score,
             "risk_level": risk_level,
-            "anomalies": anomalies,
+            "anomalies": list(anomalies),
             "timestamp": datetime.now().isoformat()
         }
 
+    def evaluate_batch(self, user, items, ip_address=None):
+        """
+        Evaluate many (resource, action) pairs for one user in one pass.
+        Identity, device, rate limit (one hit costing len(items) against
+        BATCH_ITEM_LIMIT per hour), risk,
+        permissions and compliance are resolved once per batch; per-item
+        work is a set lookup, and logs are emitted as grouped writes.
+        Returns one result per item, in order.
+        """
+        results = self._evaluate_batch(user, items, ip_address)
+        for result in results:
+            AccessMetrics.record_decision(result)
+        return results
+
+    def _evaluate_batch(self, user, items, ip_address=None):
+        items = [(resource, action) for resource, action in items]
+        
+        def deny_all(message, reason, **extra):
+            return [dict(status="DENIED", message=message, reason=reason, **extra) for _ in items]
+        
+        if not isinstance(user, (User, Principal)):
+            return deny_all("Invalid user object", "invalid_user")
+        if not items:
+            return []
+        
+        username = user.username
+        
+        # Step 1: Verify authentication (Identity)
+        if not user.is_authenticated():
+            AlertSystem.notify_failed_login(username)
+            Log.audit_trail_batch(username, [(a, r, "DENIED - Not Authenticated") for r, a in items])
+            self._record_denial(len(items))
+            return deny_all("User not logged in", "not_authenticated")
+
+        # Step 2: Verify device security (Device)
+        if not user.device_is_secure():
+            AlertSystem.notify_device_security_issue(username)
+            Log.audit_trail_batch(username, [(a, r, "DENIED - Device Security Issue") for r, a in items])
+            Log.threat_detected(username, "INSECURE_DEVICE", f"Device security check failed for {len(items)} resources")
+            return deny_all("Device does not meet security standards", "device_insecure")
+
+        # Step 3: Rate limiting check, one hit charged per item against the batch policy
+        if not RateLimiter.check_rate_limit(username, limit=AccessController.BATCH_ITEM_LIMIT, cost=len(items)):
+            return deny_all("Rate limit exceeded", "rate_limit_exceeded")
+
+        # Step 4: Risk scoring, once per batch
+        user_data = User.get_access_record(username) or {}
+        location_risk = DeviceFingerprint.location_risk(ip_address) if ip_address else None
+        risk_score = RiskScoring.calculate_risk_score(user_data, location_risk)
+        risk_level = RiskScoring.get_risk_level(risk_score)
+        RiskScoring.history.record(username, risk_score)
+        if risk_score > 80:
+            AlertSystem.send_alert(username, f"CRITICAL risk score: {risk_score}", "CRITICAL")
+            Log.threat_detected(username, "HIGH_RISK_SCORE", f"Risk score: {risk_score}")
+            return deny_all(f"Access denied - Risk score too high: {risk_score}", "high_risk_score",
+                            risk_level=risk_level)
+
+        # Steps 5-7: per-batch inputs for behavior, permissions and compliance
+        hour = datetime.now().hour
+        policy = policy_store.table
+        permitted_mask = policy.mask(user.role)
+        action_ids = policy.action_ids
+        violations = ComplianceEngine.check_compliance(user_data)
+        timestamp = datetime.now().isoformat()
+        
+        anomaly_memo = {}
+        results = []
+        audit_entries = []
+        granted_resources = []
+        unauthorized = []
+        anomalous = []
+        
+        for resource, action in items:
+            activity = {'hour': hour, 'action': action, 'resource': resource}
+            anomalies = anomaly_memo.get((resource, action))
+            if anomalies is None:
+                anomalies = anomaly_memo[(resource, action)] = BehaviorAnalysis.detect_anomalies(
+                    username, activity
+                )
+            BehaviorAnalysis.record_activity(username, activity)
+            if len(anomalies) > 2:
+                anomalous.append(", ".join(anomalies))
+            
+            action_id = action_ids.get(action)
+            if action_id is None or not (permitted_mask >> action_id) & 1:
+                unauthorized.append(f"Unauthorized attempt to {action} {resource}")
+                audit_entries.append((action, resource, "DENIED - Insufficient Permissions"))
+                results.append({"status": "DENIED", "message": "Insufficient permissions", "reason": "insufficient_permissions"})
+                continue
+            
+            if violations:
+                audit_entries.append((action, resource, f"COMPLIANCE_VIOLATION: {violations[0]}"))
+            
+            # Step 8: Apply DRM if publishing (Content Protection)
+            if action == "PUBLISH":
+                DRM.apply_watermark(resource, username)
+                EncryptionEngine.encrypt_sensitive_data(resource)
+            
+            # Step 9: Grant access
+            granted_resources.append(resource)
+            audit_entries.append((action, resource, "GRANTED"))
+            results.append({
+                "status": "GRANTED",
+                "message": "Access allowed",
+                "reason": "access_granted",
+                "risk_score": risk_score,
+                "risk_level": risk_level,
+                "anomalies": list(anomalies),
+                "timestamp": timestamp
+            })
+        
+        # Grouped alerts and log writes for the whole batch
+        if anomalous:
+            Log.threat_detected(username, "ANOMALOUS_BEHAVIOR", f"{len(anomalous)} batch requests, e.g. {anomalous[0]}")
+            AlertSystem.send_alert(username, f"Anomalous behavior detected in {len(anomalous)} batch requests", "HIGH")
+        if unauthorized:
+            AlertSystem.send_alert(
+                username,
+                f"Unauthorized access attempts in batch - {len(unauthorized)} of {len(items)} requests denied",
+                severity="CRITICAL"
+            )
+            Log.security_event_batch(username, unauthorized)
+            self._record_denial(len(unauthorized))
+        if granted_resources:
+            Log.access_grant_batch(username, granted_resources)
+        Log.audit_trail_batch(username, audit_entries)
+        return results
+
     def request_elevated_access(self, user, resource, action, justification):
         """Request elevated access with justification"""
         if not user.is_authenticated():
             return {"status": "DENIED", "message": "Authentication required"}
         
         # Log the request
+        AccessMetrics.elevated_requests.inc()
         Log.audit_trail(user.username, f"ELEVATED_ACCESS_REQUEST", resource, f"Action: {action} | Justification: {justification}")
         
         # Send to admin for approval
@@ -624,39 +1240,81 @@ class AccessController:
         return {
             "total_denied": self.denied_attempts,
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "active_sessions": len([u for u in User.users_db if User.users_db[u].get('authenticated')]),
+            "active_sessions": AccessMetrics.active_sessions.value,
+            "decisions_last_5_minutes": AccessMetrics.recent_decisions.total(),
+            # Evaluated decisions per risk level over the last hour
             "current_risk_assessment": {
-                "LOW": random.randint(40, 60),
-                "MEDIUM": random.randint(20, 40),
-                "HIGH": random.randint(5, 15),
-                "CRITICAL": random.randint(0, 5)
-            }
+                level: window.total() for level, window in AccessMetrics.recent_risk.items()
+            },
+            # Every user in the directory scored in one batch pass (refreshed per TTL)
+            "population_risk": population_risk.distribution(User.repository)
         }
     
     def get_detailed_metrics(self):
         """Get detailed security metrics"""
+        repository = User.repository
+        # Counts only; per-user detail is paged by /api/security/compliance-violations
+        compliance = ComplianceEngine.state.report()
+        total_users = repository.count()
+        secure_devices = repository.count(device_secure=True)
+        denied = AccessMetrics.decisions_with_status("DENIED")
+        
         return {
             "access_control_decisions": {
-                "granted": max(0, 100 - self.denied_attempts),
-                "denied": self.denied_attempts,
-                "pending": random.randint(0, 5)
+                "granted": AccessMetrics.decisions_with_status("GRANTED"),
+                "denied": denied,
+                "pending": AccessMetrics.elevated_requests.value
             },
             "threat_detection": {
-                "anomalies_detected": random.randint(0, 3),
-                "threats_blocked": self.denied_attempts,
-                "suspicious_activities": random.randint(0, 2)
+                "anomalies_detected": AccessMetrics.threats.get("ANOMALOUS_BEHAVIOR"),
+                "threats_blocked": denied,
+                "suspicious_activities": AccessMetrics.anomalous_requests.value
             },
             "compliance_status": {
-                "compliant": 3,
-                "non_compliant": 1,
-                "violations": ComplianceEngine.check_compliance(User.users_db.get("charlie", {}))
+                "compliant": compliance["compliant_users"],
+                "non_compliant": compliance["non_compliant_users"],
+                "violations": compliance["violations_by_rule"]
             },
             "device_security": {
-                "secure_devices": 3,
-                "insecure_devices": 1
+                "secure_devices": secure_devices,
+                "insecure_devices": total_users - secure_devices
             }
         }
 
 
+# Policy swaps change what every cached decision was based on
+policy_store.on_swap(lambda table: AccessController.decision_cache.invalidate_all())
+
+# A forked worker re-opens the shared audit store with its own file handles
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: setattr(Log, "audit_store", None))
+
+# Gauges read from live components, plus stage latency histograms
+registry.gauge(
+    "behavior_profile_bytes", "Memory held by learned behavior baselines",
+    callback=lambda: BehaviorAnalysis.model.memory_stats()["total_bytes"]
+)
+registry.gauge(
+    "risk_history_bytes", "Memory held by per-user risk score rings",
+    callback=lambda: RiskScoring.history.memory_stats()["total_bytes"]
+)
+registry.gauge("mfa_open_challenges", "MFA challenges awaiting an answer in this process", callback=lambda: len(MFA.expiry))
+registry.gauge("log_writer_queue_depth", "Log records waiting for the writer thread", callback=Log.writer.pending)
+registry.gauge(
+    "decision_cache_entries", "Cached access decisions",
+    callback=lambda: AccessController.decision_cache.stats()["size"]
+)
+registry.gauge(
+    "credential_checks_pending", "Password checks queued or running in the verifier pool",
+    callback=lambda: credential_verifier.stats()["pending"]
+)
+registry.gauge(
+    "credential_checks_rejected", "Password checks shed because the verifier pool was saturated",
+    callback=lambda: credential_verifier.stats()["rejected"]
+)
+registry.register_collector(lambda: histogram_lines(
+    "access_stage_latency_seconds", "Access pipeline stage latency", stage_timer.histograms
+))
+
 # Global access controller instance
 ac = AccessController()
@@ -0,0 +1,156 @@
+"""
+Despite Group Access Control System
+Compiled Role/Permission Policy Table
+"""
+
+import threading
+
+# ============================================================
+# POLICY DEFINITIONS
+# ============================================================
+
+DEFAULT_ROLE_PERMISSIONS = {
+    "Admin": ["CREATE", "APPROVE", "PUBLISH", "MONITOR", "DELETE", "CONFIGURE"],
+    "Creator": ["CREATE", "PUBLISH"],
+    "PR_Manager": ["APPROVE", "MONITOR", "CREATE"],
+    "Analyst": ["MONITOR", "VIEW"]
+}
+
+DEFAULT_LICENSE_RULES = {
+    "Admin": ["VIEW", "EDIT", "PUBLISH", "DISTRIBUTE"],
+    "Creator": ["VIEW", "EDIT", "PUBLISH"],
+    "PR_Manager": ["VIEW", "APPROVE", "PUBLISH"],
+    "Analyst": ["VIEW"]
+}
+
+
+# ============================================================
+# COMPILED TABLE
+# ============================================================
+
+class PolicyTable:
+    """Immutable policy table compiled from role -> action lists.
+
+    Every action name gets an integer ID and every role an integer
+    bitmask per rule set, so an authorization check is one dict lookup
+    and one bit test. Role lists are also kept as tuples in their
+    declared order for display.
+    """
+
+    __slots__ = ("version", "actions", "action_ids", "_masks", "_lists", "_definitions")
+
+    PERMISSIONS = "permissions"
+    DRM = "drm"
+
+    def __init__(self, role_permissions, license_rules, version=1):
+        for rules in (role_permissions, license_rules):
+            if not isinstance(rules, dict) or not all(
+                isinstance(role, str) and isinstance(actions, (list, tuple))
+                and all(isinstance(action, str) for action in actions)
+                for role, actions in rules.items()
+            ):
+                raise ValueError("Policy rules must map role names to lists of action names")
+        definitions = {
+            self.PERMISSIONS: {role: list(actions) for role, actions in role_permissions.items()},
+            self.DRM: {role: list(actions) for role, actions in license_rules.items()},
+        }
+        actions = sorted({
+            action for rules in definitions.values() for role_actions in rules.values() for action in role_actions
+        })
+        action_ids = {action: i for i, action in enumerate(actions)}
+
+        masks = {}
+        lists = {}
+        for kind, rules in definitions.items():
+            masks[kind] = {}
+            lists[kind] = {}
+            for role, role_actions in rules.items():
+                mask = 0
+                for action in role_actions:
+                    mask |= 1 << action_ids[action]
+                masks[kind][role] = mask
+                lists[kind][role] = tuple(dict.fromkeys(role_actions))
+
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "actions", tuple(actions))
+        object.__setattr__(self, "action_ids", action_ids)
+        object.__setattr__(self, "_masks", masks)
+        object.__setattr__(self, "_lists", lists)
+        object.__setattr__(self, "_definitions", definitions)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PolicyTable is immutable; use PolicyStore.swap()")
+
+    def action_id(self, action):
+        """Integer ID for ``action`` or None if no role grants it"""
+        return self.action_ids.get(action)
+
+    def mask(self, role, kind=PERMISSIONS):
+        """Bitmask of actions granted to ``role``"""
+        return self._masks[kind].get(role, 0)
+
+    def is_permitted(self, role, action, kind=PERMISSIONS):
+        """True if ``role`` may perform ``action``"""
+        action_id = self.action_ids.get(action)
+        return action_id is not None and (self._masks[kind].get(role, 0) >> action_id) & 1 == 1
+
+    def permissions(self, role):
+        """Role permissions in declared order"""
+        return self._lists[self.PERMISSIONS].get(role, ())
+
+    def drm_rights(self, role):
+        """DRM license rights for ``role`` in declared order"""
+        return self._lists[self.DRM].get(role, ())
+
+    def roles(self):
+        """Roles with a permission entry"""
+        return tuple(self._definitions[self.PERMISSIONS])
+
+    def to_dict(self):
+        """Source definitions, suitable for JSON"""
+        return {
+            "version": self.version,
+            "role_permissions": self._definitions[self.PERMISSIONS],
+            "license_rules": self._definitions[self.DRM],
+        }
+
+
+# ============================================================
+# HOT-SWAPPABLE STORE
+# ============================================================
+
+class PolicyStore:
+    """Holds the active PolicyTable.
+
+    Readers take ``store.table`` once per decision and keep using that
+    snapshot; ``swap`` compiles a new table off to the side and publishes
+    it with a single reference assignment, so a decision never sees a
+    half-updated policy. Listeners run after each swap.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def swap(self, role_permissions=None, license_rules=None):
+        """Compile and publish a new table; omitted rule sets are kept"""
+        with self._lock:
+            current = self.table.to_dict()
+            table = PolicyTable(
+                role_permissions if role_permissions is not None else current["role_permissions"],
+                license_rules if license_rules is not None else current["license_rules"],
+                version=self.table.version + 1
+            )
+            self.table = table
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(table)
+        return table
+
+    def on_swap(self, listener):
+        """Register ``listener(table)`` to run after every swap"""
+        self._listeners.append(listener)
+
+
+policy_store = PolicyStore(PolicyTable(DEFAULT_ROLE_PERMISSIONS, DEFAULT_LICENSE_RULES))
@@ -0,0 +1,187 @@
+"""
+Despite Group Access Control System
+Session Principals - Resolved Identity Cached per Login Session
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from app.expiry import TimerWheel
+from app.policy import policy_store
+
+
+class Principal:
+    """Immutable identity of a logged-in session.
+
+    Built once per session from the user directory and the policy table,
+    with permissions and DRM rights already resolved. Exposes the same
+    checks as ``User`` so the access pipeline accepts either.
+    """
+
+    __slots__ = (
+        "session_id", "username", "role", "device_secure",
+        "permissions", "drm_rights", "policy_version", "_permission_set"
+    )
+
+    def __init__(self, session_id, username, role, device_secure, table=None):
+        table = table if table is not None else policy_store.table
+        permissions = table.permissions(role)
+        values = {
+            "session_id": session_id,
+            "username": username,
+            "role": role,
+            "device_secure": bool(device_secure),
+            "permissions": permissions,
+            "drm_rights": table.drm_rights(role),
+            "policy_version": table.version,
+            "_permission_set": frozenset(permissions),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Principal is immutable; invalidate it in the PrincipalCache")
+
+    def __repr__(self):
+        return f"Principal({self.username!r}, role={self.role!r})"
+
+    @classmethod
+    def from_record(cls, session_id, username, record, table=None):
+        return cls(session_id, username, record["role"], record["device_secure"], table)
+
+    def is_authenticated(self):
+        return True
+
+    def device_is_secure(self):
+        return self.device_secure
+
+    def get_permissions(self):
+        return list(self.permissions)
+
+    def has_permission(self, action):
+        return action in self._permission_set
+
+    def get_drm_permissions(self):
+        return list(self.drm_rights)
+
+
+class PrincipalCache:
+    """Session ID -> Principal, bounded by TTL and LRU size.
+
+    Entries are dropped per session on logout, per user when the user's
+    record changes, and all at once when the policy table is swapped. A
+    principal built while an invalidation was in flight is not stored.
+    """
+
+    def __init__(self, ttl=300.0, max_entries=10000):
+        self.ttl = float(ttl)
+        self.max_entries = int(max_entries)
+        self._entries = OrderedDict()
+        self._sessions_by_user = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, ttl=None, max_entries=None):
+        """Change TTL or size bound; cached principals are dropped"""
+        with self._lock:
+            if ttl is not None:
+                self.ttl = float(ttl)
+            if max_entries is not None:
+                self.max_entries = int(max_entries)
+            self._clear()
+
+    def resolve(self, session_id, username, loader):
+        """Cached principal for the session, or build one with ``loader``.
+
+        ``loader(session_id, username)`` returns a Principal or None (user
+        no longer exists); None is returned and nothing is cached.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                expires_at, principal = entry
+                if expires_at > time.monotonic() and principal.username == username:
+                    self._entries.move_to_end(session_id)
+                    self.hits += 1
+                    return principal
+                self._remove(session_id)
+            self.misses += 1
+            generation = self._generation
+
+        principal = loader(session_id, username)
+        if principal is None:
+            return None
+        with self._lock:
+            if generation == self._generation:
+                self._store(principal)
+        return principal
+
+    def put(self, principal):
+        with self._lock:
+            self._store(principal)
+
+    def invalidate_session(self, session_id):
+        with self._lock:
+            self._generation += 1
+            self._remove(session_id)
+
+    def invalidate_user(self, username):
+        with self._lock:
+            self._generation += 1
+            for session_id in list(self._sessions_by_user.get(username, ())):
+                self._remove(session_id)
+
+    def invalidate_all(self):
+        with self._lock:
+            self._generation += 1
+            self._clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl
+            }
+
+    # Callers hold self._lock
+    def _store(self, principal):
+        if self.max_entries <= 0:
+            return
+        self._remove(principal.session_id)
+        self._entries[principal.session_id] = (time.monotonic() + self.ttl, principal)
+        self._sessions_by_user.setdefault(principal.username, set()).add(principal.session_id)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, session_id):
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        username = entry[1].username
+        sessions = self._sessions_by_user.get(username)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self._sessions_by_user[username]
+
+    def _clear(self):
+        self._entries.clear()
+        self._sessions_by_user.clear()
+
+
+principal_cache = PrincipalCache()
+policy_store.on_swap(lambda table: principal_cache.invalidate_all())
+
+# Sessions active in this process; each request re-arms SESSION_TIMEOUT
+# and an idle session's principal is dropped when it fires
+session_expiry = TimerWheel(
+    on_expire=principal_cache.invalidate_session, tick=1.0, slots=1024, name="session-expiry"
+)
@@ -0,0 +1,170 @@
+"""
+Despite Group Access Control System
+Constant-Time Rate Limiting Engines
+"""
+
+import math
+import time
+
+from app.shared_state import LocalStateStore
+
+# ============================================================
+# ENGINE BASE
+# ============================================================
+
+class RateLimitEngine:
+    """Base class for per-key rate limiters over a ``StateStore``.
+
+    Each key holds a small fixed-size list in the store, updated with one
+    atomic ``update`` call, so the same engine works per process
+    (``LocalStateStore``) or across workers (``SQLiteStateStore``). Idle
+    keys expire through the store TTL.
+    """
+
+    name = "base"
+
+    def __init__(self, limit=100, window=3600, idle_timeout=None, store=None):
+        self.limit = int(limit)
+        self.window = float(window)
+        self.idle_timeout = float(idle_timeout if idle_timeout is not None else window * 2)
+        self.store = store if store is not None else LocalStateStore()
+        self.prefix = f"rl:{self.name}:{self.limit}:{self.window:g}:"
+
+    def hit(self, key, cost=1, now=None):
+        """Consume ``cost`` units for ``key``; return False if over the limit"""
+        now = time.time() if now is None else now
+
+        def consume(state):
+            state = state or self._new_state(now)
+            return state, self._consume(state, cost, now)
+
+        return self.store.update(self.prefix + str(key), consume, ttl=self.idle_timeout)
+
+    def status(self, key, now=None):
+        """Usage snapshot for ``key`` without consuming anything"""
+        now = time.time() if now is None else now
+        state = list(self.store.get(self.prefix + str(key)) or self._new_state(now))
+        used = self._used(state, now)
+        return {
+            "algorithm": self.name,
+            "requests_in_window": used,
+            "limit": self.limit,
+            "window_seconds": self.window,
+            "remaining": max(0, self.limit - used),
+            "reset_in_seconds": round(self._reset_in(state, now), 1),
+            "blocked": used >= self.limit
+        }
+
+    def reset(self, key):
+        """Forget the usage recorded for ``key``"""
+        self.store.delete(self.prefix + str(key))
+
+    # Subclass hooks; state is a JSON-serializable list
+    def _new_state(self, now):
+        raise NotImplementedError
+
+    def _consume(self, state, cost, now):
+        raise NotImplementedError
+
+    def _used(self, state, now):
+        raise NotImplementedError
+
+    def _reset_in(self, state, now):
+        raise NotImplementedError
+
+
+# ============================================================
+# SLIDING WINDOW COUNTER
+# ============================================================
+
+class SlidingWindowLimiter(RateLimitEngine):
+    """Sliding-window counter: two fixed windows, weighted by overlap.
+
+    State per key is ``[window_start, previous_count, current_count]``. The estimate assumes requests in the previous window
+    were evenly spread, which bounds the error without storing one
+    timestamp per request.
+    """
+
+    name = "sliding_window"
+
+    def _new_state(self, now):
+        return [now - (now % self.window), 0, 0]
+
+    def _roll(self, state, now):
+        start = now - (now % self.window)
+        if start != state[0]:
+            # Previous window only counts if it is the one right before
+            state[1] = state[2] if start - state[0] == self.window else 0
+            state[2] = 0
+            state[0] = start
+
+    def _estimate(self, state, now):
+        weight = 1.0 - (now - state[0]) / self.window
+        return state[1] * weight + state[2]
+
+    def _consume(self, state, cost, now):
+        self._roll(state, now)
+        if self._estimate(state, now) + cost > self.limit:
+            return False
+        state[2] += cost
+        return True
+
+    def _used(self, state, now):
+        self._roll(state, now)
+        return int(math.ceil(self._estimate(state, now)))
+
+    def _reset_in(self, state, now):
+        return state[0] + self.window - now
+
+
+# ============================================================
+# TOKEN BUCKET
+# ============================================================
+
+class TokenBucketLimiter(RateLimitEngine):
+    """Token bucket refilled continuously at ``limit / window`` per second.
+
+    State per key is ``[tokens, last_refill]``.
+    """
+
+    name = "token_bucket"
+
+    def __init__(self, limit=100, window=3600, idle_timeout=None, store=None):
+        super().__init__(limit, window, idle_timeout, store)
+        self.rate = self.limit / self.window
+
+    def _new_state(self, now):
+        return [float(self.limit), now]
+
+    def _refill(self, state, now):
+        elapsed = now - state[1]
+        if elapsed > 0:
+            state[0] = min(float(self.limit), state[0] + elapsed * self.rate)
+            state[1] = now
+
+    def _consume(self, state, cost, now):
+        self._refill(state, now)
+        if state[0] < cost:
+            return False
+        state[0] -= cost
+        return True
+
+    def _used(self, state, now):
+        self._refill(state, now)
+        return int(math.ceil(self.limit - state[0]))
+
+    def _reset_in(self, state, now):
+        return (self.limit - state[0]) / self.rate if self.rate else 0.0
+
+
+LIMITER_BACKENDS = {
+    SlidingWindowLimiter.name: SlidingWindowLimiter,
+    TokenBucketLimiter.name: TokenBucketLimiter,
+}
+
+
+def create_limiter(backend="sliding_window", limit=100, window=3600, idle_timeout=None, store=None):
+    """Build a limiter engine by backend name"""
+    if backend not in LIMITER_BACKENDS:
+        raise ValueError(f"Unknown rate limit backend: {backend}")
+    return LIMITER_BACKENDS[backend](limit, window, idle_timeout, store)
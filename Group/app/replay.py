@@ -0,0 +1,219 @@
+"""
+Despite Group Access Control System
+Audit Log Replay - Bootstrap Behavior Profiles from History
+"""
+
+import glob
+import gzip
+import multiprocessing
+import os
+import queue as queue_module
+import re
+import time
+import zlib
+from datetime import datetime
+
+from app.audit_store import AUDIT_LINE
+from app.behavior import BehaviorModel, SnapshotWriter, read_snapshot
+
+# Terminal audit statuses of requests that reached the behavior check; one
+# per request, matching what BehaviorAnalysis.record_activity sees live (a
+# COMPLIANCE_VIOLATION line is always followed by the request's GRANTED line)
+LEARNABLE_STATUS = re.compile(r"(?:GRANTED|DENIED - Insufficient Permissions)$")
+NON_ACCESS_ACTIONS = frozenset({"POLICY_UPDATE"})
+
+_USER_MARK = " - User: "
+
+
+def audit_log_files(log_dir):
+    """audit_trail.log and its rotated archives (plain or .gz), oldest first"""
+    live = os.path.join(log_dir, "audit_trail.log")
+    archives = [
+        path for path in glob.glob(live + ".*")
+        if not path.endswith((".tmp", ".idx"))
+    ]
+    archives.sort(key=os.path.getmtime)
+    return archives + ([live] if os.path.exists(live) else [])
+
+
+def _open_log(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def partition_of(user, partitions):
+    """Stable user -> partition mapping (same in every process)"""
+    return zlib.crc32(user.encode("utf-8")) % partitions
+
+
+# ============================================================
+# PARTITION WORKER
+# ============================================================
+
+def _epoch(stamp, cache={}):
+    """'YYYY-MM-DD HH:MM:SS' (local time, as Log writes it) -> epoch seconds"""
+    value = cache.get(stamp)
+    if value is None:
+        if len(cache) > 4096:
+            cache.clear()
+        value = cache[stamp] = datetime(
+            int(stamp[0:4]), int(stamp[5:7]), int(stamp[8:10]),
+            int(stamp[11:13]), int(stamp[14:16]), int(stamp[17:19])
+        ).timestamp()
+    return value
+
+
+def _partition_worker(index, queue, results, output_path, model_options):
+    """Learn every line of this partition's users, then write a partial snapshot"""
+    model = BehaviorModel(shards=1, **model_options)
+    match_line = AUDIT_LINE.match
+    learnable = LEARNABLE_STATUS.match
+    parsed = learned = 0
+    while True:
+        batch = queue.get()
+        if batch is None:
+            break
+        for line in batch:
+            match = match_line(line)
+            if match is None:
+                continue
+            parsed += 1
+            user, action, resource, status = match.group("user", "action", "resource", "status")
+            if action in NON_ACCESS_ACTIONS or not learnable(status):
+                continue
+            stamp = match.group("ts")
+            model.observe(user, int(stamp[11:13]), action, resource, now=_epoch(stamp))
+            learned += 1
+    profiles = model.save_snapshot(output_path)
+    results.put((index, parsed, learned, profiles))
+
+
+# ============================================================
+# DRIVER
+# ============================================================
+
+def _put(queue, item, process, timeout=1.0):
+    """Block on a worker's bounded queue, failing if the worker has died"""
+    while True:
+        try:
+            queue.put(item, timeout=timeout)
+            return
+        except queue_module.Full:
+            if not process.is_alive():
+                raise RuntimeError("audit replay worker failed")
+
+
+def replay_audit_logs(paths, output_path, workers=None, batch_lines=5000, queue_depth=8,
+                      model_options=None, progress=None):
+    """Replay audit logs into a behavior profile snapshot at ``output_path``.
+
+    The calling process streams each file line by line and routes raw
+    lines by user to one worker per partition, so every user's events
+    are learned in order by a single process. Worker queues hold at most
+    ``queue_depth`` batches of ``batch_lines`` lines, which bounds memory
+    regardless of log size. Partial snapshots are merged by streaming.
+    """
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    model_options = model_options or {}
+    started = time.perf_counter()
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    queues = [context.Queue(maxsize=queue_depth) for _ in range(workers)]
+    part_paths = [f"{output_path}.part{index}" for index in range(workers)]
+    processes = [
+        context.Process(
+            target=_partition_worker,
+            args=(index, queues[index], results, part_paths[index], model_options),
+            daemon=True
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    buffers = [[] for _ in range(workers)]
+    lines = 0
+    bytes_read = 0
+    try:
+        for path in paths:
+            with _open_log(path) as f:
+                for line in f:
+                    lines += 1
+                    bytes_read += len(line)
+                    start = line.find(_USER_MARK)
+                    if start < 0:
+                        continue
+                    start += len(_USER_MARK)
+                    end = line.find(" | ", start)
+                    if end < 0:
+                        continue
+                    index = partition_of(line[start:end], workers)
+                    buffer = buffers[index]
+                    buffer.append(line.rstrip("\r\n"))
+                    if len(buffer) >= batch_lines:
+                        _put(queues[index], buffer, processes[index])
+                        buffers[index] = []
+            if progress:
+                progress(path, lines, bytes_read, time.perf_counter() - started)
+        for index, buffer in enumerate(buffers):
+            if buffer:
+                _put(queues[index], buffer, processes[index])
+        for index, queue in enumerate(queues):
+            _put(queue, None, processes[index])
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+
+    totals = {"parsed": 0, "learned": 0}
+    pending = workers
+    while pending:
+        try:
+            _, parsed, learned, _ = results.get(timeout=1.0)
+        except queue_module.Empty:
+            if any(process.exitcode not in (None, 0) for process in processes):
+                for process in processes:
+                    process.terminate()
+                raise RuntimeError("audit replay worker failed")
+            continue
+        totals["parsed"] += parsed
+        totals["learned"] += learned
+        pending -= 1
+    for process in processes:
+        process.join()
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp = f"{output_path}.tmp"
+    with open(temp, "wb") as out:
+        writer = None
+        for part_path in part_paths:
+            with open(part_path, "rb") as part:
+                for user, profile in read_snapshot(part):
+                    if writer is None:
+                        writer = SnapshotWriter(
+                            out, profile.actions.width, profile.actions.depth, profile.top_actions.k
+                        )
+                    writer.write(user, profile)
+            os.remove(part_path)
+        if writer is None:
+            writer = SnapshotWriter(out, **{
+                key: model_options[key] for key in ("width", "depth", "top_k") if key in model_options
+            })
+    os.replace(temp, output_path)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "files": len(paths),
+        "lines": lines,
+        "bytes": bytes_read,
+        "parsed": totals["parsed"],
+        "learned": totals["learned"],
+        "users": writer.count,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "lines_per_second": round(lines / elapsed) if elapsed else 0,
+        "output": output_path
+    }
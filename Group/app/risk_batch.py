@@ -0,0 +1,168 @@
+"""
+Despite Group Access Control System
+Batch Risk Scoring - Whole-Population Scores in One Vectorized Pass
+"""
+
+import threading
+import time
+from array import array
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # optional; the pure-Python path gives the same result
+    np = None
+
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+# Upper bounds (exclusive) of LOW, MEDIUM and HIGH; see RiskScoring.get_risk_level
+LEVEL_BOUNDS = (20, 50, 80)
+
+
+def off_hours_risk(hour):
+    """Time factor of RiskScoring.calculate_risk_score"""
+    return 15 if hour < 6 or hour > 22 else 0
+
+
+class RiskFeatures:
+    """Column store of the per-user risk inputs.
+
+    One typed array per factor instead of one dict per user, so the
+    whole population can be scored without touching Python objects.
+    ``location_risk`` is the per-user 0-10 location factor (0 until a
+    location source records one on the user).
+    """
+
+    __slots__ = ("usernames", "failed_attempts", "device_secure", "escalation_attempts", "location_risk")
+
+    def __init__(self):
+        self.usernames = []
+        self.failed_attempts = array("i")
+        self.device_secure = array("b")
+        self.escalation_attempts = array("i")
+        self.location_risk = array("b")
+
+    def __len__(self):
+        return len(self.usernames)
+
+    def append(self, username, record):
+        self.usernames.append(username)
+        self.failed_attempts.append(int(record.get("failed_attempts", 0)))
+        self.device_secure.append(1 if record.get("device_secure") else 0)
+        self.escalation_attempts.append(int(record.get("escalation_attempts", 0)))
+        self.location_risk.append(int(record.get("location_risk", 0)))
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from ``(username, record)`` pairs, e.g. ``repository.iter_users()``"""
+        features = cls()
+        append = features.append
+        for username, record in records:
+            append(username, record)
+        return features
+
+
+def score_population(features, hour=None):
+    """Scores (0-100) and level indexes into RISK_LEVELS for every user.
+
+    Same factors and weights as RiskScoring.calculate_risk_score; ``hour``
+    is the scalar hour of day used for the off-hours factor (default now).
+    Returns NumPy arrays when NumPy is installed, lists otherwise.
+    """
+    hour = datetime.now().hour if hour is None else hour
+    time_risk = off_hours_risk(hour)
+    if np is None:
+        return _score_population_python(features, time_risk)
+
+    failed = np.frombuffer(features.failed_attempts, dtype=np.int32)
+    secure = np.frombuffer(features.device_secure, dtype=np.int8)
+    escalation = np.frombuffer(features.escalation_attempts, dtype=np.int32)
+    location = np.frombuffer(features.location_risk, dtype=np.int8)
+
+    scores = np.minimum(failed, 5) * 5
+    scores += np.minimum(escalation * 10, 25)
+    scores += (1 - secure) * 20
+    scores += location
+    scores += time_risk
+    np.minimum(scores, 100, out=scores)
+    levels = np.searchsorted(np.asarray(LEVEL_BOUNDS), scores, side="right")
+    return scores, levels
+
+
+def _score_population_python(features, time_risk):
+    scores = []
+    levels = []
+    low, medium, high = LEVEL_BOUNDS
+    for failed, secure, escalation, location in zip(
+        features.failed_attempts, features.device_secure,
+        features.escalation_attempts, features.location_risk
+    ):
+        score = min(
+            min(failed * 5, 25) + (0 if secure else 20) + time_risk
+            + min(escalation * 10, 25) + location, 100
+        )
+        scores.append(score)
+        levels.append(0 if score < low else 1 if score < medium else 2 if score < high else 3)
+    return scores, levels
+
+
+def level_distribution(levels):
+    """{level name: user count} for the level indexes from score_population"""
+    if np is not None and isinstance(levels, np.ndarray):
+        counts = np.bincount(levels, minlength=len(RISK_LEVELS)).tolist()
+    else:
+        counts = [0] * len(RISK_LEVELS)
+        for level in levels:
+            counts[level] += 1
+    return dict(zip(RISK_LEVELS, counts))
+
+
+class PopulationRiskScorer:
+    """Periodically scored risk distribution of the whole user directory.
+
+    Loading the directory into columns dominates the cost, so the result
+    is reused for ``ttl`` seconds; concurrent callers during a refresh
+    get the previous snapshot instead of scoring again.
+    """
+
+    def __init__(self, ttl=60.0):
+        self.ttl = float(ttl)
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._refreshing = threading.Lock()
+
+    def configure(self, ttl=None):
+        if ttl is not None:
+            self.ttl = float(ttl)
+        self._expires_at = 0.0
+
+    def invalidate(self):
+        self._expires_at = 0.0
+
+    def distribution(self, repository, now=None):
+        """Cached ``{"users", "distribution", "scored_at", "seconds", "vectorized"}``"""
+        now = time.time() if now is None else now
+        snapshot = self._snapshot
+        if snapshot is not None and now < self._expires_at:
+            return snapshot
+        if not self._refreshing.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if self._snapshot is not None and now < self._expires_at:
+                return self._snapshot
+            started = time.perf_counter()
+            features = RiskFeatures.from_records(repository.iter_users())
+            _, levels = score_population(features, datetime.fromtimestamp(now).hour)
+            self._snapshot = {
+                "users": len(features),
+                "distribution": level_distribution(levels),
+                "scored_at": datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"),
+                "seconds": round(time.perf_counter() - started, 4),
+                "vectorized": np is not None
+            }
+            self._expires_at = now + self.ttl
+            return self._snapshot
+        finally:
+            self._refreshing.release()
+
+
+population_risk = PopulationRiskScorer()
@@ -0,0 +1,147 @@
+"""
+Despite Group Access Control System
+Risk History - Bounded per-User Ring Buffers of Risk Scores
+"""
+
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+
+class RiskRing:
+    """Fixed-size ring of (timestamp, score) samples for one user.
+
+    Scores (0-100) are stored as bytes and timestamps as 32-bit epoch
+    seconds, so a ring costs ``5 * capacity`` bytes of payload. A running
+    sum keeps the mean O(1); p95 and trend look at the at most
+    ``capacity`` retained samples.
+    """
+
+    __slots__ = ("scores", "times", "head", "size", "total")
+
+    def __init__(self, capacity):
+        self.scores = array("B", bytes(capacity))
+        self.times = array("I", bytes(4 * capacity))
+        self.head = 0
+        self.size = 0
+        self.total = 0
+
+    def add(self, score, now):
+        capacity = len(self.scores)
+        if self.size == capacity:
+            self.total -= self.scores[self.head]
+        else:
+            self.size += 1
+        self.scores[self.head] = score
+        self.times[self.head] = int(now)
+        self.total += score
+        self.head = (self.head + 1) % capacity
+
+    def ordered(self):
+        """Retained scores, oldest first"""
+        start = (self.head - self.size) % len(self.scores)
+        if start + self.size <= len(self.scores):
+            return self.scores[start:start + self.size]
+        return self.scores[start:] + self.scores[:self.head]
+
+    def summary(self):
+        scores = self.ordered()
+        count = len(scores)
+        ranked = sorted(scores)
+        # Least-squares slope of score over sample index: points per request
+        mean_index = (count - 1) / 2
+        mean = self.total / count
+        spread = sum((i - mean_index) ** 2 for i in range(count))
+        slope = sum((i - mean_index) * (s - mean) for i, s in enumerate(scores)) / spread if spread else 0.0
+        newest = (self.head - 1) % len(self.scores)
+        return {
+            "samples": count,
+            "latest": scores[-1],
+            "mean": round(mean, 2),
+            "p95": ranked[min(count - 1, int(0.95 * count))],
+            "min": ranked[0],
+            "max": ranked[-1],
+            "trend": round(slope, 3),
+            "direction": "rising" if slope > RiskHistory.TREND_EPSILON
+            else "falling" if slope < -RiskHistory.TREND_EPSILON else "stable",
+            "last_scored_at": self.times[newest]
+        }
+
+
+class RiskHistory:
+    """Per-user risk score history with a global memory cap.
+
+    Each user keeps the last ``capacity`` scores in a RiskRing; at most
+    ``max_users`` rings are kept, the least recently scored user being
+    dropped first, so memory is bounded by ``max_users * capacity * 5``
+    bytes plus per-ring overhead regardless of traffic.
+    """
+
+    TREND_EPSILON = 0.25  # points per sample below which the trend is "stable"
+
+    def __init__(self, capacity=64, max_users=100000):
+        self.capacity = int(capacity)
+        self.max_users = int(max_users)
+        self._rings = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def configure(self, capacity=None, max_users=None):
+        """Change ring size or user cap; recorded history is dropped"""
+        with self._lock:
+            if capacity is not None:
+                self.capacity = int(capacity)
+            if max_users is not None:
+                self.max_users = int(max_users)
+            self._rings.clear()
+
+    def record(self, user, score, now=None):
+        """Append one score (O(1))"""
+        now = time.time() if now is None else now
+        score = max(0, min(int(score), 100))
+        with self._lock:
+            ring = self._rings.get(user)
+            if ring is None:
+                if self.max_users <= 0:
+                    return
+                ring = self._rings[user] = RiskRing(self.capacity)
+                while len(self._rings) > self.max_users:
+                    self._rings.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._rings.move_to_end(user)
+            ring.add(score, now)
+
+    def summary(self, user):
+        """Rolling mean, p95 and trend of the user's recent scores, or None"""
+        with self._lock:
+            ring = self._rings.get(user)
+            return None if ring is None else ring.summary()
+
+    def scores(self, user):
+        """Recent scores, oldest first"""
+        with self._lock:
+            ring = self._rings.get(user)
+            return [] if ring is None else ring.ordered().tolist()
+
+    def forget(self, user):
+        with self._lock:
+            self._rings.pop(user, None)
+
+    def __len__(self):
+        return len(self._rings)
+
+    def memory_stats(self):
+        with self._lock:
+            users = len(self._rings)
+            ring_bytes = 5 * self.capacity
+            return {
+                "users": users,
+                "max_users": self.max_users,
+                "capacity": self.capacity,
+                "ring_bytes": ring_bytes,
+                "total_bytes": users * ring_bytes,
+                "max_bytes": self.max_users * ring_bytes,
+                "evictions": self.evictions
+            }
@@ -2,31 +2,69 @@
 Despite Group Flask Routes and API Endpoints - Enhanced
 """
 
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, current_app, Response, g
 from app.models import (
     User, AccessController, Log, AlertSystem, DRM, 
     RiskScoring, BehaviorAnalysis, ComplianceEngine, 
-    DeviceFingerprint, MFA, RateLimiter, EncryptionEngine
+    DeviceFingerprint, MFA, RateLimiter, EncryptionEngine,
+    AccessMetrics, ac
 )
+from app.metrics import registry
+from app.instrumentation import stage_timer
+from app.policy import policy_store
+from app.principal import Principal, principal_cache, session_expiry
+from app.credentials import VerifierSaturated
 from functools import wraps
 from datetime import datetime
+import os
+import secrets
+import time
 
 routes_bp = Blueprint('routes', __name__)
-ac = AccessController()
 
 # ============================================================
 # LOGIN REQUIRED DECORATOR
 # ============================================================
 
 def login_required(f):
+    """Require a live session and resolve its Principal into ``g.principal``
+    
+    Sessions idle for longer than SESSION_TIMEOUT are rejected.
+    """
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user' not in session:
             return jsonify({"error": "Unauthorized"}), 401
+        if 'sid' not in session:
+            session['sid'] = secrets.token_urlsafe(16)
+        if not _touch_session():
+            return jsonify({"error": "Session expired"}), 401
+        principal = principal_cache.resolve(session['sid'], session['user'], User.load_principal)
+        if principal is None:
+            session.clear()
+            return jsonify({"error": "Unauthorized"}), 401
+        g.principal = principal
         return f(*args, **kwargs)
     return decorated_function
 
 
+def _touch_session():
+    """Slide the session deadline; False (and the session cleared) if it lapsed"""
+    timeout = current_app.config.get('SESSION_TIMEOUT', 900)
+    now = time.time()
+    sid = session['sid']
+    last_seen = session.get('last_seen', now)
+    if now - last_seen > timeout:
+        session_expiry.cancel(sid)
+        principal_cache.invalidate_session(sid)
+        session.clear()
+        return False
+    if int(now) != int(last_seen) or 'last_seen' not in session:
+        session['last_seen'] = now
+    session_expiry.schedule(sid, timeout, now)
+    return True
+
+
 # ============================================================
 # WEB ROUTES
 # ============================================================
@@ -41,12 +79,8 @@ def index():
 @login_required
 def dashboard():
     """User dashboard"""
-    username = session.get('user')
-    user_data = User.users_db.get(username)
-    if not user_data:
-        return redirect(url_for('routes.login'))
-    
-    return render_template('dashboard.html', username=username, role=user_data['role'])
+    principal = g.principal
+    return render_template('dashboard.html', username=principal.username, role=principal.role)
 
 
 @routes_bp.route('/login')
@@ -76,15 +110,29 @@ def api_login():
     
     if not username or not password:
         return jsonify({"status": "error", "message": "Username and password required"}), 400
+    if not isinstance(username, str) or not isinstance(password, str):
+        return jsonify({"status": "error", "message": "Username and password must be strings"}), 400
     
-    user = User.authenticate(username, password)
+    try:
+        user = User.authenticate(username, password)
+    except VerifierSaturated:
+        # Shed login load instead of tying up request threads
+        response = jsonify({"status": "error", "message": "Login service busy, retry shortly"})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     
     if not user:
         AlertSystem.notify_failed_login(username)
         return jsonify({"status": "error", "message": "Invalid credentials"}), 401
     
+    User.record_location(username, request.remote_addr)
     session['user'] = username
     session['role'] = user.role
+    session['sid'] = secrets.token_urlsafe(16)
+    principal = Principal(session['sid'], username, user.role, user.device_is_secure())
+    principal_cache.put(principal)
+    session['last_seen'] = time.time()
+    session_expiry.schedule(session['sid'], current_app.config.get('SESSION_TIMEOUT', 900))
     
     return jsonify({
         "status": "success",
@@ -92,8 +140,8 @@ def api_login():
         "user": {
             "username": username,
             "role": user.role,
-            "permissions": user.get_permissions(),
-            "device_secure": user.device_is_secure()
+            "permissions": principal.get_permissions(),
+            "device_secure": principal.device_is_secure()
         }
     }), 200
 
@@ -104,6 +152,8 @@ def api_logout():
     """API endpoint for logout"""
     username = session.get('user')
     Log.audit_trail(username, "LOGOUT", "SYSTEM", "SUCCESS")
+    session_expiry.cancel(session.get('sid'))
+    principal_cache.invalidate_session(session.get('sid'))
     session.clear()
     return jsonify({"status": "success", "message": "Logout successful"}), 200
 
@@ -113,20 +163,14 @@ def api_logout():
 def api_request_access():
     """API endpoint for requesting access to resources"""
     data = request.json
-    username = session.get('user')
     resource = data.get('resource')
     action = data.get('action')
     
-    if not resource or not action:
+    if not resource or not action or not isinstance(resource, str) or not isinstance(action, str):
         return jsonify({"status": "error", "message": "Resource and action required"}), 400
     
-    # Create user object
-    user_data = User.users_db.get(username)
-    user = User(username, user_data['role'], user_data['device_secure'])
-    user.authenticated = True
-    
     # Request access
-    result = ac.request_access(user, resource, action)
+    result = ac.request_access(g.principal, resource, action, ip_address=request.remote_addr)
     
     return jsonify({
         "status": "success",
@@ -135,25 +179,55 @@ def api_request_access():
     }), 200
 
 
+@routes_bp.route('/api/request-access/batch', methods=['POST'])
+@login_required
+def api_request_access_batch():
+    """API endpoint for evaluating many access requests in one call"""
+    data = request.json or {}
+    entries = data.get('requests')
+    
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"status": "error", "message": "Non-empty requests list required"}), 400
+    
+    max_items = current_app.config.get('BATCH_ACCESS_MAX_ITEMS', 5000)
+    if len(entries) > max_items:
+        return jsonify({"status": "error", "message": f"At most {max_items} requests per batch"}), 413
+    
+    items = []
+    for index, entry in enumerate(entries):
+        resource = entry.get('resource') if isinstance(entry, dict) else None
+        action = entry.get('action') if isinstance(entry, dict) else None
+        if not resource or not action or not isinstance(resource, str) or not isinstance(action, str):
+            return jsonify({"status": "error", "message": f"Resource and action required (item {index})"}), 400
+        items.append((resource, action))
+    
+    results = ac.evaluate_batch(g.principal, items, ip_address=request.remote_addr)
+    granted = sum(1 for result in results if result['status'] == "GRANTED")
+    
+    return jsonify({
+        "status": "success",
+        "results": results,
+        "summary": {
+            "total": len(results),
+            "granted": granted,
+            "denied": len(results) - granted
+        },
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }), 200
+
+
 @routes_bp.route('/api/user-info', methods=['GET'])
 @login_required
 def api_user_info():
     """API endpoint to get current user info"""
-    username = session.get('user')
-    user_data = User.users_db.get(username)
-    
-    if not user_data:
-        return jsonify({"error": "User not found"}), 404
-    
-    user = User(username, user_data['role'], user_data['device_secure'])
-    user.authenticated = True
+    principal = g.principal
     
     return jsonify({
-        "username": username,
-        "role": user_data['role'],
-        "permissions": user.get_permissions(),
-        "drm_permissions": user.get_drm_permissions(),
-        "device_secure": user_data['device_secure'],
+        "username": principal.username,
+        "role": principal.role,
+        "permissions": principal.get_permissions(),
+        "drm_permissions": principal.get_drm_permissions(),
+        "device_secure": principal.device_secure,
         "last_login": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }), 200
 
@@ -208,7 +282,6 @@ def api_test_scenarios():
 def api_run_test(scenario_id):
     """Run a specific test scenario"""
     username = session.get('user')
-    user_data = User.users_db.get(username)
     
     # Get scenario details
     scenarios = {
@@ -224,17 +297,15 @@ def api_run_test(scenario_id):
     
     scenario = scenarios[scenario_id]
     
-    # Create user and test access
-    user = User(username, user_data['role'], user_data['device_secure'])
-    user.authenticated = True
-    
+    # Test access as the session principal
+    user = g.principal
     result = ac.request_access(user, scenario['resource'], scenario['action'])
     
     return jsonify({
         "status": "success",
         "scenario_id": scenario_id,
         "user": username,
-        "role": user_data['role'],
+        "role": user.role,
         "test_result": result,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }), 200
@@ -253,16 +324,24 @@ def api_access_summary():
 
 @routes_bp.route('/api/users', methods=['GET'])
 def api_users():
-    """Get list of demo users"""
-    users_list = []
-    for username, data in User.users_db.items():
-        users_list.append({
-            "username": username,
-            "role": data['role'],
-            "device_secure": data['device_secure']
-        })
+    """Get a page of users.
+
+    Query parameters: role, after (last username of the previous page),
+    limit (default 100, max 1000).
+    """
+    try:
+        limit = min(int(request.args.get('limit', 100)), 1000)
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit must be an integer"}), 400
+    role = request.args.get('role')
+    users_list = User.repository.list_users(role=role, after=request.args.get('after'), limit=limit)
+    next_after = users_list[-1]['username'] if len(users_list) == limit else None
     
-    return jsonify({"users": users_list}), 200
+    return jsonify({
+        "users": users_list,
+        "total": User.repository.count(role=role),
+        "next_after": next_after
+    }), 200
 
 
 # ============================================================
@@ -274,9 +353,10 @@ def api_users():
 def api_risk_assessment():
     """Get comprehensive risk assessment"""
     username = session.get('user')
-    user_data = User.users_db.get(username, {})
+    user_data = User.get_access_record(username) or {}
+    location = DeviceFingerprint.locate(request.remote_addr)
     
-    risk_score = RiskScoring.calculate_risk_score(user_data)
+    risk_score = RiskScoring.calculate_risk_score(user_data, location["risk"])
     risk_level = RiskScoring.get_risk_level(risk_score)
     
     return jsonify({
@@ -285,11 +365,15 @@ def api_risk_assessment():
         "risk_assessment": {
             "score": risk_score,
             "level": risk_level,
+            # Scores of this user's recent access requests (None before the first one)
+            "history": RiskScoring.history.summary(username),
             "factors": {
                 "failed_login_attempts": user_data.get('failed_attempts', 0),
                 "device_security": "SECURE" if user_data.get('device_secure') else "INSECURE",
                 "time_based_anomaly": "DETECTED" if datetime.now().hour < 6 or datetime.now().hour > 22 else "NORMAL",
-                "permission_escalation_attempts": user_data.get('escalation_attempts', 0)
+                "permission_escalation_attempts": user_data.get('escalation_attempts', 0),
+                "location_risk": location["risk"],
+                "location": location["label"]
             },
             "timestamp": datetime.now().isoformat()
         }
@@ -309,7 +393,7 @@ def api_behavioral_analysis():
     }
     
     anomalies = BehaviorAnalysis.detect_anomalies(username, activity_context)
-    profile = BehaviorAnalysis.user_profiles.get(username, {})
+    profile = BehaviorAnalysis.get_profile(username) or {"events": 0, "warmed_up": False}
     
     return jsonify({
         "status": "success",
@@ -319,6 +403,7 @@ def api_behavioral_analysis():
             "current_activity_anomalies": anomalies,
             "anomaly_count": len(anomalies),
             "risk_level": "HIGH" if len(anomalies) > 2 else "LOW",
+            "model_memory": BehaviorAnalysis.model.memory_stats(),
             "timestamp": datetime.now().isoformat()
         }
     }), 200
@@ -329,9 +414,8 @@ def api_behavioral_analysis():
 def api_compliance_status():
     """Get compliance status and violations"""
     username = session.get('user')
-    user_data = User.users_db.get(username, {})
     
-    violations = ComplianceEngine.check_compliance(user_data)
+    violations = ComplianceEngine.state.violations(username)
     compliance_report = ComplianceEngine.generate_compliance_report()
     
     return jsonify({
@@ -355,25 +439,57 @@ def api_device_fingerprint():
     user_agent = data.get('user_agent', 'Unknown')
     ip_address = request.remote_addr
     
-    fingerprint = DeviceFingerprint.generate_fingerprint(user_agent, ip_address)
-    is_secure = DeviceFingerprint.validate_device_integrity(fingerprint)
-    encryption_status = DeviceFingerprint.check_encryption_status()
-    malware_status = DeviceFingerprint.check_malware_status()
+    # Posture checks are cached per fingerprint by the device registry
+    posture = DeviceFingerprint.assess_device(session.get('user'), user_agent, ip_address)
+    location = DeviceFingerprint.locate(ip_address)
     
     return jsonify({
         "status": "success",
         "device_fingerprint": {
-            "fingerprint_hash": fingerprint,
-            "integrity_valid": is_secure,
-            "encryption_enabled": encryption_status,
-            "malware_detected": malware_status,
-            "security_score": 85 if is_secure else 40,
+            "fingerprint_hash": posture.fingerprint,
+            "integrity_valid": posture.integrity_valid,
+            "encryption_enabled": posture.encryption_enabled,
+            "malware_detected": posture.malware_detected,
+            "device_secure": posture.secure,
+            "security_score": 85 if posture.integrity_valid else 40,
+            "assessed_at": datetime.fromtimestamp(posture.assessed_at).isoformat(),
             "ip_address": ip_address,
+            "location": location["label"],
+            "location_risk": location["risk"],
             "timestamp": datetime.now().isoformat()
         }
     }), 200
 
 
+@routes_bp.route('/api/security/devices', methods=['GET', 'POST'])
+@login_required
+def api_devices():
+    """Device registry and membership filter stats, or revoke / reinstate a
+    device fingerprint (requires CONFIGURE)"""
+    if request.method == 'GET':
+        return jsonify({"status": "success", "devices": DeviceFingerprint.registry.stats()}), 200
+    
+    username = session.get('user')
+    data = request.json or {}
+    fingerprint = data.get('fingerprint')
+    reinstate = bool(data.get('reinstate', False))
+    action = "DEVICE_REINSTATE" if reinstate else "DEVICE_REVOKE"
+    if not g.principal.has_permission("CONFIGURE"):
+        Log.audit_trail(username, action, fingerprint or "DEVICE", "DENIED - Insufficient Permissions")
+        return jsonify({"status": "error", "message": "CONFIGURE permission required"}), 403
+    if not fingerprint:
+        return jsonify({"status": "error", "message": "fingerprint is required"}), 400
+    
+    posture = DeviceFingerprint.revoke_device(fingerprint, data.get('reason', ''), reinstate=reinstate)
+    Log.audit_trail(username, action, fingerprint, "SUCCESS")
+    return jsonify({
+        "status": "success",
+        "fingerprint": fingerprint,
+        "revoked": DeviceFingerprint.registry.is_revoked(fingerprint),
+        "device": posture.to_dict() if posture is not None else None
+    }), 200
+
+
 @routes_bp.route('/api/security/mfa/initiate', methods=['POST'])
 @login_required
 def api_mfa_initiate():
@@ -383,6 +499,8 @@ def api_mfa_initiate():
     challenge_type = data.get('type', 'EMAIL')
     
     challenge_token = MFA.send_challenge(username, challenge_type)
+    if challenge_token is None:
+        return jsonify({"status": "error", "message": "Too many open MFA challenges, retry later"}), 429
     
     return jsonify({
         "status": "success",
@@ -390,7 +508,7 @@ def api_mfa_initiate():
             "challenge_initiated": True,
             "type": challenge_type,
             "message": f"MFA challenge sent via {challenge_type}",
-            "expires_in": 300  # 5 minutes
+            "expires_in": MFA.CHALLENGE_TTL
         }
     }), 200
 
@@ -425,8 +543,6 @@ def api_mfa_verify():
 @login_required
 def api_elevated_access():
     """Request elevated access with justification"""
-    username = session.get('user')
-    user_data = User.users_db.get(username)
     data = request.json
     
     resource = data.get('resource')
@@ -436,10 +552,7 @@ def api_elevated_access():
     if not all([resource, action, justification]):
         return jsonify({"status": "error", "message": "Resource, action, and justification required"}), 400
     
-    user = User(username, user_data['role'], user_data['device_secure'])
-    user.authenticated = True
-    
-    result = AccessController().request_elevated_access(user, resource, action, justification)
+    result = ac.request_elevated_access(g.principal, resource, action, justification)
     
     return jsonify({
         "status": "success",
@@ -452,25 +565,121 @@ def api_elevated_access():
 def api_threat_detection():
     """Get threat detection status"""
     username = session.get('user')
+    recent_threats = AccessMetrics.recent_threats.total()
+    
+    if recent_threats == 0:
+        threat_level = "LOW"
+    elif recent_threats < 5:
+        threat_level = "MEDIUM"
+    elif recent_threats < 20:
+        threat_level = "HIGH"
+    else:
+        threat_level = "CRITICAL"
     
     return jsonify({
         "status": "success",
         "threat_detection": {
             "active": True,
-            "threats_detected": 0,
-            "threats_blocked": AccessController().denied_attempts,
-            "last_threat_detected": None,
+            "threats_detected": AccessMetrics.threats.value,
+            "threats_last_hour": recent_threats,
+            "threats_blocked": AccessMetrics.decisions_with_status("DENIED"),
+            "last_threat_detected": AccessMetrics.last_threat_at,
             "monitoring_status": "ACTIVE",
-            "threat_level": "LOW",
+            "threat_level": threat_level,
             "timestamp": datetime.now().isoformat()
         }
     }), 200
 
 
+@routes_bp.route('/api/security/decision-cache', methods=['GET'])
+@login_required
+def api_decision_cache():
+    """Get access decision cache statistics"""
+    return jsonify({
+        "status": "success",
+        "decision_cache": AccessController.decision_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "timestamp": datetime.now().isoformat()
+    }), 200
+
+
+@routes_bp.route('/api/security/policies', methods=['GET', 'PUT'])
+@login_required
+def api_policies():
+    """Get the active policy table, or hot-swap it (requires CONFIGURE)"""
+    if request.method == 'GET':
+        return jsonify({"status": "success", "policies": policy_store.table.to_dict()}), 200
+    
+    username = session.get('user')
+    if not g.principal.has_permission("CONFIGURE"):
+        Log.audit_trail(username, "POLICY_UPDATE", "POLICY_TABLE", "DENIED - Insufficient Permissions")
+        return jsonify({"status": "error", "message": "CONFIGURE permission required"}), 403
+    
+    data = request.json or {}
+    try:
+        table = policy_store.swap(data.get('role_permissions'), data.get('license_rules'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    Log.audit_trail(username, "POLICY_UPDATE", "POLICY_TABLE", f"SUCCESS - version {table.version}")
+    return jsonify({"status": "success", "policies": table.to_dict()}), 200
+
+
+@routes_bp.route('/api/security/stage-latency', methods=['GET', 'POST'])
+@login_required
+def api_stage_latency():
+    """Per-stage latency histograms for the access pipeline
+    
+    POST {"enabled": bool, "reset": bool} toggles or clears them (requires CONFIGURE).
+    """
+    if request.method == 'POST':
+        if not g.principal.has_permission("CONFIGURE"):
+            return jsonify({"status": "error", "message": "CONFIGURE permission required"}), 403
+        data = request.json or {}
+        for field in ('enabled', 'reset'):
+            if field in data and not isinstance(data[field], bool):
+                return jsonify({"status": "error", "message": f"'{field}' must be true or false"}), 400
+        if 'enabled' in data:
+            stage_timer.set_enabled(data['enabled'])
+        if data.get('reset'):
+            stage_timer.reset()
+    
+    return jsonify({
+        "status": "success",
+        "stage_latency": stage_timer.snapshot(),
+        "timestamp": datetime.now().isoformat()
+    }), 200
+
+
+@routes_bp.route('/api/security/compliance-violations', methods=['GET'])
+@login_required
+def api_compliance_violations():
+    """Page through non-compliant users (requires CONFIGURE).
+
+    Query parameters: after (last username of the previous page),
+    limit (default 100, max 1000).
+    """
+    if not g.principal.has_permission("CONFIGURE"):
+        return jsonify({"status": "error", "message": "CONFIGURE permission required"}), 403
+    try:
+        limit = min(int(request.args.get('limit', 100)), 1000)
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit must be an integer"}), 400
+    violators = ComplianceEngine.state.violations_page(after=request.args.get('after'), limit=limit)
+    next_after = violators[-1]['username'] if len(violators) == limit else None
+    
+    return jsonify({
+        "status": "success",
+        "violations": violators,
+        "next_after": next_after,
+        "timestamp": datetime.now().isoformat()
+    }), 200
+
+
 @routes_bp.route('/api/security/detailed-metrics', methods=['GET'])
 def api_detailed_metrics():
     """Get detailed security metrics"""
-    metrics = AccessController().get_detailed_metrics()
+    metrics = ac.get_detailed_metrics()
     
     return jsonify({
         "status": "success",
@@ -479,6 +688,12 @@ def api_detailed_metrics():
     }), 200
 
 
+@routes_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition of the process metrics registry"""
+    return Response(registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 @routes_bp.route('/api/security/encryption-status', methods=['GET'])
 @login_required
 def api_encryption_status():
@@ -493,49 +708,91 @@ def api_encryption_status():
             "key_management": "HSM_PROTECTED",
             "compliance": "HIPAA_COMPLIANT",
             "last_audit": datetime.now().isoformat(),
-            "encryption_keys_rotated": "30_days_ago"
+            "encryption_keys_rotated": "30_days_ago",
+            "content_protection": EncryptionEngine.content.stats()
         }
     }), 200
 
 
+@routes_bp.route('/api/security/watermarks', methods=['GET'])
+@login_required
+def api_watermarks():
+    """Watermarking stats; with ?file=<name>, the mark on the caller's own copy"""
+    watermarker = DRM.watermarker
+    result = {"status": "success", "watermarking": watermarker.stats()}
+    file_name = request.args.get('file')
+    if file_name and watermarker.output_dir:
+        path = os.path.join(watermarker.output_dir, session.get('user'), os.path.basename(file_name))
+        result["watermark"] = DRM.extract_watermark(path)
+    return jsonify(result), 200
+
+
 @routes_bp.route('/api/security/audit-logs', methods=['GET'])
 @login_required
 def api_audit_logs():
-    """Get recent audit logs"""
-    # Read from audit trail log
-    logs = []
+    """Get audit logs, newest first, with filters and cursor pagination
+    
+    Query parameters: user, action, status, since, until (ISO-8601 or
+    epoch seconds), cursor (from next_cursor) and limit (max 500).
+    Entries are indexed on the log writer thread, so the newest may
+    appear up to one writer flush interval later.
+    """
+    args = request.args
     try:
-        with open("app/logs/audit_trail.log", "r") as f:
-            lines = f.readlines()
-            # Get last 10 entries
-            for line in lines[-10:]:
-                logs.append(line.strip())
-    except:
-        logs = ["No logs available"]
+        since = _parse_time(args.get('since'))
+        until = _parse_time(args.get('until'))
+        cursor = int(args['cursor']) if args.get('cursor') else None
+        limit = min(max(int(args.get('limit', 10)), 1), 500)
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid since, until, cursor or limit"}), 400
+    
+    page = Log.get_audit_store().query(
+        user=args.get('user'),
+        action=args.get('action'),
+        status=args.get('status'),
+        since=since,
+        until=until,
+        cursor=cursor,
+        limit=limit
+    )
     
     return jsonify({
         "status": "success",
-        "audit_logs": logs,
-        "total_entries": len(logs),
+        "audit_logs": [entry['line'] for entry in page['entries']],
+        "entries": page['entries'],
+        "next_cursor": page['next_cursor'],
+        "total_entries": page['total_entries'],
         "timestamp": datetime.now().isoformat()
     }), 200
 
 
+def _parse_time(value):
+    """Parse an ISO-8601 or epoch-seconds query value"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
 @routes_bp.route('/api/security/rate-limit-status', methods=['GET'])
 @login_required
 def api_rate_limit_status():
     """Get rate limiting status"""
     username = session.get('user')
-    request_count = len(RateLimiter.request_history.get(username, []))
+    status = RateLimiter.get_status(username)
     
     return jsonify({
         "status": "success",
         "rate_limiting": {
             "user": username,
-            "requests_this_hour": request_count,
-            "limit": 100,
-            "remaining": 100 - request_count,
-            "reset_time": "60_minutes",
-            "blocked": False
+            "algorithm": status['algorithm'],
+            "requests_this_hour": status['requests_in_window'],
+            "limit": status['limit'],
+            "remaining": status['remaining'],
+            "reset_time": f"{int(status['reset_in_seconds'] // 60)}_minutes",
+            "reset_in_seconds": status['reset_in_seconds'],
+            "blocked": status['blocked']
         }
     }), 200
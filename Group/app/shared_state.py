@@ -0,0 +1,333 @@
+"""
+Despite Group Access Control System
+Shared State Store - Counters and Keyed State Across Workers
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ============================================================
+# STORE INTERFACE
+# ============================================================
+
+class StateStore:
+    """Keyed state with TTLs and atomic read-modify-write.
+
+    Values must be JSON-serializable. ``update`` is the general atomic
+    primitive: ``fn(current_value_or_None)`` returns ``(new_value,
+    result)``; a ``new_value`` of None deletes the key. ``incr`` is the
+    fast path for plain counters.
+    """
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def incr(self, key, amount=1, ttl=None):
+        raise NotImplementedError
+
+    def update(self, key, fn, ttl=None):
+        raise NotImplementedError
+
+    def purge_expired(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def _expiry(ttl, now):
+        return now + ttl if ttl is not None else None
+
+
+# ============================================================
+# IN-PROCESS STORE
+# ============================================================
+
+class _Shard:
+    """One stripe of LocalStateStore: a dict, a heap of its expiries and its own lock"""
+
+    __slots__ = ("data", "expiries", "lock")
+
+    def __init__(self):
+        self.data = {}
+        self.expiries = []  # (expires_at, key); entries outdated by a later write are skipped
+        self.lock = threading.Lock()
+
+
+class LocalStateStore(StateStore):
+    """Sharded, lock-striped dictionary store for single-process deployments.
+
+    Keys are spread over ``shards`` stripes by hash, each with its own
+    lock, so threads working on different keys rarely contend; all
+    operations on one key go through the same stripe and stay atomic.
+    Each stripe keeps a heap of key expiries and every write drops the
+    keys whose expiry has passed (up to ``SWEEP_PER_WRITE``), whatever
+    order they were written in. Every heap entry is popped once, so this
+    is amortized O(log n) per write, and expired state is reclaimed
+    without a background sweep.
+    """
+
+    SWEEP_PER_WRITE = 256
+    DEFAULT_SHARDS = 64
+
+    def __init__(self, shards=DEFAULT_SHARDS):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self._shards = tuple(_Shard() for _ in range(shards))
+        self._count = len(self._shards)
+
+    def _shard(self, key):
+        return self._shards[hash(key) % self._count]
+
+    @staticmethod
+    def _live(data, key, now):
+        entry = data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= now:
+            del data[key]
+            return None
+        return entry
+
+    def _store(self, shard, key, value, ttl, now):
+        data, expiries = shard.data, shard.expiries
+        if value is None:
+            data.pop(key, None)
+        else:
+            expires_at = self._expiry(ttl, now)
+            data[key] = (value, expires_at)
+            if expires_at is not None:
+                heapq.heappush(expiries, (expires_at, key))
+        for _ in range(self.SWEEP_PER_WRITE):
+            if not expiries or expiries[0][0] > now:
+                break
+            expires_at, expired = heapq.heappop(expiries)
+            entry = data.get(expired)
+            if entry is not None and entry[1] == expires_at:
+                del data[expired]
+        if len(expiries) > 2 * len(data) + 64:
+            # mostly outdated entries from rewritten keys: rebuild from the live ones
+            shard.expiries = [(entry[1], k) for k, entry in data.items() if entry[1] is not None]
+            heapq.heapify(shard.expiries)
+
+    def get(self, key, default=None):
+        shard = self._shard(key)
+        with shard.lock:
+            entry = self._live(shard.data, key, time.time())
+            return default if entry is None else entry[0]
+
+    def set(self, key, value, ttl=None):
+        shard = self._shard(key)
+        with shard.lock:
+            self._store(shard, key, value, ttl, time.time())
+
+    def delete(self, key):
+        shard = self._shard(key)
+        with shard.lock:
+            shard.data.pop(key, None)
+
+    def incr(self, key, amount=1, ttl=None):
+        shard = self._shard(key)
+        with shard.lock:
+            now = time.time()
+            entry = self._live(shard.data, key, now)
+            value = (entry[0] if entry else 0) + amount
+            self._store(shard, key, value, ttl, now)
+            return value
+
+    def update(self, key, fn, ttl=None):
+        shard = self._shard(key)
+        with shard.lock:
+            now = time.time()
+            entry = self._live(shard.data, key, now)
+            value, result = fn(entry[0] if entry else None)
+            self._store(shard, key, value, ttl, now)
+            return result
+
+    def purge_expired(self):
+        purged = 0
+        for shard in self._shards:
+            with shard.lock:
+                now = time.time()
+                expiries = shard.expiries
+                while expiries and expiries[0][0] <= now:
+                    expires_at, key = heapq.heappop(expiries)
+                    entry = shard.data.get(key)
+                    if entry is not None and entry[1] == expires_at:
+                        del shard.data[key]
+                        purged += 1
+        return purged
+
+    def shard_sizes(self):
+        """Key count per stripe (for checking the hash spread)"""
+        return [len(shard.data) for shard in self._shards]
+
+    def __len__(self):
+        return sum(len(shard.data) for shard in self._shards)
+
+
+# ============================================================
+# CROSS-PROCESS STORE (SQLITE WAL)
+# ============================================================
+
+class SQLiteStateStore(StateStore):
+    """SQLite store in WAL mode shared by all worker processes on a host.
+
+    Each thread gets its own connection (re-opened after fork). Counters
+    use a single ``INSERT .. ON CONFLICT .. RETURNING`` statement;
+    ``update`` runs inside ``BEGIN IMMEDIATE`` so the read-modify-write
+    is serialized across processes. Expired rows are purged in small
+    batches every ``PURGE_EVERY`` writes.
+    """
+
+    PURGE_EVERY = 1000
+    PURGE_BATCH = 256
+
+    def __init__(self, path="app/data/shared_state.db", busy_timeout=5000):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " key TEXT PRIMARY KEY,"
+            " value,"
+            " expires_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS kv_expires ON kv(expires_at)")
+
+    def _conn(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+            local.conn = conn
+            local.pid = os.getpid()
+        return local.conn
+
+    @staticmethod
+    def _encode(value):
+        return value if isinstance(value, (int, float)) and not isinstance(value, bool) else json.dumps(value)
+
+    @staticmethod
+    def _decode(value):
+        return json.loads(value) if isinstance(value, str) else value
+
+    def _after_write(self, conn, now):
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute(
+                "DELETE FROM kv WHERE key IN "
+                "(SELECT key FROM kv WHERE expires_at <= ? LIMIT ?)",
+                (now, self.PURGE_BATCH)
+            )
+
+    def get(self, key, default=None):
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return default if row is None else self._decode(row[0])
+
+    def set(self, key, value, ttl=None):
+        if value is None:
+            return self.delete(key)
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, self._encode(value), self._expiry(ttl, now))
+        )
+        self._after_write(conn, now)
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def incr(self, key, amount=1, ttl=None):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "INSERT INTO kv (key, value, expires_at) VALUES (?1, ?2, ?3) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            " value = CASE WHEN expires_at IS NOT NULL AND expires_at <= ?4"
+            "         THEN excluded.value ELSE value + excluded.value END,"
+            " expires_at = excluded.expires_at "
+            "RETURNING value",
+            (key, amount, self._expiry(ttl, now), now)
+        ).fetchone()
+        self._after_write(conn, now)
+        return row[0]
+
+    def update(self, key, fn, ttl=None):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, now)
+            ).fetchone()
+            value, result = fn(None if row is None else self._decode(row[0]))
+            if value is None:
+                conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, self._encode(value), self._expiry(ttl, now))
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._after_write(conn, now)
+        return result
+
+    def purge_expired(self):
+        cursor = self._conn().execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+
+# ============================================================
+# PROCESS-WIDE DEFAULT STORE
+# ============================================================
+
+STATE_BACKENDS = {
+    "local": LocalStateStore,
+    "sqlite": SQLiteStateStore,
+}
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_state_store():
+    """Get the store shared by RateLimiter, MFA and AccessController"""
+    global _default_store
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = LocalStateStore()
+    return _default_store
+
+
+def configure_state_store(backend="local", **options):
+    """Replace the process-wide store, e.g. ``("sqlite", path=...)``"""
+    global _default_store
+    if backend not in STATE_BACKENDS:
+        raise ValueError(f"Unknown state backend: {backend}")
+    with _default_lock:
+        _default_store = STATE_BACKENDS[backend](**options)
+    return _default_store
@@ -0,0 +1,407 @@
+"""
+Despite Group Access Control System
+User Directory - Pluggable Repository (In-Memory or SQLite)
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Demo accounts seeded into an empty directory: all enrolled in MFA, only
+# charlie's device is insecure (and unencrypted)
+DEFAULT_USERS = {
+    "alice": {"password": "securePass123", "role": "Creator", "device_secure": True,
+              "mfa_enabled": True, "device_encrypted": True},
+    "bob": {"password": "adminPass456", "role": "Admin", "device_secure": True,
+            "mfa_enabled": True, "device_encrypted": True},
+    "charlie": {"password": "analyst789", "role": "Analyst", "device_secure": False,
+                "mfa_enabled": True, "device_encrypted": False},
+    "diana": {"password": "pr_manager123", "role": "PR_Manager", "device_secure": True,
+              "mfa_enabled": True, "device_encrypted": True},
+}
+
+# ============================================================
+# REPOSITORY INTERFACE
+# ============================================================
+
+class UserRepository:
+    """User records keyed by username.
+
+    A record is a dict with ``password``, ``role`` and ``device_secure``
+    plus any extra attributes (``mfa_enabled``, ``failed_attempts``, ...)
+    read by risk scoring and compliance. ``get`` returns a copy; change
+    records through ``update``.
+    """
+
+    def get(self, username):
+        raise NotImplementedError
+
+    def add(self, username, password, role, device_secure=True, **attrs):
+        raise NotImplementedError
+
+    def add_many(self, records):
+        """Bulk insert ``{"username": ..., "password": ..., "role": ...}`` dicts"""
+        count = 0
+        for record in records:
+            record = dict(record)
+            self.add(record.pop("username"), **record)
+            count += 1
+        return count
+
+    def update(self, username, **changes):
+        """Merge ``changes`` into the record; return it, or None if unknown"""
+        raise NotImplementedError
+
+    def delete(self, username):
+        raise NotImplementedError
+
+    def list_users(self, role=None, after=None, limit=100):
+        """Summaries ordered by username, starting after ``after`` (keyset paging)"""
+        raise NotImplementedError
+
+    def count(self, role=None, device_secure=None):
+        raise NotImplementedError
+
+    def iter_users(self, batch_size=1000, after=None, until=None):
+        """Yield ``(username, record)`` in username order, optionally only
+        for usernames in ``(after, until]``"""
+        raise NotImplementedError
+
+    def split_points(self, parts):
+        """Up to ``parts - 1`` usernames splitting the directory into
+        roughly equal ``(after, until]`` ranges for parallel scans"""
+        names = [summary["username"] for summary in self.list_users(limit=self.count())]
+        step = len(names) / parts if parts > 0 else 0
+        return sorted({names[int(step * i) - 1] for i in range(1, parts) if int(step * i) > 0})
+
+    def close(self):
+        pass
+
+    def seed(self, users=DEFAULT_USERS):
+        """Load ``users`` if the directory is empty"""
+        if self.count() == 0:
+            self.add_many(dict(data, username=username) for username, data in users.items())
+
+    @staticmethod
+    def _summary(username, record):
+        return {"username": username, "role": record["role"], "device_secure": record["device_secure"]}
+
+
+# ============================================================
+# IN-MEMORY REPOSITORY
+# ============================================================
+
+class DictUserRepository(UserRepository):
+    """Dictionary directory for demos and single-process deployments.
+
+    Keeps a role -> usernames index alongside the records so role
+    queries do not scan every user.
+    """
+
+    def __init__(self, users=None):
+        self._users = {}
+        self._by_role = {}
+        self._lock = threading.Lock()
+        if users:
+            self.seed(users)
+
+    def get(self, username):
+        record = self._users.get(username)
+        return dict(record) if record is not None else None
+
+    def add(self, username, password, role, device_secure=True, **attrs):
+        record = dict(attrs, password=password, role=role, device_secure=bool(device_secure))
+        with self._lock:
+            previous = self._users.get(username)
+            if previous is not None:
+                self._by_role[previous["role"]].discard(username)
+            self._users[username] = record
+            self._by_role.setdefault(role, set()).add(username)
+
+    def update(self, username, **changes):
+        with self._lock:
+            record = self._users.get(username)
+            if record is None:
+                return None
+            if "role" in changes and changes["role"] != record["role"]:
+                self._by_role[record["role"]].discard(username)
+                self._by_role.setdefault(changes["role"], set()).add(username)
+            record.update(changes)
+            return dict(record)
+
+    def delete(self, username):
+        with self._lock:
+            record = self._users.pop(username, None)
+            if record is None:
+                return False
+            self._by_role[record["role"]].discard(username)
+            return True
+
+    def list_users(self, role=None, after=None, limit=100):
+        names = self._by_role.get(role, ()) if role is not None else self._users
+        names = sorted(name for name in list(names) if after is None or name > after)[:limit]
+        return [self._summary(name, self._users[name]) for name in names if name in self._users]
+
+    def count(self, role=None, device_secure=None):
+        names = self._by_role.get(role, ()) if role is not None else self._users
+        if device_secure is None:
+            return len(names)
+        return sum(
+            1 for name in list(names)
+            if name in self._users and self._users[name]["device_secure"] == bool(device_secure)
+        )
+
+    def iter_users(self, batch_size=1000, after=None, until=None):
+        for username in sorted(self._users):
+            if (after is not None and username <= after) or (until is not None and username > until):
+                continue
+            record = self._users.get(username)
+            if record is not None:
+                yield username, dict(record)
+
+
+# ============================================================
+# SQLITE REPOSITORY
+# ============================================================
+
+class SQLiteUserRepository(UserRepository):
+    """SQLite directory that stays fast at millions of users.
+
+    Users live in a ``WITHOUT ROWID`` table clustered on username, so a
+    lookup is a single B-tree descent; ``(role, username)`` and
+    ``device_secure`` indexes serve role paging and posture counts.
+    Connections come from a bounded pool of ``pool_size`` shared by all
+    threads (re-created after fork), so a server that starts a thread per
+    request still reuses open connections, and every query is a constant
+    SQL string, so sqlite3's per-connection statement cache keeps them
+    prepared. Extra attributes are stored as JSON.
+    """
+
+    COLUMNS = ("password", "role", "device_secure")
+    STATEMENT_CACHE = 64
+
+    SELECT_ONE = "SELECT password, role, device_secure, attrs FROM users WHERE username = ?"
+    UPSERT = (
+        "INSERT OR REPLACE INTO users (username, password, role, device_secure, attrs) "
+        "VALUES (?, ?, ?, ?, ?)"
+    )
+
+    def __init__(self, path="app/data/users.db", busy_timeout=5000, pool_size=8):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.pool_size = max(1, int(pool_size))
+        self._pool_lock = threading.Lock()
+        self._reset_pool()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                " username TEXT PRIMARY KEY,"
+                " password TEXT NOT NULL,"
+                " role TEXT NOT NULL,"
+                " device_secure INTEGER NOT NULL DEFAULT 1,"
+                " attrs TEXT"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS users_role ON users(role, username)")
+            conn.execute("CREATE INDEX IF NOT EXISTS users_device ON users(device_secure)")
+
+    def _reset_pool(self):
+        self._pool = queue.LifoQueue()
+        self._opened = 0
+        self._pool_pid = os.getpid()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path, timeout=self.busy_timeout / 1000, isolation_level=None,
+            cached_statements=self.STATEMENT_CACHE, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        return conn
+
+    @contextmanager
+    def _conn(self):
+        """Borrow a pooled connection; waits up to busy_timeout when all are in use"""
+        with self._pool_lock:
+            if self._pool_pid != os.getpid():
+                self._reset_pool()  # the parent's connections are not ours to use
+            pool = self._pool
+            try:
+                conn = pool.get_nowait()
+            except queue.Empty:
+                conn = None
+                create = self._opened < self.pool_size
+                if create:
+                    self._opened += 1
+        if conn is None:
+            if create:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    with self._pool_lock:
+                        self._opened -= 1
+                    raise
+            else:
+                try:
+                    conn = pool.get(timeout=self.busy_timeout / 1000)
+                except queue.Empty:
+                    raise sqlite3.OperationalError("user directory connection pool exhausted") from None
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            pool.put(conn)
+
+    @staticmethod
+    def _row(password, role, device_secure, attrs):
+        record = json.loads(attrs) if attrs else {}
+        record.update(password=password, role=role, device_secure=bool(device_secure))
+        return record
+
+    @classmethod
+    def _params(cls, username, record):
+        attrs = {key: value for key, value in record.items() if key not in cls.COLUMNS}
+        return (
+            username, record["password"], record["role"], int(bool(record.get("device_secure", True))),
+            json.dumps(attrs) if attrs else None
+        )
+
+    def get(self, username):
+        with self._conn() as conn:
+            row = conn.execute(self.SELECT_ONE, (username,)).fetchone()
+        return self._row(*row) if row is not None else None
+
+    def add(self, username, password, role, device_secure=True, **attrs):
+        record = dict(attrs, password=password, role=role, device_secure=device_secure)
+        with self._conn() as conn:
+            conn.execute(self.UPSERT, self._params(username, record))
+
+    def add_many(self, records):
+        params = []
+        for record in records:
+            record = dict(record)
+            params.append(self._params(record.pop("username"), record))
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(self.UPSERT, params)
+            conn.execute("COMMIT")
+        return len(params)
+
+    def update(self, username, **changes):
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(self.SELECT_ONE, (username,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            record = self._row(*row)
+            record.update(changes)
+            conn.execute(self.UPSERT, self._params(username, record))
+            conn.execute("COMMIT")
+        return record
+
+    def delete(self, username):
+        with self._conn() as conn:
+            return conn.execute("DELETE FROM users WHERE username = ?", (username,)).rowcount > 0
+
+    def list_users(self, role=None, after=None, limit=100):
+        after = "" if after is None else after
+        with self._conn() as conn:
+            if role is None:
+                rows = conn.execute(
+                    "SELECT username, role, device_secure FROM users WHERE username > ? "
+                    "ORDER BY username LIMIT ?", (after, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT username, role, device_secure FROM users WHERE role = ? AND username > ? "
+                    "ORDER BY username LIMIT ?", (role, after, limit)
+                ).fetchall()
+        return [
+            {"username": username, "role": user_role, "device_secure": bool(secure)}
+            for username, user_role, secure in rows
+        ]
+
+    def count(self, role=None, device_secure=None):
+        if role is None and device_secure is None:
+            sql, params = "SELECT COUNT(*) FROM users", ()
+        elif role is None:
+            sql, params = "SELECT COUNT(*) FROM users WHERE device_secure = ?", (int(bool(device_secure)),)
+        elif device_secure is None:
+            sql, params = "SELECT COUNT(*) FROM users WHERE role = ?", (role,)
+        else:
+            sql, params = ("SELECT COUNT(*) FROM users WHERE role = ? AND device_secure = ?",
+                           (role, int(bool(device_secure))))
+        with self._conn() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    def iter_users(self, batch_size=1000, after=None, until=None):
+        after = "" if after is None else after
+        while True:
+            # one pooled connection per batch, returned before rows are yielded
+            with self._conn() as conn:
+                if until is None:
+                    rows = conn.execute(
+                        "SELECT username, password, role, device_secure, attrs FROM users "
+                        "WHERE username > ? ORDER BY username LIMIT ?", (after, batch_size)
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        "SELECT username, password, role, device_secure, attrs FROM users "
+                        "WHERE username > ? AND username <= ? ORDER BY username LIMIT ?", (after, until, batch_size)
+                    ).fetchall()
+            for username, *row in rows:
+                yield username, self._row(*row)
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+
+    def split_points(self, parts):
+        # Walks the primary key index once per split; no records are decoded
+        total = self.count()
+        points = set()
+        for i in range(1, parts):
+            offset = total * i // parts - 1
+            if offset >= 0:
+                with self._conn() as conn:
+                    row = conn.execute(
+                        "SELECT username FROM users ORDER BY username LIMIT 1 OFFSET ?", (offset,)
+                    ).fetchone()
+                if row is not None:
+                    points.add(row[0])
+        return sorted(points)
+
+    def close(self):
+        with self._pool_lock:
+            pool = self._pool
+            owned = self._pool_pid == os.getpid()
+            self._reset_pool()
+        while owned:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+USER_BACKENDS = {
+    "memory": DictUserRepository,
+    "sqlite": SQLiteUserRepository,
+}
+
+
+def create_user_repository(backend="memory", seed=True, **options):
+    """Build a repository, seeding the demo users into an empty directory"""
+    if backend not in USER_BACKENDS:
+        raise ValueError(f"Unknown user backend: {backend}")
+    repository = USER_BACKENDS[backend](**options)
+    if seed:
+        repository.seed()
+    return repository
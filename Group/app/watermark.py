@@ -0,0 +1,310 @@
+"""
+Despite Group Access Control System
+Content Watermarking - Per-User Forensic Marks with Zero-Copy File I/O
+"""
+
+import errno
+import hashlib
+import hmac
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Marks are an ISO-BMFF (MP4) 'uuid' box of fixed size appended after the
+# content: players skip unknown boxes, and a fixed size lets a later mark
+# overwrite the previous one in place.
+WATERMARK_BYTES = 512
+WATERMARK_UUID = bytes.fromhex("6467a1d5c0e94b7e9b7c3f1e2d7a5b10")
+_BOX = struct.Struct(">I4s16sH")  # size, 'uuid', extended type, payload length
+TAG_BYTES = 32
+PAYLOAD_BYTES = WATERMARK_BYTES - _BOX.size - TAG_BYTES
+
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.EPERM}
+
+
+def copy_bytes(source_fd, target_fd, count):
+    """Copy the first ``count`` bytes of ``source_fd`` to the same offsets of
+    ``target_fd`` without passing them through Python.
+
+    Uses copy_file_range (in-kernel; extents are shared on reflink-capable
+    filesystems) or sendfile, falling back to a buffered loop. Returns the
+    method used.
+    """
+    offset = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < count:
+                sent = os.copy_file_range(source_fd, target_fd, count - offset, offset, offset)
+                if sent == 0:
+                    break
+                offset += sent
+            if offset == count:
+                return "copy_file_range"
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            os.lseek(target_fd, offset, os.SEEK_SET)
+            while offset < count:
+                sent = os.sendfile(target_fd, source_fd, offset, count - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            if offset == count:
+                return "sendfile"
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+    while offset < count:
+        block = os.pread(source_fd, min(1 << 20, count - offset), offset)
+        if not block:
+            raise OSError(errno.EIO, f"source ended at {offset} of {count} bytes")
+        os.pwrite(target_fd, block, offset)
+        offset += len(block)
+    return "read_write"
+
+
+def _safe_name(name):
+    name = str(name)
+    if not name or name != os.path.basename(name) or name.startswith("."):
+        raise ValueError(f"invalid content name: {name!r}")
+    return name
+
+
+class Watermarker:
+    """Per-user watermarked copies of content files.
+
+    ``apply(file_name, username)`` gives ``username`` their own copy of
+    ``content_dir/file_name`` under ``output_dir/username/`` ending in an
+    HMAC-signed mark naming the user, the time and a mark id. The first
+    mark copies the untouched content with copy_bytes; after that, as long
+    as the source is unchanged, a new mark only overwrites the fixed-size
+    mark record in place, so its cost depends on the mark size, not the
+    file size. ``extract(path)`` reads and verifies a mark.
+
+    A first copy of a multi-GB file takes as long as the disk needs to
+    copy it. ``apply(..., wait=False)`` keeps that off the caller's thread:
+    a copy (or a mark whose copy is in progress) is handed to a pool of
+    ``workers`` threads and the mark is returned with method "queued".
+    """
+
+    def __init__(self, content_dir=None, output_dir=None, secret=None, workers=2):
+        self.content_dir = content_dir
+        self.output_dir = output_dir
+        self.workers = int(workers)
+        self._key = self._derive_key(secret if secret is not None else os.urandom(32))
+        self._lock = threading.Lock()
+        self._file_locks = {}  # target -> [lock, holders]; dropped when unused
+        self._pool = None
+        self.queued = 0
+        self.failed = 0
+        self.copies = 0
+        self.in_place = 0
+        self.bytes_copied = 0
+        self.methods = {}
+
+    @staticmethod
+    def _derive_key(secret):
+        secret = secret.encode("utf-8") if isinstance(secret, str) else bytes(secret)
+        return hashlib.blake2b(secret, digest_size=32, person=b"dg-watermark").digest()
+
+    def configure(self, content_dir=None, output_dir=None, secret=None, workers=None):
+        if content_dir is not None:
+            self.content_dir = content_dir
+        if output_dir is not None:
+            self.output_dir = output_dir
+        if secret is not None:
+            self._key = self._derive_key(secret)
+        if workers is not None:
+            with self._lock:
+                self.workers = int(workers)
+                pool, self._pool = self._pool, None
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    # ---- mark records ------------------------------------------------------
+
+    def _record(self, username, file_name, source_stat, timestamp):
+        payload = json.dumps({
+            "user": username,
+            "file": file_name,
+            "ts": round(timestamp, 3),
+            "id": os.urandom(8).hex(),
+            "size": source_stat.st_size,
+            "mtime_ns": source_stat.st_mtime_ns
+        }, separators=(",", ":")).encode("utf-8")
+        if len(payload) > PAYLOAD_BYTES:
+            raise ValueError("watermark fields too long")
+        body = _BOX.pack(WATERMARK_BYTES, b"uuid", WATERMARK_UUID, len(payload)) + payload.ljust(PAYLOAD_BYTES, b"\0")
+        return body + hmac.new(self._key, body, hashlib.sha256).digest()
+
+    def _parse(self, record):
+        if len(record) != WATERMARK_BYTES:
+            return None
+        size, box_type, uuid, length = _BOX.unpack_from(record)
+        if size != WATERMARK_BYTES or box_type != b"uuid" or uuid != WATERMARK_UUID or length > PAYLOAD_BYTES:
+            return None
+        body, tag = record[:-TAG_BYTES], record[-TAG_BYTES:]
+        if not hmac.compare_digest(tag, hmac.new(self._key, body, hashlib.sha256).digest()):
+            return None
+        return json.loads(record[_BOX.size:_BOX.size + length])
+
+    def extract(self, path):
+        """The verified mark at the end of ``path``, or None if it has none
+        (or it was forged or altered)"""
+        try:
+            with open(path, "rb") as f:
+                f.seek(-WATERMARK_BYTES, os.SEEK_END)
+                mark = self._parse(f.read(WATERMARK_BYTES))
+        except OSError:
+            return None
+        if mark is None:
+            return None
+        return {
+            "username": mark["user"],
+            "file_name": mark["file"],
+            "timestamp": mark["ts"],
+            "watermark_id": mark["id"],
+            "content_bytes": mark["size"]
+        }
+
+    # ---- marking -----------------------------------------------------------
+
+    def source_path(self, file_name):
+        """Path of a content file under ``content_dir`` (None if unset or not a plain name)"""
+        if self.content_dir is None:
+            return None
+        try:
+            return os.path.join(self.content_dir, _safe_name(file_name))
+        except ValueError:
+            return None
+
+    def apply(self, file_name, username, timestamp=None, wait=True):
+        """Mark ``username``'s copy of a content file; None if there is no
+        such file under ``content_dir``. With ``wait=False`` and ``workers``
+        set, only an in-place mark is written on this thread."""
+        source = self.source_path(file_name)
+        if source is None or not os.path.isfile(source) or self.output_dir is None:
+            return None
+        username = _safe_name(username)
+        timestamp = time.time() if timestamp is None else timestamp
+        target = os.path.join(self.output_dir, username, file_name)
+        background = not wait and self.workers > 0
+        started = time.perf_counter()
+        source_stat = os.stat(source)
+        record = self._record(username, file_name, source_stat, timestamp)
+        with self._target_lock(target, blocking=not background) as locked:
+            method = self._rewrite_mark(target, source_stat, record) if locked else None
+            if method is None and not background:
+                method = self._copy_with_mark(source, target, source_stat, record)
+        if method is None:
+            self._executor().submit(self._mark_in_background, source, target, source_stat, record)
+            method = "queued"
+            with self._lock:
+                self.queued += 1
+        mark = self._parse(record)
+        return {
+            "path": target,
+            "username": username,
+            "file_name": file_name,
+            "timestamp": timestamp,
+            "watermark_id": mark["id"],
+            "method": method,
+            "seconds": round(time.perf_counter() - started, 6)
+        }
+
+    @contextmanager
+    def _target_lock(self, target, blocking=True):
+        # One lock per target, kept only while someone holds or waits on it
+        with self._lock:
+            entry = self._file_locks.setdefault(target, [threading.Lock(), 0])
+            entry[1] += 1
+        locked = entry[0].acquire(blocking)
+        try:
+            yield locked
+        finally:
+            if locked:
+                entry[0].release()
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._file_locks[target]
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="watermark")
+            return self._pool
+
+    def _mark_in_background(self, source, target, source_stat, record):
+        try:
+            with self._target_lock(target):
+                if self._rewrite_mark(target, source_stat, record) is None:
+                    self._copy_with_mark(source, target, source_stat, record)
+        except OSError:
+            with self._lock:
+                self.failed += 1
+
+    def _rewrite_mark(self, target, source_stat, record):
+        # In place: only when the copy was made from this exact source version
+        try:
+            fd = os.open(target, os.O_RDWR)
+        except FileNotFoundError:
+            return None
+        try:
+            if os.fstat(fd).st_size != source_stat.st_size + WATERMARK_BYTES:
+                return None
+            current = self._parse(os.pread(fd, WATERMARK_BYTES, source_stat.st_size))
+            if current is None or (current["size"], current["mtime_ns"]) != (source_stat.st_size, source_stat.st_mtime_ns):
+                return None
+            os.pwrite(fd, record, source_stat.st_size)
+        finally:
+            os.close(fd)
+        with self._lock:
+            self.in_place += 1
+        return "in_place"
+
+    def _copy_with_mark(self, source, target, source_stat, record):
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        source_fd = os.open(source, os.O_RDONLY)
+        temp = None
+        try:
+            # A private temp file per copy, so concurrent copies never share one
+            target_fd, temp = tempfile.mkstemp(prefix=f".{os.path.basename(target)}.", suffix=".part", dir=directory)
+            try:
+                os.fchmod(target_fd, 0o640)
+                method = copy_bytes(source_fd, target_fd, source_stat.st_size)
+                os.pwrite(target_fd, record, source_stat.st_size)
+            finally:
+                os.close(target_fd)
+            os.replace(temp, target)
+        finally:
+            os.close(source_fd)
+            if temp is not None and os.path.exists(temp):
+                os.remove(temp)
+        with self._lock:
+            self.copies += 1
+            self.bytes_copied += source_stat.st_size
+            self.methods[method] = self.methods.get(method, 0) + 1
+        return method
+
+    def stats(self):
+        with self._lock:
+            return {
+                "content_dir": self.content_dir,
+                "output_dir": self.output_dir,
+                "copies": self.copies,
+                "in_place_marks": self.in_place,
+                "queued": self.queued,
+                "failed": self.failed,
+                "bytes_copied": self.bytes_copied,
+                "copy_methods": dict(self.methods),
+                "watermark_bytes": WATERMARK_BYTES
+            }
@@ -0,0 +1,82 @@
+"""
+Despite Group Access Control System
+Compliance Sweep Throughput Benchmark
+
+Builds a SQLite user directory of ``--users`` users (a mix of compliant
+and non-compliant records) and runs the parallel compliance sweep with
+one worker and with ``--workers``, reporting users/s and checking both
+runs produce the same violations.
+
+    python benchmarks/compliance_sweep_scale.py [--users 1000000] [--workers 4]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.compliance_sweep import sweep_compliance
+from app.user_repository import SQLiteUserRepository
+
+ROLES = ("Admin", "Creator", "PR_Manager", "Analyst")
+
+
+def records(count, seed=3):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "username": f"user{i:08d}",
+            "password": "scrypt$16384$8$1$c2FsdA$a2V5",
+            "role": rng.choice(ROLES),
+            "device_secure": rng.random() > 0.1,
+            "mfa_enabled": rng.random() > 0.05,
+            "device_encrypted": rng.random() > 0.02,
+            "failed_attempts": rng.choice((0, 0, 0, 1, 2, 7)),
+        }
+
+
+def digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compliance sweep throughput benchmark")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "users.db")
+        repository = SQLiteUserRepository(db_path)
+        started = time.perf_counter()
+        batch = []
+        for record in records(args.users):
+            batch.append(record)
+            if len(batch) == 50_000:
+                repository.add_many(batch)
+                batch = []
+        if batch:
+            repository.add_many(batch)
+        repository.close()
+        print(f"Built {args.users:,}-user directory in {time.perf_counter() - started:.1f}s")
+
+        digests = set()
+        for workers in sorted({1, args.workers}):
+            output = os.path.join(tmp, f"violations_{workers}.jsonl")
+            summary = sweep_compliance(db_path, output, workers=workers)
+            digests.add(digest(output))
+            print(f"  {workers:>3} workers: {summary['seconds']:7.2f}s  {summary['users_per_second']:>10,} users/s  "
+                  f"{summary['non_compliant_users']:,} non-compliant, "
+                  f"{os.path.getsize(output) / 1e6:.1f} MB JSONL")
+        print(f"  outputs identical: {len(digests) == 1}")
+        return 0 if len(digests) == 1 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
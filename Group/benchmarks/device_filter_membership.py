@@ -0,0 +1,96 @@
+"""
+Despite Group Access Control System
+Device Membership Filter Benchmark
+
+Fills a counting Bloom filter with ``--devices`` fingerprints, removes a
+tenth of them again, and reports memory, the measured false-positive rate
+on fingerprints never added against the target, and the cost of a
+"definitely unknown" answer from the filter versus a miss on the SQLite
+devices table. The filter is also saved and re-opened through mmap.
+
+    python benchmarks/device_filter_membership.py [--devices 1000000] [--error-rate 0.01]
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.bloom import CountingBloomFilter
+
+
+def fingerprint(i, salt="known"):
+    """Same shape as DeviceFingerprint.generate_fingerprint"""
+    return hashlib.sha256(f"{salt}_{i}".encode()).hexdigest()[:16]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Device membership filter benchmark")
+    parser.add_argument("--devices", type=int, default=1_000_000)
+    parser.add_argument("--probes", type=int, default=200_000, help="unknown fingerprints looked up")
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    known = [fingerprint(i) for i in range(args.devices)]
+    unknown = [fingerprint(i, "unknown") for i in range(args.probes)]
+    bloom = CountingBloomFilter(args.devices, args.error_rate)
+
+    started = time.perf_counter()
+    bloom.update(known)
+    insert_seconds = time.perf_counter() - started
+
+    removed = known[::10]
+    started = time.perf_counter()
+    for key in removed:
+        bloom.remove(key)
+    remove_seconds = time.perf_counter() - started
+    kept = [key for i, key in enumerate(known) if i % 10]
+    false_negatives = sum(1 for key in kept[:100_000] if key not in bloom)
+
+    started = time.perf_counter()
+    false_positives = sum(1 for key in unknown if key in bloom)
+    filter_seconds = time.perf_counter() - started
+
+    stats = bloom.stats()
+    print(f"{args.devices:,} devices, {len(removed):,} removed: {stats['memory_bytes'] / 2**20:.1f} MiB "
+          f"({stats['bits_per_item']} bits/item), {stats['hashes']} hashes")
+    print(f"  insert {args.devices / insert_seconds:>10,.0f}/s   remove {len(removed) / remove_seconds:>10,.0f}/s")
+    print(f"  false positives {false_positives / len(unknown):.4%} measured, "
+          f"{stats['expected_false_positive_rate']:.4%} expected, {args.error_rate:.2%} target; "
+          f"false negatives {false_negatives}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "devices.known.bloom")
+        started = time.perf_counter()
+        bloom.save(path)
+        mapped = CountingBloomFilter.open(path)
+        open_seconds = time.perf_counter() - started
+        agree = all((key in mapped) == (key in bloom) for key in unknown[:20_000])
+        print(f"  save + mmap open {open_seconds * 1000:.1f} ms, mapped filter agrees: {agree}")
+        mapped.close()
+
+        conn = sqlite3.connect(os.path.join(tmp, "devices.db"), isolation_level=None)
+        conn.execute("CREATE TABLE devices (fingerprint TEXT PRIMARY KEY, username TEXT) WITHOUT ROWID")
+        conn.execute("BEGIN")
+        conn.executemany("INSERT INTO devices VALUES (?, 'user')", ((key,) for key in kept))
+        conn.execute("COMMIT")
+        query = "SELECT username FROM devices WHERE fingerprint = ?"
+        started = time.perf_counter()
+        for key in unknown:
+            conn.execute(query, (key,)).fetchone()
+        sqlite_seconds = time.perf_counter() - started
+        conn.close()
+
+    print(f"  unknown lookup: filter {filter_seconds / len(unknown) * 1e6:.2f} us "
+          f"({len(unknown) / filter_seconds:,.0f}/s), SQLite miss {sqlite_seconds / len(unknown) * 1e6:.2f} us "
+          f"({len(unknown) / sqlite_seconds:,.0f}/s)")
+    return 1 if false_negatives or not agree else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Despite Group Access Control System
+IP Location Risk Lookup Benchmark
+
+Writes a synthetic range table of ``--ranges`` IPv4 ranges (plus nested
+CIDRs that override part of their parent) to CSV, loads it, and measures
+random address lookups at several table sizes, to show lookup cost grows
+only with log(n). A sample of lookups is checked against a linear scan.
+
+    python benchmarks/ip_location_lookup.py [--ranges 1000000] [--lookups 200000]
+"""
+
+import argparse
+import csv
+import ipaddress
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.ip_reputation import IPReputationTable
+
+LABELS = ("US", "DE", "NL", "BR", "IN", "CN", "RU", "ZA", "JP", "tor-exit", "hosting")
+
+
+def write_table(path, count, seed=11):
+    """``count`` disjoint start/end ranges covering most of 1.0.0.0-223.255.255.255,
+    with a nested /28 network row every 50 ranges; returns the rows for checking"""
+    rng = random.Random(seed)
+    low, high = int(ipaddress.IPv4Address("1.0.0.0")), int(ipaddress.IPv4Address("223.255.255.255"))
+    step = (high - low) // count
+    rows = []
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["start", "end", "network", "risk", "label"])
+        for i in range(count):
+            first = low + i * step
+            last = first + rng.randint(step // 2, step - 1)
+            risk, label = rng.randint(0, 10), rng.choice(LABELS)
+            writer.writerow([str(ipaddress.IPv4Address(first)), str(ipaddress.IPv4Address(last)), "", risk, label])
+            rows.append((first, last, risk))
+            if i % 50 == 0 and last - first > 64:
+                network = ipaddress.IPv4Network(((first + 32) & ~15, 28))
+                nested_risk = rng.randint(0, 10)
+                writer.writerow(["", "", str(network), nested_risk, "tor-exit"])
+                rows.append((int(network.network_address), int(network.broadcast_address), nested_risk))
+    return rows
+
+
+def expected_risk(rows, value, default):
+    risk = None
+    for first, last, row_risk in rows:
+        if first <= value <= last:
+            risk = row_risk  # nested networks are written after their parent
+    if risk is None:
+        return 0 if ipaddress.IPv4Address(value).is_private else default
+    return risk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IP location risk lookup benchmark")
+    parser.add_argument("--ranges", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = sorted({min(args.ranges, size) for size in (1_000, 100_000, args.ranges)})
+        for size in sizes:
+            path = os.path.join(tmp, f"ranges_{size}.csv")
+            rows = write_table(path, size)
+            table = IPReputationTable(default_risk=5)
+
+            started = time.perf_counter()
+            loaded = table.load_csv(path)
+            load_seconds = time.perf_counter() - started
+
+            addresses = [
+                str(ipaddress.IPv4Address(rng.randint(0x01000000, 0xDFFFFFFF))) for _ in range(args.lookups)
+            ]
+            location_risk = table.location_risk
+            started = time.perf_counter()
+            for address in addresses:
+                location_risk(address)
+            elapsed = time.perf_counter() - started
+            hits = sum(table.lookup(address)["matched"] for address in addresses[:10_000])
+
+            sample = addresses[:200] if size <= 100_000 else addresses[:20]
+            mismatches = sum(
+                1 for address in sample
+                if table.location_risk(address) != expected_risk(rows, int(ipaddress.IPv4Address(address)), 5)
+            )
+            print(f"{size:>10,} ranges ({loaded:,} segments): load {load_seconds:6.2f}s  "
+                  f"{elapsed / len(addresses) * 1e6:6.2f} us/lookup  "
+                  f"{len(addresses) / elapsed:>10,.0f} lookups/s  hit rate {hits / min(len(addresses), 10_000):.0%}  "
+                  f"mismatches {mismatches}/{len(sample)}")
+            if mismatches:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
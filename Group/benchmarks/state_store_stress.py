@@ -0,0 +1,156 @@
+"""
+Despite Group Access Control System
+Multi-Threaded Stress Benchmark for the Sharded State Store
+
+Checks that concurrent counters, MFA-style attempt counters and rate
+limits stay exact under contention, then compares throughput of a single
+stripe against the lock-striped store as threads are added.
+
+    python benchmarks/state_store_stress.py [--ops 20000] [--threads 1,2,4,8,16]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.rate_limit import SlidingWindowLimiter, TokenBucketLimiter
+from app.shared_state import LocalStateStore
+
+
+def run_threads(count, target):
+    """Start ``count`` threads on ``target(index)`` together; return elapsed seconds"""
+    barrier = threading.Barrier(count + 1)
+
+    def worker(index):
+        barrier.wait()
+        target(index)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+# ============================================================
+# CORRECTNESS
+# ============================================================
+
+def check_counters(store, threads, ops):
+    keys = [f"counter:{i}" for i in range(8)]
+
+    def work(index):
+        for n in range(ops):
+            store.incr(keys[(index + n) % len(keys)])
+
+    run_threads(threads, work)
+    total = sum(store.get(key, 0) for key in keys)
+    assert total == threads * ops, f"lost increments: {total} != {threads * ops}"
+    return total
+
+
+def check_attempt_limit(store, threads, max_attempts=3):
+    """Every thread guesses wrong; exactly ``max_attempts`` may be counted"""
+    store.set("mfa:stress", {"token": "RIGHT", "attempts": 0})
+    outcomes = []
+    outcomes_lock = threading.Lock()
+
+    def attempt(challenge):
+        if challenge is None:
+            return None, "missing"
+        if challenge["attempts"] >= max_attempts:
+            return None, "locked"
+        challenge["attempts"] += 1
+        return challenge, "mismatch"
+
+    def work(index):
+        outcome = store.update("mfa:stress", attempt)
+        with outcomes_lock:
+            outcomes.append(outcome)
+
+    run_threads(threads, work)
+    mismatches = outcomes.count("mismatch")
+    assert mismatches == max_attempts, f"{mismatches} attempts counted, limit is {max_attempts}"
+    return mismatches
+
+
+def check_rate_limit(store, engine_class, threads, limit=500):
+    engine = engine_class(limit=limit, window=3600, store=store)
+    allowed = []
+    allowed_lock = threading.Lock()
+
+    def work(index):
+        granted = sum(1 for _ in range(limit // threads + 50) if engine.hit("stress-user"))
+        with allowed_lock:
+            allowed.append(granted)
+
+    run_threads(threads, work)
+    assert sum(allowed) == limit, f"{engine.name}: {sum(allowed)} hits allowed, limit is {limit}"
+    return sum(allowed)
+
+
+# ============================================================
+# SCALING
+# ============================================================
+
+def throughput(shards, threads, ops, hold):
+    """Operations per second for ``threads`` workers on distinct keys.
+
+    ``hold`` seconds are spent inside each update while the stripe lock is
+    held and the GIL released, like a callback doing I/O.
+    """
+    store = LocalStateStore(shards=shards)
+
+    def bump(value):
+        if hold:
+            time.sleep(hold)
+        return (value or 0) + 1, None
+
+    def work(index):
+        prefix = f"user{index}:"
+        for n in range(ops):
+            store.update(prefix + str(n % 64), bump)
+
+    elapsed = run_threads(threads, work)
+    return threads * ops / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--ops", type=int, default=20000, help="operations per thread")
+    parser.add_argument("--threads", default="1,2,4,8,16", help="thread counts to compare")
+    parser.add_argument("--hold-us", type=float, default=50.0,
+                        help="GIL-releasing work inside each update for the held-lock run")
+    args = parser.parse_args()
+    thread_counts = [int(n) for n in args.threads.split(",")]
+    workers = max(thread_counts)
+
+    print("Correctness (%d threads)" % workers)
+    store = LocalStateStore()
+    print("  counters:        %d increments, none lost" % check_counters(store, workers, args.ops // 4))
+    print("  MFA attempts:    %d of %d guesses counted" % (check_attempt_limit(store, workers * 4), workers * 4))
+    for engine_class in (SlidingWindowLimiter, TokenBucketLimiter):
+        print("  %-16s %d hits allowed (limit 500)" % (engine_class.name + ":", check_rate_limit(store, engine_class, workers)))
+
+    hold_ops = max(1, int(args.ops / 100))
+    for title, ops, hold in (
+        ("in-memory updates", args.ops, 0.0),
+        ("updates holding the lock for %gus" % args.hold_us, hold_ops, args.hold_us / 1e6),
+    ):
+        print("\nThroughput, %s (ops/s)" % title)
+        print("  %7s %14s %14s %8s" % ("threads", "1 stripe", "64 stripes", "speedup"))
+        for threads in thread_counts:
+            single = throughput(1, threads, ops, hold)
+            striped = throughput(LocalStateStore.DEFAULT_SHARDS, threads, ops, hold)
+            print("  %7d %14.0f %14.0f %7.2fx" % (threads, single, striped, striped / single))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Despite Group Access Control System
+User Directory Lookup Latency Benchmark
+
+Grows a SQLite user directory in steps up to ``--users`` and measures
+random username lookups, role page reads and per-thread lookups at each
+size, to show latency stays flat as the directory grows.
+
+    python benchmarks/user_directory_lookup.py [--users 1000000] [--lookups 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.user_repository import SQLiteUserRepository
+
+ROLES = ("Admin", "Creator", "PR_Manager", "Analyst")
+
+
+def records(start, stop):
+    for i in range(start, stop):
+        yield {
+            "username": f"user{i:08d}",
+            "password": f"pw{i}",
+            "role": ROLES[i % len(ROLES)],
+            "device_secure": i % 7 != 0,
+            "mfa_enabled": i % 3 == 0,
+        }
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def time_lookups(repository, size, lookups):
+    names = [f"user{random.randrange(size):08d}" for _ in range(lookups)]
+    samples = []
+    for name in names:
+        start = time.perf_counter()
+        record = repository.get(name)
+        samples.append(time.perf_counter() - start)
+        assert record is not None, name
+    return samples
+
+
+def time_threaded(repository, size, lookups, threads):
+    per_thread = lookups // threads
+
+    def work():
+        for _ in range(per_thread):
+            repository.get(f"user{random.randrange(size):08d}")
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--path", help="database file (default: a temporary file)")
+    args = parser.parse_args()
+
+    directory = None
+    path = args.path
+    if path is None:
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, "users.db")
+    repository = SQLiteUserRepository(path)
+
+    steps = [size for size in (10_000, 100_000, 1_000_000, 10_000_000) if size < args.users] + [args.users]
+    print("%10s %10s %10s %10s %12s %14s" % (
+        "users", "load s", "p50 us", "p99 us", "role page us", "threaded op/s"))
+    loaded = 0
+    for size in steps:
+        start = time.perf_counter()
+        while loaded < size:
+            chunk = min(size, loaded + 100_000)
+            repository.add_many(records(loaded, chunk))
+            loaded = chunk
+        load_seconds = time.perf_counter() - start
+
+        samples = time_lookups(repository, size, args.lookups)
+        page_start = time.perf_counter()
+        after = f"user{random.randrange(size):08d}"
+        for _ in range(100):
+            page = repository.list_users(role="Analyst", after=after, limit=50)
+            after = page[-1]["username"] if page else None
+        page_us = (time.perf_counter() - page_start) / 100 * 1e6
+        threaded = time_threaded(repository, size, args.lookups, args.threads)
+
+        print("%10d %10.1f %10.1f %10.1f %12.1f %14.0f" % (
+            size, load_seconds, percentile(samples, 0.50) * 1e6, percentile(samples, 0.99) * 1e6,
+            page_us, threaded))
+
+    assert repository.count() == args.users
+    repository.close()
+    if directory is not None:
+        directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Despite Group Access Control System
+Watermark Latency Benchmark
+
+Generates content files of several sizes and measures, per size, the
+first watermark for a user (zero-copy copy of the content plus the mark)
+and repeat marks (mark rewritten in place), next to a plain Python
+read/write copy of the same file. Every mark is read back and verified.
+
+    python benchmarks/watermark_latency.py [--sizes-mb 16 256 1024] [--repeats 200]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.watermark import WATERMARK_BYTES, Watermarker
+
+
+def write_content(path, size, block=1 << 22):
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            piece = os.urandom(min(block, size - written))
+            f.write(piece)
+            written += len(piece)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watermark latency benchmark")
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[16, 256, 1024])
+    parser.add_argument("--repeats", type=int, default=200, help="in-place marks per size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        os.makedirs(content_dir)
+        watermarker = Watermarker(content_dir, os.path.join(tmp, "watermarked"), "benchmark-secret")
+        print(f"{WATERMARK_BYTES}-byte marks")
+        for size_mb in args.sizes_mb:
+            name = f"CampaignVideo_{size_mb}MB.mp4"
+            source = os.path.join(content_dir, name)
+            write_content(source, size_mb * 1_000_000)
+
+            started = time.perf_counter()
+            with open(source, "rb") as src, open(os.path.join(tmp, "plain_copy"), "wb") as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            plain_seconds = time.perf_counter() - started
+            os.remove(os.path.join(tmp, "plain_copy"))
+
+            first = watermarker.apply(name, f"user{size_mb}")
+            repeat_seconds = []
+            for _ in range(args.repeats):
+                mark = watermarker.apply(name, f"user{size_mb}")
+                repeat_seconds.append(mark["seconds"])
+            repeat_seconds.sort()
+            found = watermarker.extract(mark["path"])
+            ok = found is not None and found["watermark_id"] == mark["watermark_id"] and mark["method"] == "in_place"
+            print(f"{size_mb:>6,} MB: python copy {plain_seconds * 1000:9.1f} ms  "
+                  f"first mark ({first['method']}) {first['seconds'] * 1000:9.1f} ms  "
+                  f"repeat mark p50 {repeat_seconds[len(repeat_seconds) // 2] * 1e6:7.1f} us  "
+                  f"p99 {repeat_seconds[int(len(repeat_seconds) * 0.99)] * 1e6:7.1f} us  "
+                  f"verified {'ok' if ok else 'FAILED'}")
+            if not ok:
+                return 1
+            shutil.rmtree(os.path.dirname(mark["path"]))
+            os.remove(source)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
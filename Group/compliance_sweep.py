@@ -0,0 +1,56 @@
+"""
+Despite Group Access Control System
+Compliance Sweep CLI
+
+Checks every user in the SQLite user directory against the compliance
+rules across a process pool, writes non-compliant users as JSONL and a
+JSON summary next to it. Meant for nightly runs: exits 2 when any user
+is non-compliant.
+
+    python compliance_sweep.py [--db app/data/users.db] [--workers N] [--output FILE]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from app.compliance_sweep import sweep_compliance
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fleet-wide compliance sweep of the user directory")
+    parser.add_argument("--db", default=os.path.join(APP_DIR, "data", "users.db"))
+    parser.add_argument("--output", default=os.path.join(APP_DIR, "logs", "compliance_violations.jsonl"))
+    parser.add_argument("--summary", default=None, help="summary JSON path (default: <output>.summary.json)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"User directory not found: {args.db}", file=sys.stderr)
+        return 1
+
+    def progress(done, total, elapsed):
+        rate = done / elapsed if elapsed else 0
+        print(f"  {done:,}/{total:,} users checked ({rate:,.0f} users/s)")
+
+    summary = sweep_compliance(args.db, args.output, workers=args.workers,
+                               batch_size=args.batch_size, progress=progress)
+    summary_path = args.summary or f"{args.output}.summary.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"{summary['status']}: {summary['non_compliant_users']:,} of {summary['total_users']:,} users "
+          f"non-compliant ({summary['violations_detected']:,} violations)")
+    for rule, count in summary["violations_by_rule"].items():
+        print(f"  {count:>10,}  {rule}")
+    print(f"{summary['users_per_second']:,} users/s with {summary['workers']} workers in {summary['seconds']}s")
+    print(f"Violations: {summary['output']}\nSummary: {summary_path}")
+    return 0 if summary["status"] == "PASSED" else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Despite Group Access Control System
+Audit Log Replay CLI
+
+Rebuilds behavior profiles from audit_trail.log and its rotated archives
+so a fresh server starts with learned baselines instead of cold-start
+defaults. The snapshot is loaded by create_app on the next start.
+
+    python replay_audit_logs.py [--log-dir app/logs] [--workers N] [paths ...]
+"""
+
+import argparse
+import os
+import sys
+
+from app.replay import audit_log_files, replay_audit_logs
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bootstrap behavior profiles from audit logs")
+    parser.add_argument("paths", nargs="*", help="log files to replay (default: every audit log in --log-dir)")
+    parser.add_argument("--log-dir", default=os.path.join(APP_DIR, "logs"))
+    parser.add_argument("--output", default=os.path.join(APP_DIR, "data", "behavior_profiles.snap"))
+    parser.add_argument("--workers", type=int, default=None, help="partition processes (default: CPUs - 1)")
+    parser.add_argument("--batch-lines", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    paths = args.paths or audit_log_files(args.log_dir)
+    if not paths:
+        print(f"No audit logs found in {args.log_dir}", file=sys.stderr)
+        return 1
+
+    def progress(path, lines, bytes_read, elapsed):
+        rate = lines / elapsed if elapsed else 0
+        print(f"  {os.path.basename(path)}: {lines:,} lines, {bytes_read / 1e6:,.1f} MB, {rate:,.0f} lines/s")
+
+    print(f"Replaying {len(paths)} file(s)")
+    stats = replay_audit_logs(paths, args.output, workers=args.workers,
+                              batch_lines=args.batch_lines, progress=progress)
+    print(f"Learned {stats['learned']:,} of {stats['parsed']:,} audit events for {stats['users']:,} users "
+          f"in {stats['seconds']}s ({stats['lines_per_second']:,} lines/s, {stats['workers']} workers)")
+    print(f"Snapshot written to {stats['output']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())